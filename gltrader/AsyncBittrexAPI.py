@@ -0,0 +1,106 @@
+#===============================================================================
+# Asyncio twin of the BittrexAPI wrapper
+#
+# Same methods, signatures and response dicts as `BittrexAPI`, but each call
+# returns a coroutine to be awaited from an event loop. This allows e.g. the
+# candles of every monitored market to be fetched concurrently from a single
+# thread:
+#
+#     responses = await asyncio.gather(*[api.get_latest_candle(m, TICKINTERVAL_THIRTYMIN)
+#                                        for m in markets])
+#
+# The rate limiter (the process-wide one, unless one is passed in) is shared
+# with the blocking wrapper. Each wrapper counts its own API calls - the trader
+# adds the two counts up.
+#===============================================================================
+
+import asyncio
+
+from .BittrexAPI import BittrexAPI
+from .retry import circuitOpen
+from .bittrex_async import AsyncBittrex, default_dispatcher
+from .singleflight import AsyncSingleFlight
+
+
+
+class AsyncBittrexAPI(BittrexAPI):
+
+    # Class of the underlying per-version API objects
+    bittrexClass = AsyncBittrex
+
+
+    def newDispatcher(self, pool_connections, pool_maxsize):
+        #=======================================================================
+        # :returns: The default asyncio transport (aiohttp if installed)
+        #=======================================================================
+        return default_dispatcher(pool_maxsize=pool_maxsize, decoder=self.decoder)
+
+
+    def newSingleFlight(self):
+        #=======================================================================
+        # :returns: The request coalescer - Coroutines flavour
+        #=======================================================================
+        return AsyncSingleFlight()
+
+
+    async def close(self):
+        #=======================================================================
+        # Closes the transport - Must be awaited from the loop which used it
+        #=======================================================================
+        if hasattr(self.dispatch, "close"):
+            await self.dispatch.close()
+
+
+    async def list_markets_by_currency(self, currency):
+        #=======================================================================
+        # Helper function to see which markets exist for a currency.
+        #
+        # :param currency: String literal for the currency (ex: LTC)
+        # :type currency: str
+        # :return: List of markets that the currency appears in
+        # :rtype: list
+        #=======================================================================
+        self.ApiCalls = self.ApiCalls + 1
+        return [market['MarketName'] for market in (await self.BittrexAPI_V1_1.get_markets())['result']
+            if market['MarketName'].lower().endswith(currency.lower())]
+
+
+    async def _cached(self, endpoint, fetch, *args):
+        #=======================================================================
+        # Same as `BittrexAPI._cached`, awaiting `fetch` on a cache miss
+        #=======================================================================
+        key = (endpoint,) + args
+        hit, response = self.cache.lookup(key)
+        if hit:
+            return response
+        response = await self._query(endpoint, fetch, *args)
+        self._cacheStore(key, response)
+        return response
+
+
+    async def _resilientCall(self, endpoint, fetch, *args):
+        #=======================================================================
+        # Same as `BittrexAPI._resilientCall`, the backoff does not block the loop
+        #=======================================================================
+        breaker = self.resilience.breaker(endpoint)
+        if not breaker.allow():
+            return circuitOpen()
+        attempt = 0
+        while True:
+            response = await self._countedCall(fetch, *args)
+            wait = self.resilience.outcome(endpoint, breaker, response, attempt)
+            if wait is None:
+                return response
+            await asyncio.sleep(wait)
+            attempt += 1
+
+
+    async def _countedCall(self, fetch, *args):
+        self.ApiCalls = self.ApiCalls + 1
+        return await fetch(*args)
+
+
+    async def _listBitcoinMarkets(self):
+        # Uncached query for `list_bitcoin_markets`
+        return [market['MarketName'] for market in (await self.BittrexAPI_V1_1.get_markets())['result']
+            if market['MarketName'].lower().startswith("btc")]
@@ -13,29 +13,138 @@
 
 
 
+import time
 
-from .bittrex import Bittrex
+from .bittrex import Bittrex, SessionDispatcher
+from .ratelimit import getSharedScheduler
+from .cache import TTLCache
+from .singleflight import SingleFlight
+from .retry import Resilience, circuitOpen
+from .metrics import ApiMetrics
+from .decoding import ResponseDecoder
 
 BUY_ORDERBOOK = 'buy'
 SELL_ORDERBOOK = 'sell'
 BOTH_ORDERBOOK = 'both'
 
+# Order placement and cancellation paths (both API versions) - their calls
+# go out before any queued data query
+TRADE_PATHS = (
+    '/market/buylimit',
+    '/market/selllimit',
+    '/market/cancel',
+    '/key/market/tradebuy',
+    '/key/market/tradesell',
+    '/key/market/tradecancel'
+)
+
+# Path of the candle history endpoint, whose responses can be trimmed
+CANDLES_PATH = '/pub/market/GetTicks'
+
+# Default time-to-live (seconds) of the cached responses, per endpoint.
+# Endpoints not listed here are never cached.
+CACHE_TTLS = {
+    'get_markets'              : 3600,
+    'get_currencies'           : 3600,
+    'list_bitcoin_markets'     : 3600,
+    'get_wallet_health'        : 300,
+    'get_balance_distribution' : 300
+}
 
 
 class BittrexAPI(object):
 
     #===========================================================================
     # API Methods definitions
-    # 
+    #
     # Default call: API v2.0
     # If not available, v1.1
     #===========================================================================
 
-    def __init__(self, api_key, api_secret, calls_per_sec=1):
+    # Class of the underlying per-version API objects
+    bittrexClass = Bittrex
+
+    def __init__(self, api_key, api_secret, calls_per_sec=None, burst=None, endpoint_weights=None,
+                 pool_connections=2, pool_maxsize=32, dispatch=None, cache_ttls=None, cache_size=128,
+                 base_url=None, retries=2, retry_backoff=.5, retry_max_backoff=8., breaker_threshold=5,
+                 breaker_reset=60., metrics=None, candles_tail=None, trace_decoding=False, limiter=None):
+        #=======================================================================
+        # :param calls_per_sec: (float) Sustained API call rate, process-wide
+        # :param burst: (int) Max number of calls that can go out back-to-back
+        # :param endpoint_weights: (dict) Rate limit cost per endpoint path (default 1)
+        #     The rate limiter is normally configured once by its owner (see
+        #     Trader.getLimiter) - these three override it, for the whole
+        #     process if shared, and are left as they are when None
+        # :param pool_connections: (int) Number of per-host connection pools to keep
+        # :param pool_maxsize: (int) Max keep-alive connections per host
+        # :param dispatch: (callable) Optional transport, overrides the pooled session
+        # :param cache_ttls: (dict) Response cache TTL overrides, in seconds, per endpoint
+        #                    (0 disables caching for that endpoint)
+        # :param cache_size: (int) Max number of cached responses
+        # :param base_url: (str) Exchange root URL override, e.g. a local stub server
+        #                  'http://127.0.0.1:8080/api' (default: bittrex.com)
+        # :param retries: (int) Max retries of a read query after a transient failure
+        # :param retry_backoff: (float) Max wait before the first retry, in seconds,
+        #                       doubled at every further retry (the wait is jittered)
+        # :param retry_max_backoff: (float) Max wait before any retry, in seconds
+        # :param breaker_threshold: (int) Consecutive failures of an endpoint which
+        #                           stop its calls (0 to never stop them)
+        # :param breaker_reset: (float) Seconds before a stopped endpoint is probed again
+        # :param metrics: (ApiMetrics) Per-endpoint request metrics, to share them
+        #                 with another API object - new ones if None
+        # :param candles_tail: (int) Number of candles to keep from the
+        #                      get_candles responses - only those are decoded
+        #                      (None keeps all). Not applied with `dispatch`.
+        # :param trace_decoding: (bool) Whether to measure the peak memory of
+        #                        the candles decoding (diagnostics only)
+        # :param limiter: (PriorityScheduler) Rate limiter of the calls - the
+        #                 process-wide one (see ratelimit.py) if None
+        #=======================================================================
+        # Payload decoding - fastest JSON backend, candle history trimmed
+        self.decoder = ResponseDecoder(tails={CANDLES_PATH: candles_tail} if candles_tail else None,
+                                       traceMemory=trace_decoding)
+        # One pooled keep-alive session, shared by both API versions
+        if dispatch is None:
+            dispatch = self.newDispatcher(pool_connections, pool_maxsize)
+        self.dispatch = dispatch
+        # One rate limiter for the whole process, shared by both API versions -
+        # scheduled so that the trades pre-empt the queued queries (the trade
+        # endpoints are the same for every API object)
+        self.limiter = limiter if limiter is not None else getSharedScheduler()
+        self.limiter.configure(priority=TRADE_PATHS)
+        if calls_per_sec is not None or burst is not None or endpoint_weights is not None:
+            self.limiter.configure(rate=calls_per_sec, capacity=burst, weights=endpoint_weights)
+        # Calls, errors, latency and rate limiter wait of every request, per endpoint
+        self.metrics = metrics if metrics is not None else ApiMetrics()
         #Initialize two APIs, one for v1.1 and one for v2.0
-        self.BittrexAPI_V1_1 = Bittrex(api_key, api_secret, api_version="v1.1", calls_per_second=calls_per_sec)
-        self.BittrexAPI_V2_0 = Bittrex(api_key, api_secret, api_version="v2.0", calls_per_second=calls_per_sec)
+        self.BittrexAPI_V1_1 = self.bittrexClass(api_key, api_secret, api_version="v1.1", dispatch=dispatch,
+                                                 limiter=self.limiter, base_url=base_url, metrics=self.metrics)
+        self.BittrexAPI_V2_0 = self.bittrexClass(api_key, api_secret, api_version="v2.0", dispatch=dispatch,
+                                                 limiter=self.limiter, base_url=base_url, metrics=self.metrics)
         self.ApiCalls = 0
+        # Concurrent identical queries share one request
+        self.singleFlight = self.newSingleFlight()
+        # Response cache for the slow-changing endpoints
+        self.cache = TTLCache(cache_size)
+        self.cacheTTLs = dict(CACHE_TTLS)
+        self.cacheTTLs.update(cache_ttls or {})
+        # Retries and circuit breakers of the read queries
+        self.resilience = Resilience(retries, retry_backoff, retry_max_backoff, breaker_threshold, breaker_reset)
+
+
+    def newDispatcher(self, pool_connections, pool_maxsize):
+        #=======================================================================
+        # :returns: The default transport - A pooled keep-alive session
+        #=======================================================================
+        return SessionDispatcher(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                 decoder=self.decoder)
+
+
+    def newSingleFlight(self):
+        #=======================================================================
+        # :returns: The request coalescer - Threads flavour
+        #=======================================================================
+        return SingleFlight()
 
 
     def isLiveAPI(self):
@@ -69,8 +178,7 @@ class BittrexAPI(object):
         # :return: Available market info in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_markets()
+        return self._cached('get_markets', self.BittrexAPI_V2_0.get_markets)
 
 
     def get_currencies(self):
@@ -81,8 +189,7 @@ class BittrexAPI(object):
         # :return: Supported currencies info in JSON
         # :rtype : dict
         #=============================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_currencies()
+        return self._cached('get_currencies', self.BittrexAPI_V2_0.get_currencies)
 
 
     def get_ticker(self, market):
@@ -94,8 +201,7 @@ class BittrexAPI(object):
         # :return: Current values for given market in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V1_1.get_ticker(market)
+        return self._query('get_ticker', self.BittrexAPI_V1_1.get_ticker, market)
 
     def get_market_summaries(self):
         #=======================================================================
@@ -104,8 +210,7 @@ class BittrexAPI(object):
         # :return: Summaries of active exchanges in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_market_summaries()
+        return self._query('get_market_summaries', self.BittrexAPI_V2_0.get_market_summaries)
 
 
 
@@ -119,8 +224,7 @@ class BittrexAPI(object):
         # :return: Summaries of active exchanges of a coin in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_markersummary(market)
+        return self._query('get_marketsummary', self.BittrexAPI_V2_0.get_marketsummary, market)
 
 
     def get_orderbook(self, market, depth_type=BOTH_ORDERBOOK):
@@ -137,8 +241,7 @@ class BittrexAPI(object):
         # :return: Orderbook of market in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_orderbook(market, depth_type)
+        return self._query('get_orderbook', self.BittrexAPI_V2_0.get_orderbook, market, depth_type)
 
 
     def get_market_history(self, market):
@@ -164,8 +267,7 @@ class BittrexAPI(object):
         # :return: Market history in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_market_history(market)
+        return self._query('get_market_history', self.BittrexAPI_V2_0.get_market_history, market)
 
 
     def buy_limit(self, market, quantity, rate):
@@ -231,8 +333,7 @@ class BittrexAPI(object):
         # :return: Open orders info in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_open_orders(market)
+        return self._query('get_open_orders', self.BittrexAPI_V2_0.get_open_orders, market)
 
 
     def get_balances(self):
@@ -253,8 +354,7 @@ class BittrexAPI(object):
         # :return: Balances info in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_balances()
+        return self._query('get_balances', self.BittrexAPI_V2_0.get_balances)
 
 
     def get_balance(self, currency):
@@ -275,8 +375,7 @@ class BittrexAPI(object):
         # :return: Balance info in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_balance(currency)
+        return self._query('get_balance', self.BittrexAPI_V2_0.get_balance, currency)
 
 
     def get_deposit_address(self, currency):
@@ -319,8 +418,7 @@ class BittrexAPI(object):
         # :return: order history in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_order_history(market)
+        return self._query('get_order_history', self.BittrexAPI_V2_0.get_order_history, market)
 
 
     def get_order(self, uuid):
@@ -332,8 +430,7 @@ class BittrexAPI(object):
         # :return:
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_order(uuid)
+        return self._query('get_order', self.BittrexAPI_V2_0.get_order, uuid)
 
 
     def get_withdrawal_history(self, currency=None):
@@ -345,8 +442,7 @@ class BittrexAPI(object):
         # :return: withdrawal history in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_withdrawal_historu(currency)
+        return self._query('get_withdrawal_history', self.BittrexAPI_V2_0.get_withdrawal_history, currency)
 
 
     def get_deposit_history(self, currency=None):
@@ -358,8 +454,7 @@ class BittrexAPI(object):
         # :return: deposit history in JSON
         # :rtype : dict
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_deposit_history(currency)
+        return self._query('get_deposit_history', self.BittrexAPI_V2_0.get_deposit_history, currency)
 
 
     def list_markets_by_currency(self, currency):
@@ -391,7 +486,11 @@ class BittrexAPI(object):
         # :return: List of markets that the currency appears in
         # :rtype: list
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
+        return self._cached('list_bitcoin_markets', self._listBitcoinMarkets)
+
+
+    def _listBitcoinMarkets(self):
+        # Uncached query for `list_bitcoin_markets`
         return [market['MarketName'] for market in self.BittrexAPI_V1_1.get_markets()['result']
             if market['MarketName'].lower().startswith("btc")]
 
@@ -402,8 +501,7 @@ class BittrexAPI(object):
         # 
         # :return:
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_wallet_health()
+        return self._cached('get_wallet_health', self.BittrexAPI_V2_0.get_wallet_health)
 
 
     def get_balance_distribution(self):
@@ -414,8 +512,7 @@ class BittrexAPI(object):
         # 2.0 /pub/Currency/GetBalanceDistribution
         # :return:
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_balance_distribution()
+        return self._cached('get_balance_distribution', self.BittrexAPI_V2_0.get_balance_distribution)
 
 
     def get_pending_withdrawals(self, currency=None):
@@ -427,8 +524,7 @@ class BittrexAPI(object):
         # :return: pending widthdrawls in JSON
         # :rtype : list
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_pending_withdrawals(currency)
+        return self._query('get_pending_withdrawals', self.BittrexAPI_V2_0.get_pending_withdrawals, currency)
 
 
     def get_pending_deposits(self, currency=None):
@@ -440,8 +536,7 @@ class BittrexAPI(object):
         # :return: pending deposits in JSON
         # :rtype : list
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_pendimg_deposits(currency)
+        return self._query('get_pending_deposits', self.BittrexAPI_V2_0.get_pending_deposits, currency)
 
 
     def generate_deposit_address(self, currency):
@@ -454,7 +549,7 @@ class BittrexAPI(object):
         # :rtype : dict
         #=======================================================================
         self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.generate_depoit_address(currency)
+        return self.BittrexAPI_V2_0.generate_deposit_address(currency)
 
 
     def trade_sell(self, market=None, order_type=None, quantity=None, rate=None, time_in_effect=None,
@@ -558,8 +653,7 @@ class BittrexAPI(object):
         # :rtype: dict
         #
         #=======================================================================
-        self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_candles(market, tick_interval)
+        return self._query('get_candles', self.BittrexAPI_V2_0.get_candles, market, tick_interval)
 
 
     def get_latest_candle(self, market, tick_interval):
@@ -583,9 +677,119 @@ class BittrexAPI(object):
         # :rtype: dict
         #
         #=======================================================================
+        return self._query('get_latest_candle', self.BittrexAPI_V2_0.get_latest_candle, market, tick_interval)
+
+    def _cached(self, endpoint, fetch, *args):
+        #=======================================================================
+        # Serves `endpoint(*args)` from the response cache if possible, else
+        # calls `fetch(*args)` and caches the response for the endpoint TTL
+        #
+        # :returns: The (possibly cached) response
+        #=======================================================================
+        key = (endpoint,) + args
+        hit, response = self.cache.lookup(key)
+        if hit:
+            return response
+        response = self._query(endpoint, fetch, *args)
+        self._cacheStore(key, response)
+        return response
+
+
+    def _query(self, endpoint, fetch, *args):
+        #=======================================================================
+        # Calls `fetch(*args)` - unless an identical `endpoint(*args)` query is
+        # already in flight, in which case its response is shared.
+        #
+        # Transient failures are retried, and the call fails at once while the
+        # endpoint's circuit breaker is open.
+        #
+        # MUST NOT be used for the trading endpoints (trade_buy, trade_sell,
+        # cancel, ...): every one of those calls has to reach the exchange,
+        # exactly once.
+        #
+        # :returns: The API response
+        #=======================================================================
+        return self.singleFlight.do((endpoint,) + args, self._resilientCall, endpoint, fetch, *args)
+
+
+    def _resilientCall(self, endpoint, fetch, *args):
+        breaker = self.resilience.breaker(endpoint)
+        if not breaker.allow():
+            return circuitOpen()
+        attempt = 0
+        while True:
+            response = self._countedCall(fetch, *args)
+            wait = self.resilience.outcome(endpoint, breaker, response, attempt)
+            if wait is None:
+                return response
+            time.sleep(wait)
+            attempt += 1
+
+
+    def _countedCall(self, fetch, *args):
         self.ApiCalls = self.ApiCalls + 1
-        return self.BittrexAPI_V2_0.get_latest_candle(market, tick_interval)
+        return fetch(*args)
+
+
+    def _cacheStore(self, key, response):
+        # Failed API responses are never cached
+        if isinstance(response, dict) and not response.get("success", False):
+            return
+        self.cache.store(key, response, self.cacheTTLs.get(key[0], 0))
+
+
+    def invalidateCache(self, endpoint=None):
+        #=======================================================================
+        # Drops the cached responses of `endpoint` (e.g. 'get_markets'), or all
+        # of them if None
+        #=======================================================================
+        self.cache.invalidate(endpoint)
+
 
     def getApiCalls(self):
         return self.ApiCalls
 
+    def getCacheHits(self):
+        return self.cache.hits
+
+    def getCacheMisses(self):
+        return self.cache.misses
+
+    def getCoalescedCalls(self):
+        return self.singleFlight.shared
+
+    def getEndpointStats(self):
+        #=======================================================================
+        # :returns: Dict - Per endpoint and API version request metrics
+        #           (see `ApiMetrics.getStats`)
+        #=======================================================================
+        return self.metrics.getStats()
+
+    def getRetryStats(self):
+        #=======================================================================
+        # :returns: Dict - Retry counts and per-endpoint circuit breaker states
+        #           (see `Resilience.getStats`)
+        #=======================================================================
+        return self.resilience.getStats()
+
+    def getRateLimitStats(self):
+        #=======================================================================
+        # :returns: Dict - Queue wait metrics of the shared rate limiter, and
+        #           per scheduler lane (see `PriorityScheduler.getStats`)
+        #=======================================================================
+        return self.limiter.getStats()
+
+    def getDecodeStats(self):
+        #=======================================================================
+        # :returns: Dict - Per market candles decode time, payload size and
+        #           peak memory (see `ResponseDecoder.getStats`)
+        #=======================================================================
+        return self.decoder.getStats()
+
+    def getQueueDepths(self):
+        #=======================================================================
+        # :returns: Dict - Number of calls waiting for the rate limiter, per
+        #           lane ('trade' and 'query')
+        #=======================================================================
+        return self.limiter.getQueueDepths()
+
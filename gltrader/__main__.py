@@ -28,8 +28,13 @@ import sys
 # os.environ['KIVY_HOME'] = os.path.dirname(os.path.abspath(__file__))+'/../kivy'
 
 
-from gltrader.gltrader import GLTraderApp
-
 if __name__ == '__main__':
-    logger.info("Starting GLTrader...")
-    GLTraderApp().run()
+    # Headless - the GUI (and Kivy) is never imported
+    if "--headless" in sys.argv[1:]:
+        from gltrader.headless import main
+        logger.info("Starting GLTrader (headless)...")
+        main(sys.argv[1:])
+    else:
+        from gltrader.gltrader import GLTraderApp
+        logger.info("Starting GLTrader...")
+        GLTraderApp().run()
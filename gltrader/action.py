@@ -1,5 +1,3 @@
-from kivy.app import App
-from kivy.clock import Clock
 import time
 from .order import *
 from .notification import *
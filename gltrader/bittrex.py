@@ -51,6 +51,9 @@ else:
 
 import requests
 
+from .ratelimit import TokenBucket
+from .decoding import ResponseDecoder
+
 BUY_ORDERBOOK = 'buy'
 SELL_ORDERBOOK = 'sell'
 BOTH_ORDERBOOK = 'both'
@@ -97,30 +100,30 @@ def encrypt(api_key, api_secret, export=True, export_fn='secrets.json'):
 
 
 def using_requests(request_url, apisign):
-    
-    try:    
+
+    try:
         response = requests.get(
             request_url,
             headers={"apisign": apisign},
             timeout=10
         ).json()
-        
+
         return response
-    
-    except requests.exception.TIMEOUT:
+
+    except requests.exceptions.Timeout:
         return {
            'success' : False,
            'message' : 'REQUEST_TIMEOUT',
            'result'  : None
         }
 
-    except request.exceptions.RequestExceptions as e:
+    except requests.exceptions.RequestException as e:
         return {
            'success' : False,
            'message' : str(e),
            'result'  : None
         }
-        
+
 
     #===================================
     # ORIGINAL CODE
@@ -137,8 +140,84 @@ def using_requests(request_url, apisign):
     #===================================
 
 
+class SessionDispatcher(object):
+    #===========================================================================
+    # Pooled, keep-alive alternative to `using_requests`.
+    #
+    # Keeps a single requests.Session whose connection pools are reused across
+    # calls, so only the first request to a host pays for the TCP/TLS
+    # handshake. One instance is meant to be shared by every Bittrex object
+    # (v1.1 and v2.0) and every candle thread - urllib3 pools are thread safe.
+    #
+    # :param pool_connections: (int) Number of per-host pools to cache
+    # :param pool_maxsize: (int) Max number of keep-alive connections per host
+    # :param pool_block: (bool) If True, callers wait for a free connection
+    #                    instead of opening extra, throw-away connections
+    #                    once `pool_maxsize` is reached
+    # :param timeout: (float) Request timeout, in seconds
+    # :param decoder: (ResponseDecoder) Turns the payloads into response dicts
+    #===========================================================================
 
+    def __init__(self, pool_connections=2, pool_maxsize=32, pool_block=True, timeout=10, decoder=None):
+        self.timeout = timeout
+        self.decoder = decoder if decoder is not None else ResponseDecoder()
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections,
+                                                pool_maxsize=pool_maxsize,
+                                                pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def __call__(self, request_url, apisign):
+        try:
+            response = self.session.get(
+                request_url,
+                headers={"apisign": apisign},
+                timeout=self.timeout
+            )
+            return self.decoder(request_url, response.content)
+
+        except requests.exceptions.Timeout:
+            return {
+               'success' : False,
+               'message' : 'REQUEST_TIMEOUT',
+               'result'  : None
+            }
 
+        except requests.exceptions.RequestException as e:
+            return {
+               'success' : False,
+               'message' : str(e),
+               'result'  : None
+            }
+
+    def close(self):
+        #=======================================================================
+        # Closes all the pooled connections
+        #=======================================================================
+        self.session.close()
+
+
+
+
+
+class RequestSigner(object):
+    """
+    HMAC-SHA512 request signer.
+    The HMAC is keyed with the secret once - each request signs a copy of it.
+    """
+
+    def __init__(self, api_secret):
+        self._keyed = hmac.new(api_secret.encode(), digestmod=hashlib.sha512)
+
+    def sign(self, request_url):
+        #=======================================================================
+        # :return: The hex signature of `request_url`, to send as "apisign"
+        # :rtype : str
+        #=======================================================================
+        mac = self._keyed.copy()
+        mac.update(request_url.encode())
+        return mac.hexdigest()
 
 
 class Bittrex(object):
@@ -146,13 +225,21 @@ class Bittrex(object):
     Used for requesting Bittrex with API key and API secret
     """
 
-    def __init__(self, api_key, api_secret, calls_per_second=1, dispatch=using_requests, api_version=API_V2_0):
+    def __init__(self, api_key, api_secret, calls_per_second=1, dispatch=using_requests, api_version=API_V2_0,
+                 limiter=None, base_url=None, metrics=None):
         self.api_key = str(api_key) if api_key is not None else ''
         self.api_secret = str(api_secret) if api_secret is not None else ''
         self.dispatch = dispatch
-        self.call_rate = 1.0 / calls_per_second
-        self.last_call = None
+        # Without a (shared) limiter, throttle this instance on its own
+        if limiter is None:
+            limiter = TokenBucket(rate=calls_per_second, capacity=1)
+        self.limiter = limiter
         self.api_version = api_version
+        # Exchange root, e.g. 'http://127.0.0.1:8080/api' for a local stub server
+        self.base_url = base_url
+        # Optional per-endpoint request metrics (metrics.ApiMetrics)
+        self.metrics = metrics
+        self._reset_request_parts()
 
     def decrypt(self):
         if encrypted:
@@ -167,20 +254,16 @@ class Bittrex(object):
                 pass
             self.api_key = cipher.decrypt(self.api_key).decode()
             self.api_secret = cipher.decrypt(self.api_secret).decode()
+            self._reset_request_parts()
         else:
             raise ImportError('"pycrypto" module has to be installed')
 
-    def wait(self):
-        if self.last_call is None:
-            self.last_call = time.time()    
-        else:
-            now = time.time()
-            passed = now - self.last_call
-            if passed < self.call_rate:
-                # print("sleep")
-                time.sleep(self.call_rate - passed)
-
-            self.last_call = time.time()
+    def wait(self, path=None):
+        #=======================================================================
+        # Blocks until the rate limiter lets a call to `path` through
+        # :return: Time spent waiting, in seconds
+        #=======================================================================
+        return self.limiter.acquire(path)
 
     def _api_query(self, protection=None, path_dict=None, options=None):
         #=======================================================================
@@ -191,39 +274,84 @@ class Bittrex(object):
         # :rtype : dict
         #=======================================================================
 
+        request_url = self._request_url(protection, path_dict, options)
+        waited = 0.
+        start = time.perf_counter()
+
+        try:
+           apisign = self._sign(request_url)
+
+           waited = self.wait(path_dict[self.api_version])
+           start = time.perf_counter()
+
+           response = self.dispatch(request_url, apisign)
+
+        except:
+            response = {
+               'success' : False,
+               'message' : 'NO_API_RESPONSE',
+               'result'  : None
+            }
+
+        self._observe(path_dict, start, waited, response)
+        return response
+
+    def _observe(self, path_dict, start, waited, response):
+        #=======================================================================
+        # Records the request in the metrics, if any
+        #=======================================================================
+        if self.metrics is not None:
+            self.metrics.observe(self.api_version, path_dict[self.api_version], time.perf_counter() - start,
+                                 waited, isinstance(response, dict) and response.get('success', False))
+
+    def _request_url(self, protection=None, path_dict=None, options=None):
+        #=======================================================================
+        # Builds the fully-formed URL for a query (nonce and API key included
+        # for authenticated methods)
+        # :return: The request URL
+        # :rtype : str
+        #=======================================================================
+
         if not options:
             options = {}
 
         if self.api_version not in path_dict:
             raise Exception('method call not available under API version {}'.format(self.api_version))
 
-        request_url = BASE_URL_V2_0 if self.api_version == API_V2_0 else BASE_URL_V1_1
-        request_url = request_url.format(path=path_dict[self.api_version])
+        path = path_dict[self.api_version]
+        url_root = self._url_roots.get(path)
+        if url_root is None:
+            if self.base_url:
+                url_root = self.base_url.rstrip('/') + '/' + self.api_version + path + '?'
+            else:
+                url_root = (BASE_URL_V2_0 if self.api_version == API_V2_0 else BASE_URL_V1_1).format(path=path)
+            self._url_roots[path] = url_root
 
-        nonce = str(int(time.time() * 1000))
+        parts = [url_root]
 
         if protection != PROTECTION_PUB:
-            request_url = "{0}apikey={1}&nonce={2}&".format(request_url, self.api_key, nonce)
-
-        request_url += urlencode(options)
+            parts += [self._key_query, str(int(time.time() * 1000)), '&']
 
-        #print(request_url)
+        if options:
+            parts.append(urlencode(options))
 
-        try:
-           apisign = hmac.new(self.api_secret.encode(),
-                              request_url.encode(),
-                              hashlib.sha512).hexdigest()
-
-           self.wait()
+        return ''.join(parts)
 
-           return self.dispatch(request_url, apisign)
+    def _sign(self, request_url):
+        #=======================================================================
+        # :return: The HMAC-SHA512 signature of `request_url`
+        # :rtype : str
+        #=======================================================================
+        return self.signer.sign(request_url)
 
-        except:
-            return {
-               'success' : False,
-               'message' : 'NO_API_RESPONSE',
-               'result'  : None
-            }
+    def _reset_request_parts(self):
+        #=======================================================================
+        # (Re)Builds the per-instance parts of the requests: the keyed signer,
+        # the API key query and the URL roots, per path (built on first use)
+        #=======================================================================
+        self.signer = RequestSigner(self.api_secret)
+        self._key_query = 'apikey=' + self.api_key + '&nonce='
+        self._url_roots = {}
 
     def get_markets(self):
         """
@@ -0,0 +1,157 @@
+#===============================================================================
+# Asyncio twin of bittrex.py
+#
+# `AsyncBittrex` has the same methods, signatures and response dicts as
+# `Bittrex`, but every API method returns a coroutine:
+#
+#     candles = await api.get_candles('BTC-LTC', TICKINTERVAL_THIRTYMIN)
+#
+# The transport is pluggable through `dispatch=`, like for `Bittrex`: any
+# coroutine function `dispatch(request_url, apisign) -> dict` will do. This is
+# what lets a local fake transport drive tests and benchmarks.
+#===============================================================================
+
+import time
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    asynchttp = False
+else:
+    asynchttp = True
+
+from .bittrex import Bittrex, SessionDispatcher, API_V2_0
+from .decoding import ResponseDecoder
+
+
+class ExecutorDispatcher(object):
+    #===========================================================================
+    # Runs a blocking dispatcher (e.g. `SessionDispatcher`) in the event loop's
+    # default thread pool. Fallback transport when aiohttp is not installed.
+    #===========================================================================
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+
+    async def __call__(self, request_url, apisign):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.dispatch, request_url, apisign)
+
+    async def close(self):
+        if hasattr(self.dispatch, "close"):
+            self.dispatch.close()
+
+
+class AiohttpDispatcher(object):
+    #===========================================================================
+    # Native asyncio transport, one pooled keep-alive aiohttp session.
+    #
+    # The session is created on first use, inside the running loop, since
+    # aiohttp binds it to the loop it was created in.
+    #
+    # :param pool_maxsize: (int) Max number of simultaneous connections
+    # :param timeout: (float) Request timeout, in seconds
+    # :param decoder: (ResponseDecoder) Turns the payloads into response dicts
+    #===========================================================================
+
+    def __init__(self, pool_maxsize=32, timeout=10, decoder=None):
+        if not asynchttp:
+            raise ImportError('"aiohttp" module has to be installed')
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.decoder = decoder if decoder is not None else ResponseDecoder()
+        self.session = None
+
+    async def __call__(self, request_url, apisign):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        try:
+            async with self.session.get(request_url, headers={"apisign": apisign}) as response:
+                return self.decoder(request_url, await response.read())
+
+        except asyncio.TimeoutError:
+            return {
+               'success' : False,
+               'message' : 'REQUEST_TIMEOUT',
+               'result'  : None
+            }
+
+        except aiohttp.ClientError as e:
+            return {
+               'success' : False,
+               'message' : str(e),
+               'result'  : None
+            }
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+def default_dispatcher(pool_maxsize=32, decoder=None):
+    #===========================================================================
+    # :returns: The aiohttp transport if available, else the pooled requests
+    #           session run in a thread pool
+    #===========================================================================
+    if asynchttp:
+        return AiohttpDispatcher(pool_maxsize=pool_maxsize, decoder=decoder)
+    return ExecutorDispatcher(SessionDispatcher(pool_maxsize=pool_maxsize, decoder=decoder))
+
+
+class AsyncBittrex(Bittrex):
+    """
+    Used for requesting Bittrex from an asyncio event loop.
+    All the API methods of `Bittrex` are inherited and return coroutines.
+    """
+
+    def __init__(self, api_key, api_secret, calls_per_second=1, dispatch=None, api_version=API_V2_0,
+                 limiter=None, base_url=None, metrics=None):
+        if dispatch is None:
+            dispatch = default_dispatcher()
+        super(AsyncBittrex, self).__init__(api_key, api_secret, calls_per_second=calls_per_second,
+                                           dispatch=dispatch, api_version=api_version, limiter=limiter,
+                                           base_url=base_url, metrics=metrics)
+
+    async def _api_query(self, protection=None, path_dict=None, options=None):
+        #=======================================================================
+        # Queries Bittrex - same as `Bittrex._api_query`, but the rate limit
+        # wait and the request itself do not block the event loop
+        # :return: JSON response from Bittrex
+        # :rtype : dict
+        #=======================================================================
+
+        request_url = self._request_url(protection, path_dict, options)
+        wait = 0.
+        start = time.perf_counter()
+
+        try:
+            apisign = self._sign(request_url)
+
+            wait = await self.limiter.acquireAsync(path_dict[self.api_version])
+            start = time.perf_counter()
+
+            response = await self.dispatch(request_url, apisign)
+
+        except Exception:
+            response = {
+               'success' : False,
+               'message' : 'NO_API_RESPONSE',
+               'result'  : None
+            }
+
+        self._observe(path_dict, start, wait, response)
+        return response
+
+    async def list_markets_by_currency(self, currency):
+        """
+        Helper function to see which markets exist for a currency.
+        :param currency: String literal for the currency (ex: LTC)
+        :type currency: str
+        :return: List of markets that the currency appears in
+        :rtype: list
+        """
+        return [market['MarketName'] for market in (await self.get_markets())['result']
+                if market['MarketName'].lower().endswith(currency.lower())]
@@ -0,0 +1,72 @@
+#===============================================================================
+# TTL response cache for the exchange API
+#
+# Size-bounded LRU cache whose entries expire after a per-entry time-to-live.
+# Keys are tuples whose first element is the endpoint name, e.g.
+#     ("get_markets",)  or  ("get_balance", "LTC")
+# so all the entries of an endpoint can be invalidated at once.
+#
+# NOTE: The cached objects are shared between callers - treat them as read-only.
+#===============================================================================
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache(object):
+
+    def __init__(self, maxsize=128):
+        #=======================================================================
+        # :param maxsize: (int) Max number of entries - the least recently used
+        #                 entry is evicted beyond this
+        #=======================================================================
+        self.lock = threading.Lock()
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        #=======================================================================
+        # :returns: Tuple (Boolean, value) - Whether `key` holds a live entry, and
+        #           the cached value (None on a miss)
+        #=======================================================================
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expiry, value = entry
+                if expiry > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                # Expired
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value, ttl):
+        #=======================================================================
+        # Caches `value` under `key` for `ttl` seconds (not cached if ttl <= 0)
+        #=======================================================================
+        if ttl is None or ttl <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, endpoint=None):
+        #=======================================================================
+        # Drops all the entries of `endpoint`, or the whole cache if None
+        #=======================================================================
+        with self.lock:
+            if endpoint is None:
+                self.entries.clear()
+            else:
+                for key in [k for k in self.entries if k[0] == endpoint]:
+                    del self.entries[key]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,117 @@
+#===============================================================================
+# Fixed-capacity columnar ring buffer of candles
+#
+# The candle values (O, H, L, C, V, BV) are kept as float64 rows of one
+# array, the timestamps (T) as datetime64. Each slot is stored twice, at i
+# and i + capacity, so the window of the last `capacity` candles is always
+# one contiguous slice: appending is O(1) (two writes, no shifting) and a
+# column of the window is a view, not a copy.
+#===============================================================================
+
+import operator
+
+import numpy
+
+# Candle values kept per slot, as in a Bittrex candle - T (timestamp) aside
+VALUE_KEYS = ("O", "H", "L", "C", "V", "BV")
+_VALUE_INDEX = {key: i for i, key in enumerate(VALUE_KEYS)}
+_candleValues = operator.itemgetter(*VALUE_KEYS)
+
+# Series of a market without candles - read-only, as the CandleRing columns
+NO_SERIES = numpy.zeros(1)
+NO_SERIES.flags.writeable = False
+
+
+class CandleRing(object):
+    #===========================================================================
+    # The last `capacity` candles, oldest first
+    #
+    # :param capacity: (int) Number of candles kept
+    #===========================================================================
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = numpy.zeros((len(VALUE_KEYS), 2 * capacity))
+        self.times = numpy.zeros(2 * capacity, dtype='datetime64[s]')
+        # Slot of the oldest candle, and number of candles
+        self.start = 0
+        self.size = 0
+        # Read-only column views of the current window, by key - dropped when
+        # the window moves
+        self.views = {}
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        if not self.size:
+            return "<CandleRing 0/{:d}>".format(self.capacity)
+        return "<CandleRing {:d}/{:d} {} .. {}>".format(self.size, self.capacity, self.times[self.start],
+                                                       self.times[self.start + self.size - 1])
+
+    def append(self, candle):
+        #=======================================================================
+        # Adds a candle (dict) as the newest one - drops the oldest when full
+        #=======================================================================
+        self.views.clear()
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.write(slot, candle)
+
+    def extend(self, candles):
+        for candle in candles:
+            self.append(candle)
+
+    def replaceLast(self, candle):
+        #=======================================================================
+        # Overwrites the newest candle (e.g. the running one, updated)
+        #=======================================================================
+        if not self.size:
+            self.append(candle)
+        else:
+            self.write((self.start + self.size - 1) % self.capacity, candle)
+
+    def write(self, slot, candle):
+        row = _candleValues(candle)
+        self.values[:, slot] = row
+        self.values[:, slot + self.capacity] = row
+        self.times[slot] = self.times[slot + self.capacity] = numpy.datetime64(candle["T"], 's')
+
+    def column(self, key):
+        #=======================================================================
+        # :param key: (str) "O", "H", "L", "C", "V", "BV" or "T"
+        # :returns: numpy.ndarray - The values of the window, oldest first - a
+        #           read-only view of the buffer, only valid until the next
+        #           append (copy it to keep it). The same view is returned until
+        #           then, nothing is allocated per call.
+        #=======================================================================
+        view = self.views.get(key)
+        if view is None:
+            if key == "T":
+                view = self.times[self.start:self.start + self.size]
+            else:
+                view = self.values[_VALUE_INDEX[key], self.start:self.start + self.size]
+            view.flags.writeable = False
+            self.views[key] = view
+        return view
+
+    def __getitem__(self, index):
+        #=======================================================================
+        # :returns: Dict - The candle at `index` (negative from the newest), as
+        #           a Bittrex candle
+        #=======================================================================
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("candle index out of range")
+        slot = self.start + index
+        candle = {key: float(self.values[i, slot]) for i, key in enumerate(VALUE_KEYS)}
+        candle["T"] = str(self.times[slot])
+        return candle
+
+    def nbytes(self):
+        return self.values.nbytes + self.times.nbytes
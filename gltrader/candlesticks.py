@@ -17,11 +17,44 @@ from distutils.log import debug
 import statistics
 import numpy
 
+from .candle_buffer import CandleRing, NO_SERIES
+from .rolling import RollingMoments, RollingMax
+
 HOURS_PER_DAY = 24
 MINUTES_PER_HOUR = 60
 SECONDS_PER_MINUTE = 60
 SECONDS_PER_HOUR = MINUTES_PER_HOUR*SECONDS_PER_MINUTE
 
+
+# Timestamp of the dummy candles - never a gap from those
+DUMMY_TIMESTAMP = "2000-01-01T00:00:00"
+
+
+def candlesBetween(timestamp, later, tickInterval):
+    #===========================================================================
+    # :param timestamp, later: (str) Candle timestamps, e.g. '2017-11-03T03:00:00'
+    # :returns: Integer - Number of `tickInterval` minutes candles from the
+    #           `timestamp` candle to the `later` one (1 for the next candle,
+    #           more over a gap, 0 or less if `later` is not later)
+    #===========================================================================
+    elapsed = datetime.fromisoformat(later[:19]) - datetime.fromisoformat(timestamp[:19])
+    return int(elapsed // timedelta(minutes=tickInterval))
+
+
+def candlesPerHour(tickInterval):
+    #===========================================================================
+    # :returns: Integer - Number of candles in the "last hour" - just the
+    #           current one for candles of an hour or longer
+    #===========================================================================
+    return max(1, MINUTES_PER_HOUR // tickInterval)
+
+
+def candlesPerDay(tickInterval):
+    #===========================================================================
+    # :returns: Integer - Number of candles in the "previous day"
+    #===========================================================================
+    return max(1, HOURS_PER_DAY * MINUTES_PER_HOUR // tickInterval)
+
 class CandleSticks:
     
 
@@ -42,24 +75,40 @@ class CandleSticks:
         #Calculate then number of candles in the object
         self.totalTimeFrame = totalTimeFrame
         self.tickInterval = tickInterval
-        self.nrCandlesPerHour = int(MINUTES_PER_HOUR/self.tickInterval)
-        self.nrCandlesPerDay = self.nrCandlesPerHour * HOURS_PER_DAY
+        self.nrCandlesPerHour = candlesPerHour(self.tickInterval)
+        self.nrCandlesPerDay = candlesPerDay(self.tickInterval)
         
-        # Initialize all candles as dummy candles
-        self.previousDayCandles = self.initDummyCandles(self.nrCandlesPerDay)
-        self.lastHourCandles = self.initDummyCandles(self.nrCandlesPerHour)
-        self.currentCandle = self.initDummyCandles(1)
+        # Candles of the previous day and of the last hour - ring buffers (candle_buffer.py)
+        self.previousDayCandles = CandleRing(self.nrCandlesPerDay)
+        self.lastHourCandles = CandleRing(self.nrCandlesPerHour)
 
-        
         # Initialize with proper data - Sanity check the response is not empty
         # If allCandles contains enough data, and is not none
         if allCandles is not None and len(allCandles) >= self.nrCandlesPerDay + self.nrCandlesPerHour:
             # Initialize candles for previous day - EXCLUDING LAST HOUR
-            self.previousDayCandles = allCandles[-self.nrCandlesPerDay-1:-1]
+            self.previousDayCandles.extend(allCandles[-self.nrCandlesPerDay-1:-1])
             # Initialize candles for last hour
-            self.lastHourCandles = allCandles[-self.nrCandlesPerHour:]
+            self.lastHourCandles.extend(allCandles[-self.nrCandlesPerHour:])
             # Initialize current candle
             self.currentCandle = allCandles[-1]
+        # Else, initialize all candles as dummy candles
+        else:
+            self.previousDayCandles.extend(self.initDummyCandles(self.nrCandlesPerDay))
+            self.lastHourCandles.extend(self.initDummyCandles(self.nrCandlesPerHour))
+            self.currentCandle = self.dummyCandle()
+
+        # Gap - Candles missed by the latest rollover (counted per market, see
+        # Market.gapStats)
+        self.lastGap = 0
+
+        # Rolling aggregates of the previous day candles - updated on every rollover
+        self.prevDayVolStats = RollingMoments()
+        self.prevDayBsVolStats = RollingMoments()
+        self.prevDayHighs = RollingMax(self.nrCandlesPerDay)
+        for volume, baseVolume, high in zip(self.previousDayCandles.column("V"),
+                                            self.previousDayCandles.column("BV"),
+                                            self.previousDayCandles.column("H")):
+            self.pushPreviousDayCandle(volume, baseVolume, high)
 
 
         # Set local timestamps...
@@ -69,10 +118,6 @@ class CandleSticks:
 
         # Time stamp the current candle
         self.currentCandle["LT"] = self.localCandleTimestamp
-        # Time stamp previous hour candles
-        for x in range(0, len(self.lastHourCandles)-1):
-            self.lastHourCandles[x]["LT"] = self.localCandleTimestamp + \
-                                            timedelta(hours = -1, minutes = (x+1)*tickInterval)
         # TO DO: Implement function to time stamp all candles, which are taken as input
         # TO DO: Additional input, offset hours from now (e.g. -1 for prev hr, -24 for prev day,..)
 
@@ -112,6 +157,7 @@ class CandleSticks:
         #Only update if initialization was OK
         if self.IsInitOK and lastCandle is not None:
             self.timeNow = datetime.now()
+            self.lastGap = 0
 
             #Check if everything needs updating or last candle only
             if self.currentCandle["T"] == lastCandle["T"]:
@@ -123,10 +169,24 @@ class CandleSticks:
                 
                 # Update last candle only
                 self.currentCandle = lastCandle
-                self.lastHourCandles[-1] = lastCandle
+                self.lastHourCandles.replaceLast(lastCandle)
+
+            # Older than the current candle - stale, ignored
+            elif self.currentCandle["T"] != DUMMY_TIMESTAMP and \
+                 candlesBetween(self.currentCandle["T"], lastCandle["T"], self.tickInterval) < 1:
+                log.debug("Stale candle ignored: " + str(lastCandle["T"]) +
+                          ", current candle: " + str(self.currentCandle["T"]))
 
             #All candles need updating
             else:
+                # Gap - Candles missed since the current one (e.g. ticks or API calls
+                # missed). The candles still roll over by one: the market's candles are
+                # to be backfilled, see Market.processCandles
+                if self.currentCandle["T"] != DUMMY_TIMESTAMP:
+                    self.lastGap = candlesBetween(self.currentCandle["T"], lastCandle["T"], self.tickInterval) - 1
+                if self.lastGap > 0:
+                    log.debug("Candles gap: {:d} candle(s) missed between ".format(self.lastGap) +
+                                str(self.currentCandle["T"]) + " and " + str(lastCandle["T"]))
                 try:
                     # Update local time stamp
                     self.localCandleTimestamp = self.candleTimestamp(self.timeNow,
@@ -138,15 +198,19 @@ class CandleSticks:
                     lastCandle["FTV"] = self.estimateFullTickVolume(lastCandle["V"])
 
 
-                    # Update bulk of 24hr candles
-                    self.previousDayCandles[0:self.nrCandlesPerDay-1] = self.previousDayCandles[1:self.nrCandlesPerDay]
-                    # Update last daily candle
-                    self.previousDayCandles[-1] = self.currentCandle
+                    # Roll the 24hr candles - the oldest one drops out
+                    if len(self.previousDayCandles) == self.nrCandlesPerDay:
+                        self.pushPreviousDayCandle(self.currentCandle["V"], self.currentCandle["BV"],
+                                                   self.currentCandle["H"],
+                                                   self.previousDayCandles.column("V")[0],
+                                                   self.previousDayCandles.column("BV")[0])
+                    else:
+                        self.pushPreviousDayCandle(self.currentCandle["V"], self.currentCandle["BV"],
+                                                   self.currentCandle["H"])
+                    self.previousDayCandles.append(self.currentCandle)
 
-                    #Update bulk of last hour candles
-                    self.lastHourCandles[0:self.nrCandlesPerHour-1] = self.lastHourCandles[1:self.nrCandlesPerHour]
-                    # Update most recent candle of last hour
-                    self.lastHourCandles[-1] = lastCandle
+                    # Roll the last hour candles
+                    self.lastHourCandles.append(lastCandle)
 
                     # Last: Update current candle
                     self.currentCandle = lastCandle
@@ -303,10 +367,14 @@ class CandleSticks:
 
     #================================================================================================
     #
-    # Collection of methods that return a list with a time series of the various market metrics for a past
-    # period, e.g. previous day or past hour. (The list is ordered as first element is oldest, last
-    # element is most recent.) These methods are meant to be used for data analysis as part of a
-    # strategy, e.g. by detecting patterns in the last day.
+    # Collection of methods that return a time series of the various market metrics for a past period, e.g.
+    # previous day or past hour. (The series is ordered as first element is oldest, last element is
+    # most recent.) These methods are meant to be used for data analysis as part of a strategy, e.g.
+    # by detecting patterns in the last day.
+    #
+    # The series are read-only numpy views of the candle buffers - nothing is copied per call, and
+    # a view is only valid until the next candle rollover: copy it (list(...), numpy.array(...)) to
+    # keep it across ticks.
     #
     # The following methods are provided:
     #
@@ -330,111 +398,111 @@ class CandleSticks:
 
     def getAllPreviousDayOpens(self):
         #=======================================================================
-        # :returns: List - A list with all the open prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the open prices of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "O")
+            return self.previousDayCandles.column("O")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayCloses(self):
         #=======================================================================
-        # :returns: List - A list with all the close prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the close prices of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "C")
+            return self.previousDayCandles.column("C")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayLows(self):
         #=======================================================================
-        # :returns: List - A list with all the low prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the low prices of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "L")
+            return self.previousDayCandles.column("L")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayHighs(self):
         #=======================================================================
-        # :returns: List - A list with all the high prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the high prices of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "H")
+            return self.previousDayCandles.column("H")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the volumes from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the volumes of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "V")
+            return self.previousDayCandles.column("V")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayBaseVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the base volumes from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the base volumes of all the previous day candles
         #=======================================================================
         if self.previousDayCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.previousDayCandles, "BV")
+            return self.previousDayCandles.column("BV")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrOpens(self):
         #=======================================================================
-        # :returns: List - A list with all the open prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the open prices of all the last hour candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "O")
+            return self.lastHourCandles.column("O")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrCloses(self):
         #=======================================================================
-        # :returns: List - A list with all the close prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the close prices of all the last hour candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "C")
+            return self.lastHourCandles.column("C")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrLows(self):
         #=======================================================================
-        # :returns: List - A list with all the low prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the low prices of all the last hour candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "L")
+            return self.lastHourCandles.column("L")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrHighs(self):
         #=======================================================================
-        # :returns: List - A list with all the high prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the high prices of all the last hour candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "H")
+            return self.lastHourCandles.column("H")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the volumes from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the volumes of all the last hour candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "V")
+            return self.lastHourCandles.column("V")
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHourBaseVolume(self):
         #=======================================================================
-        # :returns: List - A list with all the base volume from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the base volume of all the previous day candles
         #=======================================================================
         if self.lastHourCandles is not None:
-            return self.getListOfValuesFromListOfDict(self.lastHourCandles, "BV")
+            return self.lastHourCandles.column("BV")
         else:
-            return [0]
+            return NO_SERIES
 
 
 
@@ -479,23 +547,38 @@ class CandleSticks:
         # - Average base volume over all candles (BTC volume mean)
         # - Standard deviation of volume over all candles (altcoin volume stdev)
         # - Standard deviation of base volume over all candles (BTC volume stdev)
+        #
+        # Read from the rolling aggregates (see pushPreviousDayCandle) - the
+        # setters below recompute them from the whole window instead
         # 
         # :return:    None
         #=======================================================================
         # Set previous day high
-        self.setPreviousDayHigh()
-        # Set previous day average tick volume
-        prevDayVolData = self.getAllPreviousDayVolumes()
-        self.setPreviousDayTickVolMean(prevDayVolData)
-        # Set previous day average hourly volume
-        self.setPreviousDayHourVolMean(prevDayVolData)
-        # Set previous day tick volume standard deviation
-        self.setPreviousDayTickVolStdev(prevDayVolData, self.prevDayTickVolMean)
-        # Set previous day averagve tick base volume
-        prevDayVolData = self.getAllPreviousDayBaseVolumes()
-        self.setPreviousDayTickBsVolMean(prevDayVolData)
-        # Set previous day tick base volume standard deviation
-        self.setPreviousDayTickBsVolStdev(prevDayVolData, self.prevDayTickBsVolMean)
+        self.prevDayHigh = self.prevDayHighs.value()
+        # Set previous day average tick volume, average hourly volume and standard deviation
+        self.prevDayTickVolMean = self.prevDayVolStats.mean
+        self.volumePrevDayHrAverage = self.prevDayVolStats.sum/HOURS_PER_DAY
+        # (A day of daily candles is a single candle - no deviation)
+        self.prevDayTickVolStdev = self.prevDayVolStats.stdev() if self.prevDayVolStats.count > 1 else 0.
+        # Set previous day average tick base volume and standard deviation
+        self.prevDayTickBsVolMean = self.prevDayBsVolStats.mean
+        self.prevDayTickBsVolStdev = self.prevDayBsVolStats.stdev() if self.prevDayBsVolStats.count > 1 else 0.
+
+    def pushPreviousDayCandle(self, volume, baseVolume, high, evictedVolume=None, evictedBaseVolume=None):
+        #=======================================================================
+        # Updates the rolling aggregates with a candle entering the previous day
+        #
+        # Inputs:
+        #     volume, baseVolume, high - :double: Values of the new candle
+        #     evictedVolume, evictedBaseVolume - :double: Values of the candle leaving
+        #                                        the previous day (None while the
+        #                                        window fills up)
+        #
+        # :return:    None
+        #=======================================================================
+        self.prevDayVolStats.push(volume, evictedVolume)
+        self.prevDayBsVolStats.push(baseVolume, evictedBaseVolume)
+        self.prevDayHighs.push(high)
         
     def setPreviousDayHigh(self, prevDayHighData = None):
         #=======================================================================
@@ -618,7 +701,7 @@ class CandleSticks:
         # :return:    Double
         #=======================================================================
         tickFraction = (self.timeNow - self.localCandleTimestamp).seconds
-        tickFraction *= self.nrCandlesPerHour/SECONDS_PER_HOUR
+        tickFraction /= self.tickInterval*SECONDS_PER_MINUTE
         return runningVolume/tickFraction
 
 
@@ -697,12 +780,18 @@ class CandleSticks:
         # Example 2: timestamp as above
         #            tickInterval = 15
         #            candleTimestamp = datetime(2019, 1, 12, 22, 15, 0)
+        #
+        # Example 3: timestamp as above
+        #            tickInterval = 1440 (a day)
+        #            candleTimestamp = datetime(2019, 1, 12, 0, 0, 0)
         #=======================================================================
+        minutes = MINUTES_PER_HOUR*timestamp.hour + timestamp.minute
+        minutes = tickInterval*(minutes // tickInterval)
         return datetime(year = timestamp.year,
                         month = timestamp.month,
                         day = timestamp.day,
-                        hour = timestamp.hour,
-                        minute = tickInterval*(timestamp.minute // tickInterval),
+                        hour = minutes // MINUTES_PER_HOUR,
+                        minute = minutes % MINUTES_PER_HOUR,
                         second = 0)
 
     def getListOfValuesFromListOfDict(self, listOfDict, key):
@@ -750,7 +839,7 @@ class CandleSticks:
             "L" : 999.,
             "C" : 999.,
             "V" : 999999999.,
-            "T" : "2000-01-01T00:00:00",
+            "T" : DUMMY_TIMESTAMP,
             "BV" : 99999999.
             }
     
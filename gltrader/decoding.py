@@ -0,0 +1,152 @@
+#===============================================================================
+# Decoding of the exchange API responses
+#
+# The JSON backend is the fastest one installed - orjson, then ujson, else the
+# standard library.
+#
+# GetTicks (`get_candles`) returns days of candles per market, while the
+# CandleSticks only keep the last day and hour of them. A `ResponseDecoder`
+# with a tail configured for an endpoint only decodes the last candles of its
+# responses: the candles are flat objects, so the tail is found by scanning
+# the raw payload backwards for the opening braces, and only that slice (and
+# the success/message envelope) is parsed.
+#
+# The decode time and payload size of every trimmed response are kept per
+# market, and so is the peak memory when `traceMemory` is on (decodes are then
+# serialized, so only meant for diagnostics).
+#===============================================================================
+
+import re
+import time
+import threading
+import tracemalloc
+from urllib.parse import urlsplit, parse_qsl
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+import json
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    loads = orjson.loads
+elif ujson is not None:
+    BACKEND = 'ujson'
+    loads = ujson.loads
+else:
+    BACKEND = 'json'
+    loads = json.loads
+
+# What may come between the "result" key and its list
+_RESULT_LIST = re.compile(rb'"result"\s*:\s*\[')
+# What may come after the result list - the end of the envelope
+_ENVELOPE_END = re.compile(rb'\s*}\s*$')
+
+
+def tailCandles(body, count):
+    #===========================================================================
+    # Decodes a candles response, keeping only its last `count` candles
+    #
+    # :param body: (bytes) Raw response payload
+    # :returns: Dict - The response, as the full decode would give it but with
+    #           `result` trimmed. None if the payload is not a candle list
+    #           ending the envelope (the caller should decode it in full).
+    #===========================================================================
+    match = _RESULT_LIST.search(body)
+    end = body.rfind(b']')
+    if match is None or end < match.end() or _ENVELOPE_END.match(body, end + 1) is None:
+        return None
+    listStart = match.end()
+    start = end
+    for i in range(count):
+        brace = body.rfind(b'{', listStart, start)
+        if brace < 0:
+            break
+        start = brace
+    response = loads(body[:listStart] + body[end:])
+    response["result"] = loads(b'[' + body[start:end] + b']') if count > 0 else []
+    return response
+
+
+class ResponseDecoder(object):
+    #===========================================================================
+    # Turns the raw response payloads into response dicts
+    #
+    # :param tails: (dict) Number of candles to keep, per endpoint path, e.g.
+    #               {'/pub/market/GetTicks': 50}
+    # :param traceMemory: (bool) Whether to measure the peak memory of the
+    #                     trimmed decodes
+    #===========================================================================
+
+    def __init__(self, tails=None, traceMemory=False):
+        self.tails = dict(tails or {})
+        self.traceMemory = traceMemory
+        self.lock = threading.Lock()
+        self.markets = {}
+
+    def __call__(self, request_url, body):
+        if isinstance(body, str):
+            body = body.encode()
+        if self.tails:
+            parts = urlsplit(request_url)
+            count = next((n for path, n in self.tails.items() if parts.path.endswith(path)), None)
+            if count is not None:
+                return self.decodeTail(dict(parse_qsl(parts.query)).get('marketName'), body, count)
+        return loads(body)
+
+    def decodeTail(self, market, body, count):
+        if self.traceMemory:
+            # tracemalloc is process-wide - one decode at a time
+            with self.lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                response = tailCandles(body, count) or loads(body)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] - base
+        else:
+            start = time.perf_counter()
+            response = tailCandles(body, count) or loads(body)
+            elapsed = time.perf_counter() - start
+            peak = None
+        self.record(market, elapsed, len(body), response.get("result"), peak)
+        return response
+
+    def record(self, market, elapsed, size, result, peak):
+        with self.lock:
+            stats = self.markets.get(market)
+            if stats is None:
+                stats = self.markets[market] = {"calls": 0, "seconds": 0., "max_seconds": 0., "bytes": 0,
+                                                "candles": 0, "peak_memory": None}
+            stats["calls"] += 1
+            stats["seconds"] = elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["bytes"] = size
+            stats["candles"] = len(result) if isinstance(result, list) else 0
+            if peak is not None:
+                stats["peak_memory"] = max(stats["peak_memory"] or 0, peak)
+
+    def getStats(self):
+        #=======================================================================
+        # :returns: Dict - Per market (e.g. 'BTC-LTC'), a dict
+        #     calls        - Number of trimmed decodes
+        #     seconds      - Last decode time, in seconds
+        #     max_seconds  - Longest decode time, in seconds
+        #     bytes        - Last payload size
+        #     candles      - Number of candles kept from the last payload
+        #     peak_memory  - Highest decode peak memory, in bytes (None unless
+        #                    `traceMemory`)
+        #=======================================================================
+        with self.lock:
+            return {market: dict(stats) for market, stats in self.markets.items()}
+
+    def reset(self):
+        with self.lock:
+            self.markets = {}
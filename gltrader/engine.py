@@ -0,0 +1,152 @@
+#===============================================================================
+# Trader engine - runs the ticks off the UI thread
+#
+# The engine thread wakes the trader up every tick period (network, candles,
+# strategies, orders) and then publishes an immutable snapshot of the tick
+# (`TickSnapshot`) into a `SnapshotSlot`. The UI picks up the latest snapshot
+# on its own clock and renders only that: it never waits for a tick, and a
+# busy UI never delays one - it just skips the snapshots it had no time for.
+#===============================================================================
+
+import time
+import threading
+from collections import namedtuple
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Values of a market shown by the UI, as of one tick. Plain values only - the
+# user actions (view, start monitoring) find the market again by its name.
+MarketSnapshot = namedtuple('MarketSnapshot', ['name', 'abbr', 'isMonitored', 'bid', 'ask', 'last',
+                                               'previousDayPrice', 'previousDayBaseVol',
+                                               'previousDayTickBsVolMean', 'previousDayTickBsVolStdev',
+                                               'currentBaseVol', 'currentFullTickBaseVol',
+                                               'availableBalance', 'pendingBalance'])
+
+# Values of a notification shown by the UI, as of one tick - `key` identifies it
+# to the trader (remove it, do its action), the market* values are those of the
+# market it is about, the action* ones those of the action it reports (all
+# False without one)
+NotificationSnapshot = namedtuple('NotificationSnapshot', ['key', 'time', 'type', 'level', 'message',
+                                                           'marketName', 'marketMonitored', 'hasAction', 'actionDone',
+                                                           'actionComplete', 'actionSuccess'])
+
+# One tick - `markets` is a tuple of MarketSnapshot, sorted by name, and
+# `notifications` a dict of NotificationSnapshot, keyed by their key
+TickSnapshot = namedtuple('TickSnapshot', ['tick', 'time', 'duration', 'bitcoinBalance', 'markets',
+                                           'notifications'])
+
+
+class SnapshotSlot(object):
+    #===========================================================================
+    # Thread-safe handoff of the latest snapshot - older ones are overwritten
+    #===========================================================================
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+
+    def put(self, snapshot):
+        with self.lock:
+            self.snapshot = snapshot
+
+    def latest(self):
+        #=======================================================================
+        # :returns: TickSnapshot - The latest snapshot, None before the first tick
+        #=======================================================================
+        with self.lock:
+            return self.snapshot
+
+
+class TraderEngine(object):
+    #===========================================================================
+    # Runs `trader.wakeUp()` every `period` seconds on its own thread, and
+    # publishes the tick snapshots into `slot`
+    #
+    # :param trader: (Trader) The trader to tick
+    # :param period: (float) Time between tick starts, in seconds - a tick
+    #                running longer delays the next one, missed ticks are skipped
+    # :param snapshots: (bool) Whether to publish the tick snapshots - not
+    #                   needed without a UI
+    # :param maxTicks: (int) Stops after this many ticks - None for no limit
+    #===========================================================================
+
+    def __init__(self, trader, period, snapshots=True, maxTicks=None):
+        self.trader = trader
+        self.period = period
+        self.snapshots = snapshots
+        self.maxTicks = maxTicks
+        self.slot = SnapshotSlot()
+        self.nrTicks = 0
+        self.thread = None
+        self.stopped = threading.Event()
+        self.active = threading.Event()
+        self.active.set()
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name="trader-engine", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        #=======================================================================
+        # Stops ticking - waits up to `timeout` seconds for a running tick
+        #=======================================================================
+        self.stopped.set()
+        self.active.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def pause(self):
+        self.active.clear()
+
+    def resume(self):
+        self.active.set()
+
+    def latest(self):
+        return self.slot.latest()
+
+    def run(self):
+        nextTick = time.monotonic()
+        while not self.stopped.is_set():
+            if not self.active.is_set():
+                # Paused - the next tick is due once resumed
+                self.active.wait()
+                nextTick = max(nextTick, time.monotonic())
+                continue
+            if self.stopped.wait(max(0., nextTick - time.monotonic())):
+                break
+            if not self.active.is_set():
+                continue
+            self.tick()
+            if self.maxTicks is not None and self.nrTicks >= self.maxTicks:
+                break
+            nextTick += self.period
+            now = time.monotonic()
+            if nextTick < now:
+                log.warning("Tick took {:.1f}s, longer than the tick period - skipping the missed ticks".format(
+                            now - nextTick + self.period))
+                nextTick = now
+
+    def tick(self):
+        #=======================================================================
+        # Runs one tick and publishes its snapshot
+        #=======================================================================
+        self.nrTicks += 1
+        log.info("===================== Tick Start - Waking up trader... =====================")
+        start = time.monotonic()
+        try:
+            self.trader.wakeUp()
+        except Exception as error:
+            log.exception("Unhandled exception in 'Trader.wakeUp()' - Error: " + str(error))
+        if self.snapshots:
+            try:
+                self.slot.put(self.trader.snapshot(self.nrTicks, time.monotonic() - start))
+            except Exception as error:
+                log.exception("Unhandled exception in 'Trader.snapshot()' - Error: " + str(error))
+                return
+            log.info("=================== Tick End - Snapshot {:d} published ====================\n".format(self.nrTicks))
+        else:
+            log.info("=================== Tick End - Tick {:d} done in {:.2f}s ====================\n".format(
+                     self.nrTicks, time.monotonic() - start))
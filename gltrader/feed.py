@@ -0,0 +1,493 @@
+#===============================================================================
+# Market data feeds
+#
+# A feed delivers market updates to its subscribers as they arrive, instead of
+# the trader fetching everything itself at each tick. Every update is a
+# `FeedUpdate(kind, market, response)`, where `response` is shaped like the
+# matching API response ({"success": ..., "message": ..., "result": ...}):
+#     SUMMARIES - market = None, result = get_balances result (all markets)
+#     CANDLES   - market = 'BTC-LTC', result = all candles (GetTicks), oldest first
+#     CANDLE    - market = 'BTC-LTC', result = [latest candle] (GetLatestTick)
+#
+# Subscribers tell the feed which markets they want the candles of with
+# `watch()`. A newly watched market gets its CANDLES history first, and CANDLE
+# updates after that.
+#
+# Feeds:
+#     PollingFeed - The original behaviour: `poll()` (called at each tick) gets
+#                   the balances, then the candles of the watched markets
+#     SocketFeed  - Pushed updates, read from a local TCP socket as JSON lines
+#     ReplayFeed  - Pushed updates, from a RecordingDispatcher log (see replay.py)
+#===============================================================================
+
+import json
+import time
+import socket
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit, parse_qsl
+
+from .bittrex import TICKINTERVAL_THIRTYMIN
+from .replay import openLog
+
+import logging
+log = logging.getLogger(__name__)
+
+SUMMARIES = 'summaries'
+CANDLES = 'candles'
+CANDLE = 'candle'
+
+FeedUpdate = namedtuple('FeedUpdate', ['kind', 'market', 'response'])
+
+
+def success(result):
+    return {'success': True, 'message': '', 'result': result}
+
+
+class MarketFeed(object):
+    #===========================================================================
+    # Base feed - subscriptions, watched markets and publishing
+    #===========================================================================
+
+    # Whether updates arrive on their own (True), or on `poll()` (False)
+    pushes = False
+
+    def __init__(self):
+        self.listeners = []
+        self.lock = threading.Lock()
+        # Watched markets, and those whose candle history was delivered
+        self.watched = set()
+        self.haveHistory = set()
+        # Watched markets with new data (None: all)
+        self.changed = None
+        # Watched markets whose history is to be fetched again (ordered, oldest
+        # request first), how many are fetched at a time (per poll, for a polled
+        # feed), and how many were - the fetches go through the API rate limiter
+        self.backfills = {}
+        self.backfillBatch = 8
+        self.nrBackfills = 0
+
+    def subscribe(self, listener):
+        #=======================================================================
+        # :param listener: (callable) Called with every FeedUpdate, possibly
+        #                  from a feed thread
+        #=======================================================================
+        self.listeners.append(listener)
+
+    def watch(self, markets, changed=None):
+        #=======================================================================
+        # Sets the markets whose candles are wanted, e.g. ['BTC-LTC', ...]
+        #
+        # :param changed: (iterable) The watched markets with new data - a
+        #                 polled feed only refreshes the candles of those (and
+        #                 of the markets without history). None for all.
+        # :returns: Set - The newly watched markets
+        #=======================================================================
+        markets = set(markets)
+        with self.lock:
+            added = markets - self.watched
+            self.watched = markets
+            self.changed = None if changed is None else set(changed)
+            self.haveHistory &= markets
+            for market in [market for market in self.backfills if market not in markets]:
+                del self.backfills[market]
+        return added
+
+    def backfill(self, markets):
+        #=======================================================================
+        # Asks for the candle history of watched markets again, e.g. to repair
+        # a gap in their candles - fetched `backfillBatch` markets at a time
+        #=======================================================================
+        with self.lock:
+            for market in markets:
+                if market in self.watched:
+                    self.backfills[market] = True
+
+    def takeBackfills(self, exclude=()):
+        #=======================================================================
+        # Takes the next batch of backfills, the markets in `exclude` aside (e.g.
+        # still being fetched) - their history is then needed again
+        #
+        # :returns: List - The markets of the batch
+        #=======================================================================
+        with self.lock:
+            batch = [market for market in self.backfills if market not in exclude][:self.backfillBatch]
+            for market in batch:
+                del self.backfills[market]
+                self.haveHistory.discard(market)
+            self.nrBackfills += len(batch)
+        if batch:
+            log.info("Backfilling the candles of {:d} market(s): ".format(len(batch)) + ", ".join(batch))
+        return batch
+
+    def publish(self, update):
+        if update.kind == CANDLES and update.response.get("success", False):
+            with self.lock:
+                self.haveHistory.add(update.market)
+        for listener in self.listeners:
+            try:
+                listener(update)
+            except Exception as error:
+                log.exception("Unhandled exception in feed listener - Error: " + str(error))
+
+    def needsHistory(self, market):
+        with self.lock:
+            return market not in self.haveHistory
+
+    def poll(self):
+        #=======================================================================
+        # Fetches and publishes one round of updates - nothing for push feeds
+        #
+        # :returns: Boolean - Whether the market summaries were received
+        #=======================================================================
+        return False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class PollingFeed(MarketFeed):
+    #===========================================================================
+    # The trader's tick polling, as a feed: every `poll()` fetches the
+    # balances (published first, so the listeners can update the watched
+    # markets), then the candles of the watched markets which changed - on a
+    # long-lived pool of `workers` threads, or concurrently from one event loop
+    # if `asyncAPI` is given.
+    #
+    # The candle history of the markets to backfill (see `backfill()`) is
+    # fetched along with the candles, `backfillBatch` markets per poll.
+    #
+    # Each update is published as soon as its fetch completes. `poll()` waits
+    # at most `tickBudget` seconds for the candles - one budget for the tick,
+    # not a timeout per fetch: the fetches still running once it is spent are
+    # not waited for, nor fetched again, and their updates roll over
+    # into the next tick (see `pending()` and `takeRolledOver()`). The
+    # coroutines only run while the loop does, so the late ones go on during
+    # the next `poll()` - which waits for them too.
+    #
+    # :param api: (BittrexAPI) Blocking API
+    # :param asyncAPI: (AsyncBittrexAPI) Optional asyncio API for the candles
+    # :param loop: Event loop to run `asyncAPI` in
+    # :param workers: (int) Max number of concurrent candle fetches
+    # :param tickBudget: (float) Max wait for the candles per tick, in seconds -
+    #                    for all the fetches of the tick together (None to wait
+    #                    for all of them)
+    # :param interval: (str) Tick interval of the candles fetched
+    #===========================================================================
+
+    def __init__(self, api, asyncAPI=None, loop=None, workers=32, tickBudget=None, interval=TICKINTERVAL_THIRTYMIN):
+        super(PollingFeed, self).__init__()
+        self.api = api
+        self.interval = interval
+        self.asyncAPI = asyncAPI
+        self.loop = loop
+        self.tickBudget = tickBudget
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="candles")
+        # Markets whose candles are being fetched, those whose fetch outlived
+        # its tick, and those whose late update has landed since
+        self.inFlight = {}
+        self.late = set()
+        self.rolledOver = set()
+        self.nrLate = 0
+
+    def poll(self):
+        response = self.api.get_balances()
+        self.publish(FeedUpdate(SUMMARIES, None, response))
+        if not response["success"]:
+            return False
+
+        # Backfills - their history is fetched with the candles of this poll
+        with self.lock:
+            inFlight = set(self.inFlight)
+        self.takeBackfills(inFlight)
+        with self.lock:
+            markets = [market for market in self.watched
+                       if (self.changed is None or market in self.changed or market not in self.haveHistory) and
+                       market not in self.inFlight]
+        if self.asyncAPI is not None:
+            self.rollOver(self.loop.run_until_complete(self.pollCandlesAsync(markets)))
+            return True
+
+        futures = []
+        for market in markets:
+            future = self.executor.submit(self.pollCandles, market)
+            self.inFlightAdd(market, future)
+            futures.append(future)
+        # The tick proceeds once all are done - or once its budget is spent, without the late ones
+        done, notDone = wait(futures, timeout=self.tickBudget)
+        self.rollOver(notDone)
+        return True
+
+    def inFlightAdd(self, market, future):
+        with self.lock:
+            self.inFlight[market] = future
+        future.add_done_callback(lambda future, market=market: self.fetched(market, future))
+
+    def rollOver(self, notDone):
+        # The fetches still running at the end of the tick - their updates
+        # roll over into the next tick
+        with self.lock:
+            late = [market for market, future in self.inFlight.items()
+                    if future in notDone and market not in self.late]
+            self.late.update(late)
+            self.nrLate += len(late)
+        if late:
+            log.warning("Candles of {:d} market(s) late, rolled over to the next tick: ".format(len(late)) +
+                        ", ".join(sorted(late)))
+
+    def fetched(self, market, future):
+        # Done callback of a candle fetch
+        with self.lock:
+            self.inFlight.pop(market, None)
+            if market in self.late:
+                self.late.discard(market)
+                self.rolledOver.add(market)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            log.error("Unhandled exception in 'PollingFeed.pollCandles()' - Market " +
+                      market + "\nError: " + repr(error))
+
+    def pending(self):
+        #=======================================================================
+        # :returns: Set - The markets whose candles are still being fetched
+        #=======================================================================
+        with self.lock:
+            return set(self.inFlight)
+
+    def takeRolledOver(self):
+        #=======================================================================
+        # :returns: Set - The markets whose late candles were published since
+        #           the last call
+        #=======================================================================
+        with self.lock:
+            rolledOver, self.rolledOver = self.rolledOver, set()
+        return rolledOver
+
+    def stop(self):
+        # The late fetches are dropped: the queued threads cancelled, and the
+        # coroutines too - with the calls they share, run to their end if
+        # the loop is idle
+        with self.lock:
+            inFlight = list(self.inFlight.values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.loop is None or self.loop.is_closed():
+            return
+        if self.loop.is_running():
+            for future in inFlight:
+                if isinstance(future, asyncio.Future):
+                    self.loop.call_soon_threadsafe(future.cancel)
+            return
+        tasks = asyncio.all_tasks(self.loop)
+        if tasks:
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.wait(tasks))
+
+    def pollCandles(self, market):
+        if self.needsHistory(market):
+            self.publish(FeedUpdate(CANDLES, market, self.api.get_candles(market, self.interval)))
+        else:
+            self.publish(FeedUpdate(CANDLE, market, self.api.get_latest_candle(market, self.interval)))
+
+    async def pollCandlesAsync(self, markets):
+        #=======================================================================
+        # Fetches the candles of `markets` concurrently, and lets the late
+        # fetches of the previous ticks go on, for at most `tickBudget` seconds
+        #
+        # :returns: Set - The fetches still running
+        #=======================================================================
+        async def fetch(market):
+            if self.needsHistory(market):
+                response = await self.asyncAPI.get_candles(market, self.interval)
+                self.publish(FeedUpdate(CANDLES, market, response))
+            else:
+                response = await self.asyncAPI.get_latest_candle(market, self.interval)
+                self.publish(FeedUpdate(CANDLE, market, response))
+
+        for market in markets:
+            self.inFlightAdd(market, asyncio.ensure_future(fetch(market)))
+        with self.lock:
+            tasks = list(self.inFlight.values())
+        if not tasks:
+            return set()
+        done, notDone = await asyncio.wait(tasks, timeout=self.tickBudget)
+        return notDone
+
+
+class PushFeed(MarketFeed):
+    #===========================================================================
+    # Base of the feeds whose updates arrive on their own, from a reader
+    # thread. The history of newly watched markets is fetched through `api`
+    # (if given), in the background, since pushed sources only carry the
+    # latest candles. CANDLE updates of a market without history are dropped.
+    #
+    # :param api: (BittrexAPI) Optional API for the candle history
+    # :param interval: (str) Tick interval of the candle history fetched
+    #===========================================================================
+
+    pushes = True
+
+    def __init__(self, api=None, interval=TICKINTERVAL_THIRTYMIN):
+        super(PushFeed, self).__init__()
+        self.api = api
+        self.interval = interval
+        self.backfilling = False
+        self.thread = None
+        self.running = False
+
+    def watch(self, markets, changed=None):
+        added = super(PushFeed, self).watch(markets, changed)
+        if self.api is not None and added:
+            threading.Thread(target=self.fetchHistory, args=[sorted(added)], daemon=True).start()
+        return added
+
+    def backfill(self, markets):
+        # Fetched in the background, one batch after the other - without an API
+        # (e.g. a replay), the history can not be fetched again
+        if self.api is None:
+            return
+        super(PushFeed, self).backfill(markets)
+        with self.lock:
+            if self.backfilling:
+                return
+            self.backfilling = True
+        threading.Thread(target=self.runBackfills, daemon=True).start()
+
+    def runBackfills(self):
+        while True:
+            batch = self.takeBackfills()
+            if not batch:
+                with self.lock:
+                    # Requested while taking the last batch
+                    if self.backfills:
+                        continue
+                    self.backfilling = False
+                return
+            self.fetchHistory(batch)
+
+    def fetchHistory(self, markets):
+        for market in markets:
+            self.publish(FeedUpdate(CANDLES, market, self.api.get_candles(market, self.interval)))
+
+    def push(self, update):
+        #=======================================================================
+        # Publishes an update from the source
+        #=======================================================================
+        if update.market is not None:
+            with self.lock:
+                if update.market not in self.watched:
+                    return
+            if update.kind == CANDLE and self.needsHistory(update.market):
+                return
+        self.publish(update)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        #=======================================================================
+        # Reader thread - pushes the source's updates until stopped
+        #
+        # To be overridden by each feed: the base feed has no source, so it
+        # has nothing to push
+        #=======================================================================
+        log.error(type(self).__name__ + " has no source to read the updates from")
+        self.running = False
+
+
+class SocketFeed(PushFeed):
+    #===========================================================================
+    # Reads updates from a local TCP socket, one JSON object per line:
+    #     {"kind": "summaries", "data": [<get_balances result entries>]}
+    #     {"kind": "candles", "market": "BTC-LTC", "data": [<candles>]}
+    #     {"kind": "candle", "market": "BTC-LTC", "data": <latest candle>}
+    # and reconnects (after `retry` seconds) whenever the connection drops.
+    #===========================================================================
+
+    def __init__(self, host='127.0.0.1', port=8765, api=None, retry=1., interval=TICKINTERVAL_THIRTYMIN):
+        super(SocketFeed, self).__init__(api, interval)
+        self.host = host
+        self.port = port
+        self.retry = retry
+
+    def run(self):
+        while self.running:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.retry) as connection:
+                    connection.settimeout(None)
+                    log.info("Feed connected to {}:{}".format(self.host, self.port))
+                    for line in connection.makefile('r', encoding='utf-8'):
+                        if not self.running:
+                            return
+                        if line.strip():
+                            self.pushMessage(json.loads(line))
+            except (OSError, ValueError) as error:
+                log.warning("Feed connection to {}:{} - {}".format(self.host, self.port, error))
+            if self.running:
+                time.sleep(self.retry)
+
+    def pushMessage(self, message):
+        kind = message.get("kind")
+        if kind == SUMMARIES:
+            self.push(FeedUpdate(SUMMARIES, None, success(message["data"])))
+        elif kind == CANDLES:
+            self.push(FeedUpdate(CANDLES, message["market"], success(message["data"])))
+        elif kind == CANDLE:
+            self.push(FeedUpdate(CANDLE, message["market"], success([message["data"]])))
+        else:
+            log.warning("Feed - Unknown message kind: " + str(kind))
+
+
+# Recorded API paths, and the update they replay as
+REPLAY_PATHS = {
+    '/key/balance/getbalances'  : SUMMARIES,
+    '/pub/market/GetTicks'      : CANDLES,
+    '/pub/market/GetLatestTick' : CANDLE
+}
+
+
+class ReplayFeed(PushFeed):
+    #===========================================================================
+    # Replays the balances and candle responses of a RecordingDispatcher log
+    # as pushed updates, at the recorded timing divided by `speed` (None for
+    # as fast as possible). Recorded history (GetTicks) is replayed as well,
+    # so no API is needed.
+    #===========================================================================
+
+    def __init__(self, path, speed=1., api=None, interval=TICKINTERVAL_THIRTYMIN):
+        super(ReplayFeed, self).__init__(api, interval)
+        self.path = path
+        self.speed = speed
+
+    def run(self):
+        start = time.monotonic()
+        with openLog(self.path, 'r') as logFile:
+            for line in logFile:
+                if not self.running:
+                    return
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                parts = urlsplit(record["url"])
+                kind = next((k for path, k in REPLAY_PATHS.items() if parts.path.endswith(path)), None)
+                if kind is None:
+                    continue
+                if self.speed:
+                    wait = record["t"] / self.speed - (time.monotonic() - start)
+                    if wait > 0:
+                        time.sleep(wait)
+                market = dict(parse_qsl(parts.query)).get('marketName') if kind != SUMMARIES else None
+                self.push(FeedUpdate(kind, market, record["r"]))
+        log.info("Feed replay finished: " + self.path)
@@ -22,8 +22,9 @@ from kivy.core.window import Window
 from kivy.properties import ObjectProperty
 
 from .trader import Trader
+from .engine import TraderEngine
 from .ui.screen_management import ScreenManagement
-from .notification import Error, Alert
+from .notification import Error, Alert, NotificationSink, addSink
 
 # import cProfile
 from pprint import pprint as pp
@@ -43,6 +44,22 @@ sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 result = sock.connect_ex(('127.0.0.1',80))
 
 
+class GuiNotificationSink(NotificationSink):
+    #===========================================================================
+    # Shows the notifications on the notification screen
+    #
+    # Notifications are raised on the engine, feed and backfill threads: they
+    # are queued to the trader, and the UI shows them from the tick snapshots.
+    # Their updates need nothing - each snapshot carries their current values.
+    #===========================================================================
+
+    def __init__(self, app):
+        self.app = app
+
+    def add(self, notification):
+        self.app.trader.postNotification(notification)
+
+
 class GLTraderApp(App):
 
     #===========================================================================
@@ -62,6 +79,9 @@ class GLTraderApp(App):
 
     tick = ObjectProperty()
     rootWidget = ObjectProperty()
+    # Ticks run on the engine thread - the UI renders its latest snapshot
+    engine = None
+    snapshot = None
     dataThread = None
     uiThread = None
     isTesting = False
@@ -83,34 +103,35 @@ class GLTraderApp(App):
         #=======================================================================
         self.rootWidget = Builder.load_file('gltrader/ui/kv/gltrader.kv')
         self.last = None
+        addSink(GuiNotificationSink(self))
 
         #If the config is messed up somehow, error        
         if not self.trader.config:
             log.info("Bad confirguation file")
             Error("badconfig")
 
-        #Else, all is good with the config, wkae up the trader and schedule the alarm on periodic intervals
+        #Else, all is good with the config, start the trader engine, and render its snapshots on periodic intervals
         else:
-            self.wakeUpTrader()
-            self.tick = Clock.schedule_interval(self.wakeUpTrader, self.trader.config["tick_period"])
+            self.trader.startFeed()
+            self.engine = TraderEngine(self.trader, self.trader.tickPeriod())
+            self.engine.start()
+            self.tick = Clock.schedule_interval(self.render, self.trader.config.get("ui_refresh", 1))
 
         self.rootWidget.nScreen.info_layout.refresh()
         return self.rootWidget
 
 
 
-    def wakeUpTrader(self, dt=None):
+    def render(self, dt=None):
         #=======================================================================
-        # Main function - Wakes up the trader to act.
-        #
-        # Also updates the GUI at each refresh
+        # Refreshes the GUI with the latest tick snapshot, if there is a new one
         #=======================================================================
-        log.info("===================== Tick Start - Waking up trader... =====================")
-        # Wake up the trader
-        self.trader.wakeUp()
-        # Refresh the GUI
+        snapshot = self.engine.latest()
+        if snapshot is None or snapshot is self.snapshot:
+            return
+        self.snapshot = snapshot
         self.rootWidget.refresh()
-        log.info("======================= Tick End - Widget refreshed ========================\n")
+        log.debug("Widget refreshed - tick {:d}".format(snapshot.tick))
   
         
 
@@ -131,15 +152,17 @@ class GLTraderApp(App):
         # Runs when kivy is quit normally
         #=======================================================================
         self.tick.cancel()
+        self.engine.stop(timeout=1)
+        self.trader.stopFeed()
 
     def on_pause(self):
         #=======================================================================
         # Runs on sleep, or when clicking "pause" button
         #=======================================================================
-        self.tick.cancel()
+        self.engine.pause()
 
     def on_resume(self):
         #=======================================================================
         # Runs after waking up, or after clicking "resume" button
         #=======================================================================
-        self.tick = Clock.schedule_interval(self.wakeUpTrader, self.trader.config["tick_period"])
+        self.engine.resume()
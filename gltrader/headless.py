@@ -0,0 +1,82 @@
+#===============================================================================
+# Headless trader - the tick loop without the GUI
+#
+# Runs the trader engine on a server with no display: no Kivy is imported,
+# the notifications go to the sinks of the `headless` config (the log, a
+# file) instead of the notification screen. Stops on SIGINT or SIGTERM, or
+# after a given number of ticks.
+#
+# Usage:
+#     python -m gltrader --headless [--config config.yaml] [--ticks N]
+#===============================================================================
+
+import os
+import signal
+import argparse
+import threading
+
+import logging
+log = logging.getLogger(__name__)
+
+import yaml
+
+from .trader import Trader
+from .engine import TraderEngine
+from .notification import addSink, removeSink, sinkFromConfig
+
+
+def loadConfig(path):
+    with open(path) as configFile:
+        return yaml.safe_load(configFile)
+
+
+def runHeadless(config, nrTicks=None, sinks=None, stopped=None):
+    #===========================================================================
+    # Runs the trader until stopped
+    #
+    # :param config: (dict) The trader config
+    # :param nrTicks: (int) Number of ticks to run - None to run until stopped
+    # :param sinks: (list) Notification sinks - None for the config ones
+    # :param stopped: (threading.Event) Set to stop - None to stop on SIGINT
+    #                 or SIGTERM
+    # :returns: int - Number of ticks run
+    #===========================================================================
+    if sinks is None:
+        sinks = [sinkFromConfig(sinkConfig)
+                 for sinkConfig in ((config.get("headless", None) or {}).get("sinks", None) or ["log"])]
+    for sink in sinks:
+        addSink(sink)
+
+    if stopped is None:
+        stopped = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda signum, frame: stopped.set())
+
+    trader = Trader(config)
+    trader.startFeed()
+    engine = TraderEngine(trader, trader.tickPeriod(), snapshots=False, maxTicks=nrTicks)
+    log.info("Headless trader started - tick period: {:.1f}s".format(engine.period))
+    engine.start()
+    try:
+        while engine.thread.is_alive() and not stopped.wait(.1):
+            pass
+    finally:
+        # A tick in progress is finished - its orders are not left half done
+        engine.stop()
+        trader.stopFeed()
+        for sink in sinks:
+            removeSink(sink)
+            sink.close()
+    log.info("Headless trader stopped after {:d} ticks".format(engine.nrTicks))
+    return engine.nrTicks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gltrader --headless",
+                                     description="Runs the trader without the GUI")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--config", default=os.environ.get("GLTRADER_CONFIG"),
+                        help="Trader config (default: config.yaml)")
+    parser.add_argument("--ticks", type=int, default=None, help="Number of ticks to run (default: until stopped)")
+    args = parser.parse_args(argv)
+    runHeadless(loadConfig(args.config), nrTicks=args.ticks)
@@ -5,12 +5,13 @@ import logging
 from threading import currentThread
 log = logging.getLogger(__name__)
 
-from kivy.app import App
 
 from .market_data import MarketData
 from .notification import *
 from .action import Action
-from .candlesticks import CandleSticks
+from .resample import CandleTimeframes
+from .candle_buffer import NO_SERIES
+from .engine import MarketSnapshot
 
 from builtins import int
 # from idlelib.debugger_r import gui_adap_oid
@@ -33,26 +34,33 @@ class Market(object):
     #===========================================================================
 
 
-    def __init__(self, marketSummaryData, appConfig):
+    def __init__(self, summaryTable, row, appConfig):
         #=======================================================================
         # Sets initial parameters, calls getConfig to parse config file
         # 
-        # :param name: (String) The minimal abbreviation which is given by Bittrex for the market
-        # :param data: (List) The initial data passed in by the trader during the initializing API call
+        # :param summaryTable: (SummaryTable) The get_balances response of the tick the market is added at
+        # :param row: (int) The row of the market in summaryTable
         # :param appConfig: (dict) The configuration dictionary, which contains market specific configuration 
         #=======================================================================
         #
         #
         # Set the currency name
-        self.name = marketSummaryData["Currency"]["Currency"]
+        self.name = summaryTable.currencies[row]
         # Set default market short name
-        self.abbr = marketSummaryData["BitcoinMarket"]["MarketName"]
+        self.abbr = summaryTable.marketNames[row]
         # Get configuration, with overrides for this market 
         self.config = self.getConfig(appConfig)
         # Instantiate market data object
-        self.marketData = MarketData(marketSummaryData)
-        # Set candles object to none
+        self.marketData = MarketData(summaryTable, row)
+        # Set candles object to none - the candles of the `candles_singletick` timeframe,
+        # one of the timeframes derived from the source candles
         self.candles = None
+        self.timeframes = None
+        # Candle gaps - Number of gaps and of candles missed (kept across the candle
+        # history refreshes), and whether a gap is waiting for a backfill
+        self.nrGaps = 0
+        self.nrMissedCandles = 0
+        self.needsBackfill = False
         # Set time stamp ditcionary to empty
         self.lastTradeTimestamp = {}
         # Market initialization timestamp
@@ -72,21 +80,29 @@ class Market(object):
 
 
 
-    def updateCandles(self, api, totalTimeFrame=24, tickInterval=30):
+    def processCandles(self, response, totalTimeFrame=24, tickInterval=30, sourceInterval=None, timeframes=None):
         #=======================================================================
         # Creates candlesticks object if does not exist, or updates current one with newest data
         # 
-        # :param data: response from API calls
+        # :param response: API response - The latest candle if the candles exist already,
+        #                  all the candles otherwise
+        # :param sourceInterval: (int) Length of the candles in the response, in minutes -
+        #                        `tickInterval` if None
+        # :param timeframes: (list) Timeframes (in minutes) derived from the response
+        #                    candles, see candlesFor() - [`tickInterval`] if None
         #=======================================================================
-        # Get current thread ID
-        threadID = currentThread().ident
         # Candles have been initialized previously
         if self.candles is not None:
-            # API query - Last candle
-            lastCandle = api.get_latest_candle(self.abbr, TICKINTERVAL_THIRTYMIN)
+            lastCandle = response
             if lastCandle["success"] == True:
 
-                self.candles.updateCandles(lastCandle["result"][0])
+                self.timeframes.updateCandles(lastCandle["result"][0])
+                if self.timeframes.lastGap:
+                    self.nrGaps += 1
+                    self.nrMissedCandles += self.timeframes.lastGap
+                    self.needsBackfill = True
+                    log.warning("Market " + self.name + ": {:d} candle(s) missed - backfill needed".format(
+                                self.timeframes.lastGap))
                 
                 log.debug("Market {:>6}".format(self.name) +
                           ", Last candle: " + str(lastCandle["result"]))
@@ -96,10 +112,13 @@ class Market(object):
                 log.debug("Market " + self.name + ": Last candle update - API_RESPONSE_MISS")
         # First time updating candles
         else:
-            # API query - All candles
-            allCandles = api.get_candles(self.abbr, TICKINTERVAL_THIRTYMIN)
+            allCandles = response
             if allCandles["success"] == True:
-                self.candles = CandleSticks(allCandles["result"], totalTimeFrame, tickInterval)
+                self.timeframes = CandleTimeframes(allCandles["result"], sourceInterval or tickInterval,
+                                                   set(timeframes or []) | {tickInterval}, totalTimeFrame)
+                self.candles = self.timeframes.get(tickInterval)
+                # Full history - gaps repaired
+                self.needsBackfill = False
 
                 log.debug("New market {:>6}".format(self.name) +
                           ", All Candles: " + str(allCandles['result']))
@@ -129,7 +148,24 @@ class Market(object):
                       "H(24): {:10.8f}".format(self.previousDayHigh(includeCurrent=False)))
         except ZeroDivisionError as divByZero:
             log.exception("Unexpected div by zero in market.updateCandles(): " + str(divByZero))
-        
+
+    def gapStats(self):
+        #=======================================================================
+        # :returns: Dict - Candle gaps of the market: number of gaps, candles
+        #           missed, and whether a backfill is pending
+        #=======================================================================
+        return {"gaps": self.nrGaps, "missedCandles": self.nrMissedCandles, "backfillPending": self.needsBackfill}
+
+    def candlesFor(self, minutes):
+        #=======================================================================
+        # :param minutes: (int) Timeframe, one of the `candles_timeframes` config
+        # :returns: CandleSticks - The candles of that timeframe, derived from the
+        #           source candles - None if not kept, or before the first candles
+        #=======================================================================
+        if self.timeframes is not None:
+            return self.timeframes.get(minutes)
+        else:
+            return None
 
 
     def resetLastTradeTime(self, strStrategy):
@@ -161,6 +197,27 @@ class Market(object):
             return datetime.datetime(2000, 1, 1, 0, 0, 0)
 
 
+    def snapshot(self):
+        #=======================================================================
+        # :returns: MarketSnapshot - The values of the market shown by the UI,
+        #           as of now
+        #=======================================================================
+        return MarketSnapshot(name=self.name,
+                              abbr=self.abbr,
+                              isMonitored=self.isMonitored,
+                              bid=self.bid(),
+                              ask=self.ask(),
+                              last=self.last(),
+                              previousDayPrice=self.previousDayPrice(),
+                              previousDayBaseVol=self.previousDayBaseVol(),
+                              previousDayTickBsVolMean=self.previousDayTickBsVolMean(),
+                              previousDayTickBsVolStdev=self.previousDayTickBsVolStdev(),
+                              currentBaseVol=self.currentBaseVol(),
+                              currentFullTickBaseVol=self.currentBaseVol(estimateFullTick=True),
+                              availableBalance=self.availableBalance(),
+                              pendingBalance=self.pendingBalance())
+
+
     def initTimestamp(self):
         #=======================================================================
         # :returns: Timestamp - The time at which the market was initialized
@@ -400,10 +457,14 @@ class Market(object):
 
     #================================================================================================
     #
-    # Set of methods that return a list with a time series of the various market metrics for a past
-    # period, e.g. previous day or past hour. (The list is ordered as first element is oldest, last
-    # element is most recent.) These methods are meant to be used for data analysis as part of a
-    # strategy, e.g. by detecting patterns in the last day.
+    # Set of methods that return a time series of the various market metrics for a past period, e.g.
+    # previous day or past hour. (The series is ordered as first element is oldest, last element is
+    # most recent.) These methods are meant to be used for data analysis as part of a strategy, e.g.
+    # by detecting patterns in the last day.
+    #
+    # The series are read-only numpy views of the candle buffers - nothing is copied per call, and
+    # a view is only valid until the next candle rollover: copy it (list(...), numpy.array(...)) to
+    # keep it across ticks.
     #
     # The following methods are provided:
     #
@@ -427,111 +488,111 @@ class Market(object):
 
     def getAllPreviousDayOpens(self):
         #=======================================================================
-        # :returns: List - A list with all the open prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the open prices of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayOpens()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayCloses(self):
         #=======================================================================
-        # :returns: List - A list with all the close prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the close prices of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayCloses()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayLows(self):
         #=======================================================================
-        # :returns: List - A list with all the low prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the low prices of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayLows()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayHighs(self):
         #=======================================================================
-        # :returns: List - A list with all the high prices from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the high prices of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayHighs()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllPreviousDayVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the volumes from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the volumes of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayVolumes()
         else:
-            return [0]
+            return NO_SERIES
         
     def getAllPreviousDayBaseVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the base volumes from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the base volumes of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllPreviousDayBaseVolumes()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrOpens(self):
         #=======================================================================
-        # :returns: List - A list with all the open prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the open prices of all the last hour candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHrOpens()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrCloses(self):
         #=======================================================================
-        # :returns: List - A list with all the close prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the close prices of all the last hour candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHrCloses()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrLows(self):
         #=======================================================================
-        # :returns: List - A list with all the low prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the low prices of all the last hour candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHrLows()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrHighs(self):
         #=======================================================================
-        # :returns: List - A list with all the high prices from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the high prices of all the last hour candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHrHighs()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHrVolumes(self):
         #=======================================================================
-        # :returns: List - A list with all the volumes from all the last hour candles
+        # :returns: numpy.ndarray - Read-only view of the volumes of all the last hour candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHrVolumes()
         else:
-            return [0]
+            return NO_SERIES
 
     def getAllLastHourBaseVolume(self):
         #=======================================================================
-        # :returns: List - A list with all the base volume from all the previous day candles
+        # :returns: numpy.ndarray - Read-only view of the base volume of all the previous day candles
         #=======================================================================
         if self.candles is not None:
             return self.candles.getAllLastHourBaseVolume()
         else:
-            return [0]
+            return NO_SERIES
 
 
 
@@ -550,14 +611,14 @@ class Market(object):
 
         
 
-    def updateMarketData(self, marketData):
+    def updateMarketData(self, summaryTable, row):
         #=======================================================================
         # Updates the market data (object) for this market
         # 
-        # :param data: response from API calls
+        # :param summaryTable: (SummaryTable) The get_balances response of the tick
+        # :param row: (int) The row of the market in summaryTable
         #=======================================================================
-        if marketData is not None:
-            self.marketData.update(marketData)
+        self.marketData.update(summaryTable, row)
 
 
     def getConfig(self, appConfig):
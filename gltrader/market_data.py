@@ -2,7 +2,6 @@
 import os
 import sys
 from datetime import datetime
-from kivy.app import App
 
 import gltrader.bittrex
 from gltrader.notification import *
@@ -21,16 +20,13 @@ class MarketData(object):
     #===========================================================================
     
 
-    # def __init__(self, market, data):
-    def __init__(self, marketSummaryData):
+    def __init__(self, summaryTable, row):
         #=======================================================================
-        # Accepts the market which created it
-        # :param market: (Market) -- the market which is associated with this object
+        # Accepts the summary table of the tick and the row of the market in it
+        # :param summaryTable: (SummaryTable) -- the parsed get_balances response
+        # :param row: (int) -- the row of this market
         #=======================================================================
-
-        self.balanceSummary = marketSummaryData["Balance"]
-        self.currencySummary = marketSummaryData["Currency"]
-        self.bitcoinMarketSummary = marketSummaryData["BitcoinMarket"]
+        self.update(summaryTable, row)
 
         #=======================================================================
         # #Will introduce a Candlesticks object here
@@ -40,43 +36,43 @@ class MarketData(object):
 
 
     def bid(self):
-        return self.bitcoinMarketSummary["Bid"]
+        return float(self.summary["Bid"])
     
     def ask(self):
-        return self.bitcoinMarketSummary["Ask"]
+        return float(self.summary["Ask"])
 
     def last(self):
-        return self.bitcoinMarketSummary["Last"]
+        return float(self.summary["Last"])
 
     def previousDayHigh(self):
-        return self.bitcoinMarketSummary["High"]
+        return float(self.summary["High"])
 
     def previousDayLow(self):
-        return self.bitcoinMarketSummary["Low"]
+        return float(self.summary["Low"])
 
     def previousDayPrice(self):
-        return self.bitcoinMarketSummary["PrevDay"]
+        return float(self.summary["PrevDay"])
 
     def previousDayBaseVol(self):
-        return self.bitcoinMarketSummary["BaseVolume"]
+        return float(self.summary["BaseVolume"])
         
     def totalBalance(self):
         #=======================================================================
         # :returns: Double - The total balance of a given coin
         #=======================================================================
-        return self.balanceSummary["Balance"]
+        return float(self.summary["Balance"])
     
     def availableBalance(self):
         #=======================================================================
         # :returns: Double - The balance of a coin, availalbe for trade
         #=======================================================================
-        return self.balanceSummary["Available"]
+        return float(self.summary["Available"])
     
     def pendingBalance(self):
         #=======================================================================
         # :returns: Double - The deposit pending balance of a coin
         #=======================================================================
-        return self.balanceSummary["Pending"]
+        return float(self.summary["Pending"])
 
     def reservedBalance(self):
         #=======================================================================
@@ -85,19 +81,14 @@ class MarketData(object):
         return self.totalBalance() - self.availableBalance()
     
 
-    def update(self, data):
+    def update(self, summaryTable, row):
         #=======================================================================
         #
-        # Accepts the array of data passed by the trader at each tick
+        # Accepts the summary table passed by the trader at each tick
         # No checks are performed on the input data, it assumes the data is OK!!
         #
         # :returns: void
         #
         #=======================================================================
-        self.balanceSummary = data["Balance"]
-        self.currencySummary = data["Currency"]
-        self.bitcoinMarketSummary = data["BitcoinMarket"]
-
-
-
-
+        # The row is a view - the values are only read when asked for
+        self.summary = summaryTable.rows[row]
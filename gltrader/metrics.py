@@ -0,0 +1,142 @@
+#===============================================================================
+# Per-endpoint metrics of the exchange API
+#
+# Every request which goes out (see `Bittrex._api_query`) is recorded under
+# its endpoint, labelled with the API version, e.g. "v2.0/pub/market/GetTicks":
+#     - number of calls and of failed calls ("success" false)
+#     - latency histogram of the request itself (p50/p95/p99, mean, max)
+#     - time spent waiting for the rate limiter before the request
+#
+# The histograms have fixed log-spaced buckets, so recording is O(log buckets)
+# and memory does not grow with the number of calls. Percentiles are
+# interpolated within a bucket, i.e. accurate to ~ +/-12%.
+#===============================================================================
+
+import threading
+from bisect import bisect_left
+
+# Bucket upper bounds, in seconds - 0.1ms to ~2min, 25% apart
+BUCKET_BOUNDS = tuple(0.0001 * 1.25 ** i for i in range(64))
+
+
+class LatencyHistogram(object):
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        # Last bucket - beyond the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        #=======================================================================
+        # :param p: (float) Percentile, 0-100
+        # :returns: Double - Estimated latency below which p% of the calls fall
+        #=======================================================================
+        if not self.count:
+            return 0.
+        rank = p / 100. * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - cumulative) / n)
+            cumulative += n
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.
+
+
+class _EndpointMetrics(object):
+    # Metrics of a single endpoint
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+        self.waited = 0
+        self.totalWait = 0.
+        self.maxWait = 0.
+
+
+class ApiMetrics(object):
+    #===========================================================================
+    # Thread-safe registry of the per-endpoint metrics
+    #===========================================================================
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, api_version, path, latency, wait, success):
+        #=======================================================================
+        # Records one request
+        #
+        # :param api_version: (str) 'v1.1' or 'v2.0'
+        # :param path: (str) Endpoint path, e.g. '/pub/market/GetTicks'
+        # :param latency: (float) Request time, in seconds
+        # :param wait: (float) Rate limiter wait before the request, in seconds
+        # :param success: (bool) Whether the request succeeded
+        #=======================================================================
+        key = api_version + path
+        with self.lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = _EndpointMetrics()
+            endpoint.calls += 1
+            if not success:
+                endpoint.errors += 1
+            endpoint.latency.observe(latency)
+            if wait > 0:
+                endpoint.waited += 1
+                endpoint.totalWait += wait
+                endpoint.maxWait = max(endpoint.maxWait, wait)
+
+    def getStats(self):
+        #=======================================================================
+        # :returns: Dict - Per endpoint (e.g. "v2.0/pub/market/GetTicks"), a dict
+        #     calls       - Number of requests
+        #     errors      - Number of failed requests
+        #     p50/p95/p99 - Request latency percentiles, in seconds
+        #     mean/max    - Mean and max request latency, in seconds
+        #     waited      - Number of requests which waited for the rate limiter
+        #     total_wait  - Summed rate limiter wait, in seconds
+        #     max_wait    - Longest rate limiter wait, in seconds
+        #=======================================================================
+        with self.lock:
+            return {key: {"calls"      : endpoint.calls,
+                          "errors"     : endpoint.errors,
+                          "p50"        : endpoint.latency.percentile(50),
+                          "p95"        : endpoint.latency.percentile(95),
+                          "p99"        : endpoint.latency.percentile(99),
+                          "mean"       : endpoint.latency.mean(),
+                          "max"        : endpoint.latency.max,
+                          "waited"     : endpoint.waited,
+                          "total_wait" : endpoint.totalWait,
+                          "max_wait"   : endpoint.maxWait}
+                    for key, endpoint in self.endpoints.items()}
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def dump(self):
+        #=======================================================================
+        # :returns: List[String] - One line per endpoint, for the logs
+        #=======================================================================
+        return ["{:<36}".format(key) +
+                "calls: {:6d} | errors: {:4d} | ".format(stats["calls"], stats["errors"]) +
+                "p50: {:7.1f}ms | p95: {:7.1f}ms | p99: {:7.1f}ms | ".format(stats["p50"] * 1000.,
+                                                                          stats["p95"] * 1000.,
+                                                                          stats["p99"] * 1000.) +
+                "limiter wait: {:.3f}s".format(stats["total_wait"])
+                for key, stats in sorted(self.getStats().items())]
@@ -2,18 +2,113 @@
 import logging
 log = logging.getLogger(__name__)
 
-from kivy.app import App
-from kivy.properties import ObjectProperty
+import json
 from datetime import datetime
 # from .ui.notifications.notification_row import NotificationRow
 from pprint import pprint as pp
 import inspect
 
+from .engine import NotificationSnapshot
+
+
+#===============================================================================
+# Notification sinks - where the notifications go
+#
+# Notifications are raised by the trader, markets, strategies and orders, which
+# know nothing of the UI: every notification is handed to the registered sinks
+# instead. The GUI registers one showing them on the notification screen, a
+# headless trader ones logging them or writing them to a file.
+#===============================================================================
+
+SINKS = []
+
+
+def addSink(sink):
+    SINKS.append(sink)
+
+
+def removeSink(sink):
+    if sink in SINKS:
+        SINKS.remove(sink)
+
+
+class NotificationSink(object):
+    #===========================================================================
+    # Receives the notifications - subclasses override what they handle
+    #===========================================================================
+
+    def add(self, notification):
+        # A new notification
+        pass
+
+    def refresh(self, notification):
+        # A notification was updated (e.g. the action it reports was done)
+        pass
+
+    def close(self):
+        pass
+
+
+class LogSink(NotificationSink):
+    #===========================================================================
+    # Logs the notifications - Alert as warnings, Error as errors
+    #
+    # :param logger: (logging.Logger) Defaults to this module's logger
+    #===========================================================================
+
+    def __init__(self, logger=None):
+        self.log = logger or log
+
+    def add(self, notification):
+        level = logging.ERROR if notification.level >= Error.level else \
+                logging.WARNING if notification.level >= Alert.level else logging.INFO
+        self.log.log(level, notification.describe())
+
+    def refresh(self, notification):
+        self.log.info("Updated - " + notification.describe())
+
+
+class FileSink(NotificationSink):
+    #===========================================================================
+    # Appends the notifications to a file, one JSON object per line
+    #
+    # :param path: (str) File path
+    #===========================================================================
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def add(self, notification):
+        self.write("add", notification)
+
+    def refresh(self, notification):
+        self.write("refresh", notification)
+
+    def write(self, event, notification):
+        self.file.write(json.dumps(dict(notification.asDict(), event=event)) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def sinkFromConfig(sinkConfig):
+    #===========================================================================
+    # :param sinkConfig: "log", or {"file": path}
+    # :returns: NotificationSink
+    #===========================================================================
+    if sinkConfig == "log":
+        return LogSink()
+    if isinstance(sinkConfig, dict) and "file" in sinkConfig:
+        return FileSink(sinkConfig["file"])
+    raise ValueError("Unknown notification sink: " + repr(sinkConfig))
+
+
 class Notification(object):
     """
     This class controls lines that are added to the notification screen
     """
-    rowWidget = ObjectProperty
+    rowWidget = None
     isError = False
     level = 0
     market = None
@@ -47,8 +142,15 @@ class Notification(object):
         #         self.oneline()
         #=======================================================================
         self.notified = False
-        App.get_running_app().trader.notifications[id(self)] = self
-        App.get_running_app().rootWidget.nScreen.notification_layout.refresh()
+        self.notify("add")
+
+    def notify(self, event):
+        # Hands the notification to every sink - a failing sink does not stop the others
+        for sink in list(SINKS):
+            try:
+                getattr(sink, event)(self)
+            except Exception:
+                log.exception("Notification sink " + sink.__class__.__name__ + " failed")
 
     def getMessageValues(self):
         #=======================================================================
@@ -72,7 +174,44 @@ class Notification(object):
         }
 
     def refreshWidget(self):
-        App.get_running_app().rootWidget.nScreen.notification_layout.rowWidgets[id(self)].refresh()
+        self.notify("refresh")
+
+    def describe(self):
+        #=======================================================================
+        # :returns: (String) One line describing the notification
+        #=======================================================================
+        market = getattr(self.market, "name", None)
+        return self.__class__.__name__ + ": " + self.message + ("" if market is None else " (" + market + ")")
+
+    def asDict(self):
+        #=======================================================================
+        # :returns: (Dict) The notification as JSON serializable values
+        #=======================================================================
+        return {"time": self.time.isoformat(),
+                "type": self.__class__.__name__,
+                "level": self.level,
+                "message": self.message,
+                "market": getattr(self.market, "name", None)}
+
+    def snapshot(self):
+        #=======================================================================
+        # :returns: NotificationSnapshot - The values of the notification shown
+        #           by the UI, as of now
+        #=======================================================================
+        action = self.action or None
+        done = action is not None and bool(action.done)
+        complete = done and bool(action.checkActionComplete())
+        return NotificationSnapshot(key=id(self),
+                                    time=self.time,
+                                    type=self.__class__.__name__,
+                                    level=self.level,
+                                    message=self.message,
+                                    marketName=getattr(self.market, "name", None),
+                                    marketMonitored=bool(getattr(self.market, "isMonitored", False)),
+                                    hasAction=action is not None,
+                                    actionDone=done,
+                                    actionComplete=complete,
+                                    actionSuccess=complete and bool(action.success))
 
     def getMessage(self, msg):
         #=======================================================================
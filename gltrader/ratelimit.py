@@ -0,0 +1,425 @@
+#===============================================================================
+# Token-bucket rate limiter for the exchange API
+#
+# A single bucket is shared process-wide (see `getSharedLimiter()`) so that the
+# v1.1 and v2.0 Bittrex objects and every candle thread draw from the same
+# budget. The bucket refills at `rate` tokens per second up to `capacity`
+# tokens, which allows short bursts while keeping the long-run rate capped.
+#
+# Each call costs one token unless the endpoint has a weight configured, e.g.
+#     {'/pub/market/GetTicks': 2}
+#
+# The API objects go through a `PriorityScheduler` over that bucket (see
+# `getSharedScheduler()`), which lets order placement and cancellation calls
+# out before any queued data query.
+#===============================================================================
+
+import time
+import asyncio
+import threading
+from collections import deque
+
+import logging
+log = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    #===========================================================================
+    # Thread-safe token bucket.
+    #
+    # Callers reserve their tokens under the lock - possibly driving the bucket
+    # into debt - and then sleep, outside the lock, until the debt is repaid.
+    # Waiting threads are therefore served in arrival order, and no thread
+    # spins or sleeps longer than needed.
+    #
+    # :param rate: (float) Tokens added per second, i.e. sustained calls per second
+    # :param capacity: (float) Max tokens in the bucket, i.e. burst size
+    # :param weights: (dict) Token cost per endpoint path, default cost is 1
+    #===========================================================================
+
+    def __init__(self, rate=1., capacity=1., weights=None):
+        self.lock = threading.Lock()
+        self.weights = {}
+        self.configure(rate, capacity, weights)
+        self.tokens = self.capacity
+        self.lastRefill = time.monotonic()
+        self.resetStats()
+
+    def configure(self, rate=None, capacity=None, weights=None):
+        #=======================================================================
+        # (Re)Sets the bucket parameters. Arguments left as None are unchanged.
+        #=======================================================================
+        with self.lock:
+            if rate is not None:
+                if rate <= 0:
+                    raise ValueError("Rate limit must be positive, got " + str(rate))
+                self.rate = float(rate)
+            if capacity is not None:
+                self.capacity = float(max(capacity, 1))
+            if weights is not None:
+                self.weights = dict(weights)
+
+    def weight(self, endpoint):
+        #=======================================================================
+        # :returns: Double - The number of tokens a call to `endpoint` costs
+        #=======================================================================
+        return self.weights.get(endpoint, 1)
+
+    def acquire(self, endpoint=None):
+        #=======================================================================
+        # Blocks until the call to `endpoint` is allowed to go out
+        #
+        # :returns: Double - Time spent waiting, in seconds
+        #=======================================================================
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquireAsync(self, endpoint=None):
+        #=======================================================================
+        # Same as `acquire()`, for the coroutines - sleeps without blocking
+        # the event loop
+        #=======================================================================
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reserve(self, endpoint=None):
+        #=======================================================================
+        # Takes the tokens for a call to `endpoint` without blocking. The caller
+        # must wait for the returned time before making the call - this is
+        # what lets coroutines use the bucket (`await asyncio.sleep(wait)`).
+        #
+        # :returns: Double - Time to wait before the call may go out, in seconds
+        #=======================================================================
+        cost = self.weight(endpoint)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= cost
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.
+            self._record(cost, wait)
+        return wait
+
+    def take(self, endpoint=None):
+        #=======================================================================
+        # Takes the tokens for a call to `endpoint` only if the bucket has them
+        # (a call costlier than the bucket capacity only needs a full bucket).
+        # Unlike `reserve()`, a refused call leaves the bucket untouched - this
+        # is what lets a scheduler pick which waiting call goes out next.
+        #
+        # :returns: Double - 0 if the tokens were taken, else the time until
+        #           the bucket will have them, in seconds
+        #=======================================================================
+        cost = self.weight(endpoint)
+        with self.lock:
+            self._refill(time.monotonic())
+            needed = min(cost, self.capacity)
+            if self.tokens < needed:
+                return (needed - self.tokens) / self.rate
+            self.tokens -= cost
+            self.nrCalls += 1
+            self.tokensSpent += cost
+        return 0.
+
+    def recordWait(self, wait):
+        #=======================================================================
+        # Adds the wait of a call let through by `take()` to the metrics
+        #=======================================================================
+        if wait > 0:
+            with self.lock:
+                self._recordWait(wait)
+
+    def _refill(self, now):
+        # Must be called with the lock held
+        self.tokens = min(self.capacity, self.tokens + (now - self.lastRefill) * self.rate)
+        self.lastRefill = now
+
+    def _record(self, cost, wait):
+        # Must be called with the lock held
+        self.nrCalls += 1
+        self.tokensSpent += cost
+        if wait > 0:
+            self._recordWait(wait)
+
+    def _recordWait(self, wait):
+        # Must be called with the lock held
+        self.nrWaited += 1
+        self.totalWait += wait
+        self.maxWait = max(self.maxWait, wait)
+
+    def resetStats(self):
+        #=======================================================================
+        # Resets the queue wait metrics
+        #=======================================================================
+        self.nrCalls = 0
+        self.nrWaited = 0
+        self.tokensSpent = 0.
+        self.totalWait = 0.
+        self.maxWait = 0.
+
+    def getStats(self):
+        #=======================================================================
+        # :returns: Dict - Queue wait metrics since start (or last reset)
+        #     calls       - Number of calls let through
+        #     waited      - Number of calls which had to wait for a token
+        #     tokens      - Tokens spent (weighted calls)
+        #     total_wait  - Summed wait time, in seconds
+        #     mean_wait   - Average wait time per call, in seconds
+        #     max_wait    - Longest single wait, in seconds
+        #=======================================================================
+        with self.lock:
+            return {
+                "calls"      : self.nrCalls,
+                "waited"     : self.nrWaited,
+                "tokens"     : self.tokensSpent,
+                "total_wait" : self.totalWait,
+                "mean_wait"  : self.totalWait / self.nrCalls if self.nrCalls else 0.,
+                "max_wait"   : self.maxWait
+            }
+
+
+# Scheduler lanes, highest priority first
+LANE_TRADE = 'trade'
+LANE_QUERY = 'query'
+LANES = (LANE_TRADE, LANE_QUERY)
+
+
+class _Lane(object):
+    # Waiting calls of one lane, and its metrics
+    def __init__(self):
+        self.queue = deque()
+        self.maxDepth = 0
+        self.nrCalls = 0
+        self.totalWait = 0.
+        self.maxWait = 0.
+
+
+class _AsyncTicket(object):
+    # Place of a waiting coroutine in a lane - notify() wakes it up, from any thread
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def notify(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+class PriorityScheduler(object):
+    #===========================================================================
+    # Lets the calls through a TokenBucket by priority lane: the calls to the
+    # `priority` endpoints (order placement and cancellation) go in the trade
+    # lane, everything else in the query lane. Whenever the bucket has
+    # tokens, the oldest call of the highest non-empty lane goes out - so an
+    # order placed behind a tick's worth of candle queries only waits for the
+    # next token, not for all of them.
+    #
+    # Same interface as the bucket (`acquire`, `acquireAsync`, `weight`,
+    # `configure`, stats), so it can be handed to the Bittrex objects in its
+    # place. The coroutines wait in the same lanes as the threads.
+    #
+    # :param bucket: (TokenBucket) The rate limit to respect
+    # :param priority: (iterable) Endpoint paths of the trade lane
+    #===========================================================================
+
+    def __init__(self, bucket, priority=()):
+        self.bucket = bucket
+        self.lock = threading.Lock()
+        self.priority = frozenset(priority)
+        self.lanes = {lane: _Lane() for lane in LANES}
+
+    def configure(self, rate=None, capacity=None, weights=None, priority=None):
+        #=======================================================================
+        # (Re)Sets the bucket parameters and the trade lane endpoints.
+        # Arguments left as None are unchanged.
+        #=======================================================================
+        self.bucket.configure(rate, capacity, weights)
+        if priority is not None:
+            self.priority = frozenset(priority)
+
+    def weight(self, endpoint):
+        return self.bucket.weight(endpoint)
+
+    def lane(self, endpoint):
+        #=======================================================================
+        # :returns: String - The lane of the calls to `endpoint`
+        #=======================================================================
+        return LANE_TRADE if endpoint in self.priority else LANE_QUERY
+
+    def acquire(self, endpoint=None):
+        #=======================================================================
+        # Blocks until the call to `endpoint` is allowed to go out, i.e. until
+        # it heads the highest non-empty lane and the bucket has its tokens
+        #
+        # :returns: Double - Time spent waiting, in seconds
+        #=======================================================================
+        lane = self.lanes[self.lane(endpoint)]
+        start = time.monotonic()
+        with self.lock:
+            # Each waiting call has its own condition, so only the next call
+            # to go out is woken up
+            ticket = threading.Condition(self.lock)
+            self._enqueue(lane, ticket)
+            blocked = False
+            try:
+                while True:
+                    if self._head() is ticket:
+                        wait = self.bucket.take(endpoint)
+                        if wait <= 0:
+                            break
+                        ticket.wait(wait)
+                    else:
+                        ticket.wait()
+                    blocked = True
+            finally:
+                waited = self._dequeue(lane, ticket, time.monotonic() - start if blocked else 0.)
+        self.bucket.recordWait(waited)
+        return waited
+
+    async def acquireAsync(self, endpoint=None):
+        #=======================================================================
+        # Same as `acquire()`, for the coroutines: they wait in the same lanes
+        # as the threads, without blocking the event loop. A cancelled call
+        # leaves its lane.
+        #
+        # :returns: Double - Time spent waiting, in seconds
+        #=======================================================================
+        lane = self.lanes[self.lane(endpoint)]
+        start = time.monotonic()
+        ticket = _AsyncTicket()
+        with self.lock:
+            self._enqueue(lane, ticket)
+        blocked = False
+        try:
+            while True:
+                with self.lock:
+                    wait = None
+                    if self._head() is ticket:
+                        wait = self.bucket.take(endpoint)
+                        if wait <= 0:
+                            break
+                    ticket.event.clear()
+                blocked = True
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.lock:
+                waited = self._dequeue(lane, ticket, time.monotonic() - start if blocked else 0.)
+        self.bucket.recordWait(waited)
+        return waited
+
+    def _enqueue(self, lane, ticket):
+        # Must be called with the lock held
+        lane.queue.append(ticket)
+        lane.maxDepth = max(lane.maxDepth, len(lane.queue))
+
+    def _dequeue(self, lane, ticket, waited):
+        # Must be called with the lock held - wakes up the next call to go
+        # out, and returns `waited`
+        lane.queue.remove(ticket)
+        head = self._head()
+        if head is not None:
+            head.notify()
+        lane.nrCalls += 1
+        lane.totalWait += waited
+        lane.maxWait = max(lane.maxWait, waited)
+        return waited
+
+    def _head(self):
+        # Must be called with the lock held
+        for name in LANES:
+            queue = self.lanes[name].queue
+            if queue:
+                return queue[0]
+        return None
+
+    def getQueueDepths(self):
+        #=======================================================================
+        # :returns: Dict - Number of calls currently waiting, per lane
+        #=======================================================================
+        with self.lock:
+            return {name: len(lane.queue) for name, lane in self.lanes.items()}
+
+    def resetStats(self):
+        self.bucket.resetStats()
+        with self.lock:
+            for lane in self.lanes.values():
+                lane.maxDepth = len(lane.queue)
+                lane.nrCalls = 0
+                lane.totalWait = 0.
+                lane.maxWait = 0.
+
+    def getStats(self):
+        #=======================================================================
+        # :returns: Dict - The bucket metrics (see `TokenBucket.getStats`), and
+        #     lanes - Per lane, a dict
+        #         depth      - Number of calls currently waiting
+        #         max_depth  - Most calls waiting at once
+        #         calls      - Number of calls let through
+        #         mean_wait  - Average wait per call, in seconds
+        #         max_wait   - Longest single wait, in seconds
+        #=======================================================================
+        stats = self.bucket.getStats()
+        with self.lock:
+            stats["lanes"] = {name: {"depth"     : len(lane.queue),
+                                     "max_depth" : lane.maxDepth,
+                                     "calls"     : lane.nrCalls,
+                                     "mean_wait" : lane.totalWait / lane.nrCalls if lane.nrCalls else 0.,
+                                     "max_wait"  : lane.maxWait}
+                              for name, lane in self.lanes.items()}
+        return stats
+
+
+class Unthrottled(PriorityScheduler):
+    #===========================================================================
+    # Scheduler which lets every call out at once, e.g. for a replay run as
+    # fast as possible. The calls are still counted in the stats.
+    #===========================================================================
+
+    def __init__(self):
+        super(Unthrottled, self).__init__(TokenBucket())
+
+    def acquire(self, endpoint=None):
+        with self.lock:
+            self.lanes[self.lane(endpoint)].nrCalls += 1
+        with self.bucket.lock:
+            self.bucket._record(self.bucket.weight(endpoint), 0.)
+        return 0.
+
+    async def acquireAsync(self, endpoint=None):
+        return self.acquire(endpoint)
+
+
+_sharedLimiter = None
+_sharedScheduler = None
+_sharedLimiterLock = threading.Lock()
+
+
+def getSharedLimiter():
+    #===========================================================================
+    # :returns: TokenBucket - The process-wide limiter, created on first use
+    #           with the conservative default of 1 call/sec. Use `configure()`
+    #           to set the actual limits.
+    #===========================================================================
+    global _sharedLimiter
+    with _sharedLimiterLock:
+        if _sharedLimiter is None:
+            _sharedLimiter = TokenBucket()
+        return _sharedLimiter
+
+
+def getSharedScheduler():
+    #===========================================================================
+    # :returns: PriorityScheduler - The process-wide scheduler over the shared
+    #           limiter, created on first use. Trade and query API objects
+    #           must share it for the trade lane to pre-empt the queries.
+    #===========================================================================
+    global _sharedScheduler
+    limiter = getSharedLimiter()
+    with _sharedLimiterLock:
+        if _sharedScheduler is None:
+            _sharedScheduler = PriorityScheduler(limiter)
+        return _sharedScheduler
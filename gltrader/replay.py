@@ -0,0 +1,137 @@
+#===============================================================================
+# Record/replay transport for deterministic offline runs
+#
+# Both classes are dispatchers, i.e. they can be passed as
+# `Bittrex(dispatch=...)` / `BittrexAPI(dispatch=...)`.
+#
+# - RecordingDispatcher wraps the live transport and appends every request
+#   and its JSON response to a log file.
+# - ReplayDispatcher serves a log back, without network, at the recorded
+#   timing or accelerated by `speed` (e.g. 100x).
+#
+# Log format - one JSON object per line (gzipped if the file name ends in .gz):
+#     {"t": 12.503, "url": "/api/v2.0/pub/market/GetLatestTick?marketName=BTC-LTC&...", "r": {...}}
+# where "t" is the time (seconds) since the start of the recording. The URL is
+# stored without host, API key, nonce or signature, so the log holds no
+# credentials and the same query always maps to the same key.
+#===============================================================================
+
+import gzip
+import json
+import time
+import threading
+from collections import defaultdict, deque
+
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import logging
+log = logging.getLogger(__name__)
+
+# Query parameters which change on every call, or hold credentials
+VOLATILE_PARAMS = ('apikey', 'nonce')
+
+
+def requestKey(request_url):
+    #===========================================================================
+    # :returns: String - `request_url` without host, API key and nonce
+    #
+    # Example: https://bittrex.com/api/v2.0/key/balance/getbalances?apikey=XX&nonce=123&
+    #          -> /api/v2.0/key/balance/getbalances?
+    #===========================================================================
+    parts = urlsplit(request_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in VOLATILE_PARAMS]
+    return parts.path + '?' + urlencode(query)
+
+
+def openLog(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class RecordingDispatcher(object):
+    #===========================================================================
+    # Passes every call through to `dispatch` and appends it to the log
+    #
+    # :param dispatch: (callable) The live transport, e.g. SessionDispatcher()
+    # :param path: (str) Log file - appended to if it exists
+    #===========================================================================
+
+    def __init__(self, dispatch, path):
+        self.dispatch = dispatch
+        self.path = path
+        self.lock = threading.Lock()
+        self.logFile = openLog(path, 'a')
+        self.start = time.monotonic()
+
+    def __call__(self, request_url, apisign):
+        response = self.dispatch(request_url, apisign)
+        record = json.dumps({"t": round(time.monotonic() - self.start, 3),
+                             "url": requestKey(request_url),
+                             "r": response},
+                            separators=(',', ':'))
+        with self.lock:
+            self.logFile.write(record + '\n')
+            self.logFile.flush()
+        return response
+
+    def close(self):
+        with self.lock:
+            self.logFile.close()
+        if hasattr(self.dispatch, "close"):
+            self.dispatch.close()
+
+
+class ReplayDispatcher(object):
+    #===========================================================================
+    # Serves the responses of a recorded log
+    #
+    # Responses to the same request are served in the recorded order. A
+    # response is not released before its recorded time (divided by `speed`)
+    # has elapsed since the replay started - so the trader sees the market
+    # move like it did, only faster. A request which is not (or no longer) in
+    # the log gets a failed response, like a missed API call.
+    #
+    # :param path: (str) Log file written by RecordingDispatcher
+    # :param speed: (float) Replay speed-up factor, None to replay as fast as possible
+    #===========================================================================
+
+    def __init__(self, path, speed=1.):
+        self.path = path
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.records = defaultdict(deque)
+        self.misses = 0
+        with openLog(path, 'r') as logFile:
+            for line in logFile:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[record["url"]].append((record["t"], record["r"]))
+        self.start = time.monotonic()
+
+    def __call__(self, request_url, apisign):
+        key = requestKey(request_url)
+        with self.lock:
+            queue = self.records.get(key)
+            if not queue:
+                self.misses += 1
+                log.debug("Replay - No recorded response for: " + key)
+                return {
+                   'success' : False,
+                   'message' : 'NO_RECORDED_RESPONSE',
+                   'result'  : None
+                }
+            recordedTime, response = queue.popleft()
+
+        if self.speed:
+            wait = recordedTime / self.speed - (time.monotonic() - self.start)
+            if wait > 0:
+                time.sleep(wait)
+        return response
+
+    def remaining(self):
+        #=======================================================================
+        # :returns: Integer - Number of recorded responses not served yet
+        #=======================================================================
+        with self.lock:
+            return sum(len(queue) for queue in self.records.values())
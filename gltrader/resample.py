@@ -0,0 +1,226 @@
+#===============================================================================
+# Candles of several timeframes, derived from the candles of one (finer)
+# interval
+#
+# The exchange is asked for the candles of one interval only, e.g. fiveMin,
+# and the coarser ones (30 min, 1 hour, 1 day...) are built from them
+# locally: a coarser candle opens with its first candle, closes with its
+# last one, spans their highs and lows, and adds up their volumes. The latest
+# candle of each tick is folded into every timeframe as it comes in - no
+# extra API call per timeframe.
+#
+# - Resampler:        One timeframe, updated one source candle at a time
+# - resample():       The same, over a whole history (oldest first)
+# - CandleTimeframes: The CandleSticks of every timeframe of a market
+#===============================================================================
+
+from datetime import datetime, timedelta
+
+from .candlesticks import CandleSticks, candlesPerHour, candlesPerDay, candlesBetween
+
+import logging
+log = logging.getLogger(__name__)
+
+# Candle length, in minutes, per Bittrex tick interval
+INTERVAL_MINUTES = {
+    'oneMin'    : 1,
+    'fiveMin'   : 5,
+    'thirtyMin' : 30,
+    'hour'      : 60,
+    'Day'       : 1440
+}
+# Timeframes that can be derived, in minutes - they all divide a day, so the
+# candles of every timeframe start at midnight (UTC, as the exchange's)
+TIMEFRAMES = (1, 5, 30, 60, 1440)
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
+
+
+def intervalName(minutes):
+    #===========================================================================
+    # :returns: String - The Bittrex tick interval of `minutes` long candles
+    #===========================================================================
+    for name, length in INTERVAL_MINUTES.items():
+        if length == minutes:
+            return name
+    raise ValueError("No Bittrex tick interval of {} minutes".format(minutes))
+
+
+def checkTimeframes(sourceMinutes, timeframes):
+    #===========================================================================
+    # Raises ValueError if a timeframe can not be derived from the source candles
+    #===========================================================================
+    for minutes in timeframes:
+        if minutes not in TIMEFRAMES or minutes % sourceMinutes:
+            raise ValueError("Candles of {} minutes can not be derived from {} minutes candles - ".format(
+                             minutes, sourceMinutes) + "supported: " +
+                             ", ".join(str(m) for m in TIMEFRAMES if m % sourceMinutes == 0))
+
+
+def historyLength(sourceMinutes, timeframes):
+    #===========================================================================
+    # :returns: Integer - Number of source candles needed to fill the
+    #           CandleSticks of all the timeframes (the oldest coarse candle
+    #           can be partial, so one more of those when resampling)
+    #===========================================================================
+    length = 0
+    for minutes in timeframes:
+        nrCandles = candlesPerDay(minutes) + candlesPerHour(minutes)
+        if minutes != sourceMinutes:
+            nrCandles += 1
+        length = max(length, nrCandles * minutes // sourceMinutes)
+    return length
+
+
+def bucketStart(timestamp, minutes):
+    #===========================================================================
+    # :param timestamp: (str) Candle timestamp, e.g. '2017-11-03T03:05:00'
+    # :returns: String - The timestamp of the `minutes` long candle it falls in
+    #===========================================================================
+    t = datetime.fromisoformat(timestamp[:19])
+    minute = (t - EPOCH) // ONE_MINUTE
+    return (EPOCH + (minute - minute % minutes) * ONE_MINUTE).isoformat()
+
+
+def merge(candle, later):
+    #===========================================================================
+    # :returns: Dict - The candle spanning `candle` and the `later` one
+    #===========================================================================
+    return {"O": candle["O"], "H": max(candle["H"], later["H"]), "L": min(candle["L"], later["L"]),
+            "C": later["C"], "V": candle["V"] + later["V"], "T": candle["T"], "BV": candle["BV"] + later["BV"]}
+
+
+class Resampler(object):
+    #===========================================================================
+    # Incremental resampling of source candles into `minutes` long candles
+    #
+    # The source candles come in oldest first, the latest one possibly more
+    # than once while it forms (same "T"). The closed source candles of the
+    # current coarse candle are kept folded into one, and the forming one
+    # apart, so its updates replace each other instead of adding up.
+    #
+    # :param sourceMinutes: (int) Length of the source candles
+    # :param minutes: (int) Length of the resampled candles
+    #===========================================================================
+
+    def __init__(self, sourceMinutes, minutes):
+        checkTimeframes(sourceMinutes, [minutes])
+        self.sourceMinutes = sourceMinutes
+        self.minutes = minutes
+        # Timestamp of the current resampled candle, and of its latest source candle
+        self.bucket = None
+        self.sourceT = None
+        # Closed source candles of the current resampled candle (folded), and the latest one
+        self.closed = None
+        self.latest = None
+
+    def update(self, candle):
+        #=======================================================================
+        # :param candle: (dict) The latest source candle
+        # :returns: Dict - The current resampled candle, up to `candle` - None if
+        #           `candle` is older than the candles already seen
+        #=======================================================================
+        if self.sourceT is not None and candle["T"] < self.sourceT:
+            return None
+        if self.minutes == self.sourceMinutes:
+            self.bucket = self.sourceT = candle["T"]
+            self.latest = candle
+            return candle
+        if candle["T"] != self.sourceT:
+            bucket = bucketStart(candle["T"], self.minutes)
+            if bucket != self.bucket:
+                self.bucket = bucket
+                self.closed = None
+            elif self.latest is not None:
+                # The previous source candle is closed
+                self.closed = self.current()
+            self.sourceT = candle["T"]
+        self.latest = candle
+        return self.current()
+
+    def current(self):
+        #=======================================================================
+        # :returns: Dict - The current resampled candle (a new dict)
+        #=======================================================================
+        if self.latest is None:
+            return None
+        if self.closed is None:
+            current = dict(self.latest)
+            current["T"] = self.bucket
+            return current
+        return merge(self.closed, self.latest)
+
+
+def resample(candles, sourceMinutes, minutes, resampler=None):
+    #===========================================================================
+    # :param candles: (list) Source candles, oldest first
+    # :param resampler: (Resampler) To resample with - left at the latest candle
+    # :returns: List - The `minutes` long candles, oldest first
+    #===========================================================================
+    if resampler is None:
+        resampler = Resampler(sourceMinutes, minutes)
+    resampled = []
+    for candle in candles:
+        current = resampler.update(candle)
+        if current is None:
+            continue
+        if resampled and resampled[-1]["T"] == current["T"]:
+            resampled[-1] = current
+        else:
+            resampled.append(current)
+    return resampled
+
+
+class CandleTimeframes(object):
+    #===========================================================================
+    # The candles of a market in several timeframes, all derived from the
+    # candles of the source interval
+    #
+    # :param allCandles: (list) Source candles history, oldest first
+    # :param sourceMinutes: (int) Length of the source candles
+    # :param timeframes: (iterable) Timeframes to keep, in minutes
+    # :param totalTimeFrame: (int) Hours covered by the candles, see CandleSticks
+    #===========================================================================
+
+    def __init__(self, allCandles, sourceMinutes, timeframes, totalTimeFrame=24):
+        checkTimeframes(sourceMinutes, timeframes)
+        self.sourceMinutes = sourceMinutes
+        # Timestamp of the latest source candle, and source candles missed before it
+        self.sourceT = allCandles[-1]["T"] if allCandles else None
+        self.lastGap = 0
+        self.resamplers = {}
+        self.candles = {}
+        for minutes in sorted(set(timeframes)):
+            self.resamplers[minutes] = Resampler(sourceMinutes, minutes)
+            self.candles[minutes] = CandleSticks(resample(allCandles or [], sourceMinutes, minutes,
+                                                          self.resamplers[minutes]),
+                                                 totalTimeFrame, minutes)
+
+    def __repr__(self):
+        return "<CandleTimeframes {:d}min -> {}>".format(self.sourceMinutes,
+                                                         ", ".join(str(m) for m in self.candles))
+
+    def updateCandles(self, lastCandle):
+        #=======================================================================
+        # Folds the latest source candle into every timeframe
+        #
+        # Sets `lastGap` to the number of source candles missed before it
+        #=======================================================================
+        self.lastGap = 0
+        if lastCandle["T"] != self.sourceT:
+            if self.sourceT is not None:
+                self.lastGap = max(0, candlesBetween(self.sourceT, lastCandle["T"], self.sourceMinutes) - 1)
+            self.sourceT = max(self.sourceT or lastCandle["T"], lastCandle["T"])
+        for minutes, resampler in self.resamplers.items():
+            self.candles[minutes].updateCandles(resampler.update(lastCandle))
+
+    def get(self, minutes):
+        #=======================================================================
+        # :returns: CandleSticks - The candles of the `minutes` timeframe, None
+        #           if not kept
+        #=======================================================================
+        return self.candles.get(minutes)
+
+    def timeframes(self):
+        return list(self.candles)
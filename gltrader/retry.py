@@ -0,0 +1,189 @@
+#===============================================================================
+# Retries with jittered exponential backoff, and per-endpoint circuit breakers
+#
+# Only for the idempotent (read) endpoints - a failed trade call is never
+# retried, since it may have reached the exchange.
+#
+# A call is retried only if it failed for a transient reason: no response,
+# timeout, rate limit rejection, exchange unavailable, or a transport error
+# (whose message is the exception text). Bittrex's own errors, which are
+# UPPER_SNAKE_CASE codes such as INVALID_MARKET, are final.
+#
+# The breaker of an endpoint opens after `threshold` consecutive transient
+# failures: calls then fail at once with CIRCUIT_OPEN, without reaching the
+# exchange. After `resetTimeout` seconds a single probe call is let through
+# (half-open) - its success closes the breaker, its failure re-opens it.
+#===============================================================================
+
+import re
+import time
+import random
+import threading
+
+import logging
+log = logging.getLogger(__name__)
+
+# Failure messages worth another try
+TRANSIENT_ERRORS = ('NO_API_RESPONSE', 'REQUEST_TIMEOUT', 'RATE_LIMIT_EXCEEDED', 'SERVICE_UNAVAILABLE')
+# Format of the exchange's own (final) error codes
+EXCHANGE_ERROR = re.compile(r'[A-Z0-9_]+')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def isTransient(response):
+    #===========================================================================
+    # :returns: Boolean - Whether `response` is a failure worth retrying
+    #===========================================================================
+    if not isinstance(response, dict) or response.get("success", False):
+        return False
+    message = response.get("message", None) or ''
+    return message in TRANSIENT_ERRORS or (message != '' and not EXCHANGE_ERROR.fullmatch(message))
+
+
+class RetryPolicy(object):
+    #===========================================================================
+    # :param retries: (int) Max extra attempts after a transient failure
+    # :param backoff: (float) Backoff cap of the first retry, in seconds - it
+    #                 doubles at every further retry
+    # :param maxBackoff: (float) Max backoff cap, in seconds
+    #===========================================================================
+
+    def __init__(self, retries=2, backoff=.5, maxBackoff=8.):
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+
+    def delay(self, attempt):
+        #=======================================================================
+        # :param attempt: (int) Number of the retry, from 0
+        # :returns: Double - Seconds to wait before it - "full jitter", uniform
+        #           in [0, cap], so that failing threads do not retry in step
+        #=======================================================================
+        return random.uniform(0., min(self.maxBackoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker(object):
+    #===========================================================================
+    # Thread-safe breaker of a single endpoint
+    #
+    # :param threshold: (int) Consecutive failures which open the breaker -
+    #                   None or 0 to never open it
+    # :param resetTimeout: (float) Seconds before an open breaker lets a probe through
+    #===========================================================================
+
+    def __init__(self, threshold=5, resetTimeout=60.):
+        self.lock = threading.Lock()
+        self.threshold = threshold
+        self.resetTimeout = resetTimeout
+        self.state = CLOSED
+        self.failures = 0
+        self.openedAt = 0.
+        self.timesOpened = 0
+        self.rejected = 0
+
+    def allow(self):
+        #=======================================================================
+        # :returns: Boolean - Whether a call may go out now
+        #=======================================================================
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.openedAt >= self.resetTimeout:
+                # Let this single call probe the endpoint
+                self.state = HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def recordSuccess(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def recordFailure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.threshold and self.state == CLOSED and
+                                           self.failures >= self.threshold):
+                self.state = OPEN
+                self.openedAt = time.monotonic()
+                self.timesOpened += 1
+                return True
+            return False
+
+    def getStats(self):
+        with self.lock:
+            return {"state": self.state, "failures": self.failures,
+                    "opened": self.timesOpened, "rejected": self.rejected}
+
+
+class Resilience(object):
+    #===========================================================================
+    # Retry policy, per-endpoint breakers and their metrics, for one API wrapper
+    #===========================================================================
+
+    def __init__(self, retries=2, backoff=.5, maxBackoff=8., breakerThreshold=5, breakerReset=60.):
+        self.policy = RetryPolicy(retries, backoff, maxBackoff)
+        self.breakerThreshold = breakerThreshold
+        self.breakerReset = breakerReset
+        self.lock = threading.Lock()
+        self.breakers = {}
+        self.retries = 0
+        self.exhausted = 0
+
+    def breaker(self, endpoint):
+        #=======================================================================
+        # :returns: CircuitBreaker - The breaker of `endpoint`, created on first use
+        #=======================================================================
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breakerThreshold, self.breakerReset)
+                self.breakers[endpoint] = breaker
+            return breaker
+
+    def outcome(self, endpoint, breaker, response, attempt):
+        #=======================================================================
+        # Records the outcome of attempt number `attempt` (from 0)
+        #
+        # :returns: Double - Seconds to wait before retrying, or None if the
+        #           response is final
+        #=======================================================================
+        if not isTransient(response):
+            # Success, or a final answer of the exchange - the endpoint is up
+            breaker.recordSuccess()
+            return None
+        if breaker.recordFailure():
+            log.warning("Circuit breaker opened for " + endpoint + " - " + str(response.get("message")))
+            return None
+        if attempt >= self.policy.retries or breaker.state != CLOSED:
+            with self.lock:
+                self.exhausted += 1
+            return None
+        with self.lock:
+            self.retries += 1
+        return self.policy.delay(attempt)
+
+    def getStats(self):
+        #=======================================================================
+        # :returns: Dict - retries: total retries, exhausted: calls which
+        #           failed after all their attempts, breakers: per endpoint
+        #           state, consecutive failures, times opened, calls rejected
+        #=======================================================================
+        with self.lock:
+            breakers = dict(self.breakers)
+            stats = {"retries": self.retries, "exhausted": self.exhausted}
+        stats["breakers"] = {endpoint: breaker.getStats() for endpoint, breaker in breakers.items()}
+        return stats
+
+
+def circuitOpen():
+    # Response of a call rejected by an open breaker
+    return {
+       'success' : False,
+       'message' : 'CIRCUIT_OPEN',
+       'result'  : None
+    }
@@ -0,0 +1,104 @@
+#===============================================================================
+# Rolling aggregates over a sliding window - O(1) per update
+#
+# - RollingMoments: count, sum, mean and variance (Welford, with the value
+#   leaving the window removed the same way)
+# - RollingMax / RollingMin: monotonic deque of the candidates to the extremum
+#
+# The window itself is kept by the caller (e.g. a CandleRing), which passes
+# the value leaving it along with the new one.
+#===============================================================================
+
+import math
+from collections import deque
+
+
+class RollingMoments(object):
+    #===========================================================================
+    # Sum, mean and variance of the values in the window
+    #===========================================================================
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.
+        self.mean = 0.
+        # Sum of the squared deviations from the mean
+        self.m2 = 0.
+
+    def push(self, value, evicted=None):
+        #=======================================================================
+        # :param value: (float) Value entering the window
+        # :param evicted: (float) Value leaving it - None while it fills up
+        #=======================================================================
+        value = float(value)
+        if evicted is None:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            # Same count - the new value replaces the evicted one
+            evicted = float(evicted)
+            mean = self.mean + (value - evicted) / self.count
+            self.m2 += (value - evicted) * (value - mean + evicted - self.mean)
+            self.mean = mean
+            if self.m2 < 0.:
+                # Rounding - the variance of a (near) constant window
+                self.m2 = 0.
+        self.sum += value - (evicted or 0.)
+
+    def variance(self):
+        #=======================================================================
+        # :returns: Double - The sample variance (as statistics.variance)
+        #=======================================================================
+        if self.count < 2:
+            raise ValueError("variance requires at least two data points")
+        return self.m2 / (self.count - 1)
+
+    def stdev(self):
+        #=======================================================================
+        # :returns: Double - The sample standard deviation (as statistics.stdev)
+        #=======================================================================
+        return math.sqrt(self.variance())
+
+
+class RollingMax(object):
+    #===========================================================================
+    # Maximum of the last `window` values
+    #
+    # :param window: (int) Number of values in the window
+    #===========================================================================
+
+    def __init__(self, window):
+        self.window = window
+        # Number of values pushed so far
+        self.seq = 0
+        # (seq, value) of the values which can still become the extremum -
+        # values decreasing (for the max) from the front
+        self.candidates = deque()
+
+    def better(self, value, other):
+        return value >= other
+
+    def push(self, value):
+        value = float(value)
+        candidates = self.candidates
+        while candidates and self.better(value, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((self.seq, value))
+        self.seq += 1
+        # Out of the window
+        if candidates[0][0] <= self.seq - 1 - self.window:
+            candidates.popleft()
+
+    def value(self):
+        return self.candidates[0][1]
+
+
+class RollingMin(RollingMax):
+    #===========================================================================
+    # Minimum of the last `window` values
+    #===========================================================================
+
+    def better(self, value, other):
+        return value <= other
@@ -0,0 +1,191 @@
+#===============================================================================
+# Market selection - which of the exchange markets the trader monitors
+#
+# A market is monitored when it has a Bitcoin market and:
+#     1 - Its trading volume is above the global threshold (min_volume)
+#     2 - Or everything is monitored (show_all)
+#     3 - Or its trading volume is above its currency threshold (min_volume)
+#     4 - Unless monitoring is forced on or off for its currency (monitor)
+# Already monitored markets keep being monitored down to a fraction of the
+# thresholds, so they do not drop off due to micro volume oscillations.
+#
+# The currency configs are resolved once into a rule per currency, so
+# selecting a market is a couple of dict lookups whatever the number of
+# markets and configured currencies.
+#
+# Every tick, the get_balances response is parsed once into a `SummaryTable`
+# (a NumPy structured array, one row per currency). The selection and the
+# change detection of all the markets are then evaluated at once as array
+# masks, and the MarketData of the monitored markets read their row of it.
+#===============================================================================
+
+import operator
+from itertools import chain
+
+import numpy
+
+# Fraction of the volume thresholds above which monitored markets stay monitored
+MONITOR_VOLUME_LOW_BOUND = .9
+
+# Columns of the summary table - "BitcoinMarket" then "Balance" fields of a
+# get_balances entry. "TimeStamp" is left out, as it changes on every call.
+MARKET_FIELDS = ("BaseVolume", "Volume", "Bid", "Ask", "Last", "High", "Low", "PrevDay",
+                 "OpenBuyOrders", "OpenSellOrders")
+BALANCE_FIELDS = ("Balance", "Available", "Pending")
+# All floats, so that the table is a view of one flat array
+SUMMARY_DTYPE = numpy.dtype([(field, 'f8') for field in MARKET_FIELDS + BALANCE_FIELDS])
+_marketValues = operator.itemgetter(*MARKET_FIELDS)
+_balanceValues = operator.itemgetter(*BALANCE_FIELDS)
+# Stand-ins for a missing Bitcoin market or balance - all NaN
+_NO_MARKET = dict.fromkeys(MARKET_FIELDS, float('nan'))
+_NO_BALANCE = dict.fromkeys(BALANCE_FIELDS, float('nan'))
+
+
+def _values(data, fields, getter):
+    # The values of `fields` in `data` - None where missing
+    try:
+        return getter(data)
+    except KeyError:
+        return tuple(data.get(field) for field in fields)
+
+
+def hasBitcoinMarket(marketSummaryData):
+    #===========================================================================
+    # :returns: Boolean - Whether the summary has a Bitcoin market with a volume
+    #===========================================================================
+    bitcoinMarket = marketSummaryData.get("BitcoinMarket")
+    return bool(bitcoinMarket) and bitcoinMarket.get("BaseVolume") is not None
+
+
+class SummaryTable(object):
+    #===========================================================================
+    # A get_balances response as a structured array - missing values are NaN
+    #
+    # :param exchangeResponse: (list) The "result" of get_balances
+    #===========================================================================
+
+    def __init__(self, exchangeResponse):
+        bitcoinMarkets = [marketSummaryData.get("BitcoinMarket") or _NO_MARKET
+                          for marketSummaryData in exchangeResponse]
+        balances = [marketSummaryData.get("Balance") or _NO_BALANCE for marketSummaryData in exchangeResponse]
+        try:
+            values = list(chain.from_iterable(map(operator.add, map(_marketValues, bitcoinMarkets),
+                                                  map(_balanceValues, balances))))
+        except KeyError:
+            # Some fields missing - looked up one at a time
+            values = list(chain.from_iterable(_values(bitcoinMarket, MARKET_FIELDS, _marketValues) +
+                                              _values(balance, BALANCE_FIELDS, _balanceValues)
+                                              for bitcoinMarket, balance in zip(bitcoinMarkets, balances)))
+        # One flat array, viewed as the rows - None values are NaN
+        self.rows = numpy.array(values, dtype=float).view(SUMMARY_DTYPE)
+        currencies = [marketSummaryData["Currency"]["Currency"] for marketSummaryData in exchangeResponse]
+        self.currencies = numpy.array(currencies, dtype=object)
+        self.marketNames = numpy.array([bitcoinMarket.get("MarketName") for bitcoinMarket in bitcoinMarkets],
+                                       dtype=object)
+        self.hasMarket = ~numpy.isnan(self.rows["BaseVolume"])
+        self.index = {currency: row for row, currency in enumerate(currencies)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def mask(self, currencies):
+        #=======================================================================
+        # :returns: numpy.ndarray - Per row, whether its currency is in `currencies`
+        #=======================================================================
+        mask = numpy.zeros(len(self.rows), dtype=bool)
+        mask[[self.index[name] for name in currencies if name in self.index]] = True
+        return mask
+
+    def align(self, previous):
+        #=======================================================================
+        # :param previous: (SummaryTable) An earlier table, or None
+        # :returns: numpy.ndarray - Per row, the row of the same currency in
+        #           `previous` - -1 if it is not there
+        #=======================================================================
+        if previous is None or len(previous) == 0:
+            return numpy.full(len(self.rows), -1, dtype=numpy.intp)
+        if len(previous) == len(self) and (previous.currencies == self.currencies).all():
+            return numpy.arange(len(self.rows), dtype=numpy.intp)
+        return numpy.fromiter((previous.index.get(name, -1) for name in self.currencies),
+                              dtype=numpy.intp, count=len(self.rows))
+
+    def changed(self, previous, aligned):
+        #=======================================================================
+        # :param aligned: (numpy.ndarray) `self.align(previous)`
+        # :returns: numpy.ndarray - Per row, whether its market or balance data
+        #           differs from `previous` (new currencies included)
+        #=======================================================================
+        changed = aligned < 0
+        if changed.all():
+            return changed
+        before = previous.rows[numpy.maximum(aligned, 0)]
+        for field in MARKET_FIELDS + BALANCE_FIELDS:
+            now, then = self.rows[field], before[field]
+            changed |= (now != then) & ~(numpy.isnan(now) & numpy.isnan(then))
+        return changed
+
+
+class MonitorRules(object):
+    #===========================================================================
+    # The monitoring rules of an app config
+    #
+    # :param config: (dict) App config - min_volume, show_all and currencies
+    #===========================================================================
+
+    def __init__(self, config):
+        self.volThreshold = config["min_volume"]
+        self.showAll = bool(config.get("show_all"))
+        # Per currency with a config: (volume threshold, forced) - the threshold
+        # being the lowest of 1 and 3, forced True, False or None (not forced)
+        self.currencies = {}
+        for name, ccyConfig in (config.get("currencies") or {}).items():
+            ccyConfig = ccyConfig or {}
+            volThreshold = self.volThreshold
+            if "min_volume" in ccyConfig:
+                volThreshold = min(volThreshold, ccyConfig["min_volume"])
+            forced = None
+            if "monitor" in ccyConfig:
+                if ccyConfig["monitor"] == True:
+                    forced = True
+                elif ccyConfig["monitor"] == False:
+                    forced = False
+            self.currencies[name] = (volThreshold, forced)
+        self.default = (self.volThreshold, None)
+
+    def isMonitored(self, marketSummaryData, wasMonitored):
+        #=======================================================================
+        # :param marketSummaryData: (dict) A get_balances entry
+        # :param wasMonitored: (bool) Whether the market is already monitored
+        # :returns: Boolean - Whether to monitor the market
+        #=======================================================================
+        if not hasBitcoinMarket(marketSummaryData):
+            return False
+        volThreshold, forced = self.currencies.get(marketSummaryData["Currency"]["Currency"], self.default)
+        if forced is not None:
+            return forced
+        if wasMonitored:
+            volThreshold *= MONITOR_VOLUME_LOW_BOUND
+        return self.showAll or marketSummaryData["BitcoinMarket"]["BaseVolume"] >= volThreshold
+
+    def select(self, table, wasMonitored):
+        #=======================================================================
+        # `isMonitored` for all the rows of a summary table at once
+        #
+        # :param table: (SummaryTable) The get_balances response
+        # :param wasMonitored: (numpy.ndarray) Per row, whether the market is
+        #                      already monitored
+        # :returns: numpy.ndarray - Per row, whether to monitor the market
+        #=======================================================================
+        volThresholds = numpy.full(len(table), self.volThreshold, dtype=float)
+        forcedOn = numpy.zeros(len(table), dtype=bool)
+        forcedOff = numpy.zeros(len(table), dtype=bool)
+        for name, (volThreshold, forced) in self.currencies.items():
+            row = table.index.get(name)
+            if row is not None:
+                volThresholds[row] = volThreshold
+                forcedOn[row] = forced is True
+                forcedOff[row] = forced is False
+        volThresholds[wasMonitored] *= MONITOR_VOLUME_LOW_BOUND
+        rows = table.rows
+        monitored = (rows["BaseVolume"] >= volThresholds) if not self.showAll else numpy.ones(len(table), dtype=bool)
+        return table.hasMarket & ~forcedOff & (monitored | forcedOn)
@@ -0,0 +1,85 @@
+#===============================================================================
+# Single-flight request coalescing
+#
+# While a call for a given key is in flight, any identical call (same key)
+# waits for it and shares its result, instead of making its own request.
+# Once the call returns, the next call for that key goes out again - this is
+# deduplication of concurrent calls, not caching.
+#
+# `SingleFlight` is for threads, `AsyncSingleFlight` for coroutines running in
+# a single event loop.
+#===============================================================================
+
+import asyncio
+import threading
+
+
+class _Call(object):
+    # An in-flight call, and its outcome once done
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, fn, *args):
+        #=======================================================================
+        # Calls `fn(*args)`, unless a call for `key` is already in flight, in
+        # which case its result is returned (or its exception re-raised)
+        #
+        # :returns: The result of `fn(*args)`
+        #=======================================================================
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight(object):
+
+    def __init__(self):
+        self.calls = {}
+        self.shared = 0
+
+    async def do(self, key, fn, *args):
+        #=======================================================================
+        # Same as `SingleFlight.do`, for coroutine functions
+        #=======================================================================
+        future = self.calls.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            future = asyncio.ensure_future(fn(*args))
+            self.calls[key] = future
+            future.add_done_callback(lambda f: self.calls.pop(key, None))
+        # Shielded - A cancelled caller must not cancel the call shared with the others
+        return await asyncio.shield(future)
@@ -5,7 +5,6 @@ import logging
 log = logging.getLogger(__name__)
 
 
-from kivy.app import App
 
 from .action import *
 from .notification import *
@@ -20,14 +19,27 @@ class Strategy(object):
     
 
     def __init__(self, market, btcBalance, appConfig, tradeAPI, tradelock):
+        #=======================================================================
+        # One instance per (strategy, market), kept by the trader for as long as
+        # the market is monitored - instance attributes persist between ticks.
+        # `btcBalance` is refreshed by the trader before every execution.
+        #=======================================================================
         self.market     = market
         self.btcBalance = btcBalance
         self.tradeAPI   = tradeAPI
         self.tradelock  = tradelock
         self.action = False
-        self.config = getStrategyConfigOverrides(appConfig)
+        self.config = self.getStrategyConfigOverrides(appConfig)
         
 
+    def printLogHeader(self):
+        #==============================================================
+        # Logs the header of the strategy's per-market debug dump - called
+        # once per run, on the class
+        #==============================================================
+        return None
+
+
 
     # :FIX ME: Execute strategy with available balance, to check if enough money is available
     # A balance class could act as semaphore to ensure thread safety - Pause trade execution until
@@ -65,8 +77,11 @@ class Strategy(object):
     def refresh(self):
         # if self.reset > 0:
         #     self.reset = self.reset - 1
+        # The action of an earlier tick is dropped once done - or if it was
+        # never to be done (notify-only, `do_actions` off), so the strategy
+        # runs again, as with a new instance per tick
         if self.action:
-            if self.action.done:
+            if self.action.done or not self.config.get("do_actions", False):
                 self.action = False
                 self.notified = False
                 self.note = False
@@ -79,7 +94,7 @@ class Strategy(object):
         return self.stratName
 
 
-    def getStrategyConfigOverrides(masterConfig):
+    def getStrategyConfigOverrides(self, masterConfig):
         #===========================================================================================
         # :returns: (dict) - A configuration dictionary where the global settings have been
         #                    overridden for a specific strategy
@@ -0,0 +1,500 @@
+#===============================================================================
+# Local Bittrex-compatible stub server, for load testing
+#
+# Serves the v1.1 and v2.0 paths used by the trader from synthetic markets, so
+# the trader can be run against thousands of markets, slow responses, errors
+# and rate limit rejections without touching the real exchange.
+#
+#     v1.1 /account/getbalances           v2.0 /key/balance/getbalances
+#     v1.1 /market/getopenorders          v2.0 /key/market/getopenorders
+#     v1.1 /market/buylimit               v2.0 /key/market/tradebuy
+#     v1.1 /market/selllimit              v2.0 /key/market/tradesell
+#     v1.1 /market/cancel                 v2.0 /key/market/tradecancel
+#     v1.1 /public/getmarkets             v2.0 /pub/Markets/GetMarkets
+#                                         v2.0 /pub/market/GetTicks
+#                                         v2.0 /pub/market/GetLatestTick
+#
+# Prices are a deterministic function of (market, time), so every market moves
+# without the server having to keep any price state, and candles can be
+# generated for any tick interval on request. Orders are accepted and stay
+# open until cancelled - they are never filled.
+#
+# Usage:
+#     python -m gltrader.stubserver --markets 2000 --latency 0.05 --error-rate 0.01 --rate-limit 50
+# then point the trader at it, in the config:
+#     api :
+#         base_url : http://127.0.0.1:8080/api
+#===============================================================================
+
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import logging
+log = logging.getLogger(__name__)
+
+
+# Length of a candle, in seconds, per Bittrex tick interval
+TICK_INTERVALS = {
+    'oneMin'    : 60,
+    'fiveMin'   : 300,
+    'thirtyMin' : 1800,
+    'hour'      : 3600,
+    'Day'       : 86400
+}
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def noise(seed, n):
+    #===========================================================================
+    # :returns: Float in [0, 1) - Deterministic pseudo-random value for (seed, n)
+    #===========================================================================
+    x = (seed * 0x9E3779B1 + n * 0x85EBCA77) & 0xFFFFFFFF
+    x ^= x >> 15
+    x = (x * 0x2C1B3C6D) & 0xFFFFFFFF
+    x ^= x >> 12
+    return x / 4294967296.
+
+
+def timestamp(t):
+    return datetime.fromtimestamp(t, timezone.utc).strftime(TIME_FORMAT)
+
+
+class SyntheticMarket(object):
+    #===========================================================================
+    # A BTC market whose price is a slow daily swing plus per-minute noise
+    #
+    # :param currency: (str) Market currency, e.g. 'LTC' for BTC-LTC
+    # :param seed: (int) Seed of the market's price, volume and noise
+    #===========================================================================
+
+    def __init__(self, currency, seed):
+        rnd = random.Random(seed)
+        self.currency = currency
+        self.name = 'BTC-' + currency
+        self.seed = seed
+        self.basePrice = 10 ** rnd.uniform(-7, -2)
+        self.swing = rnd.uniform(0.01, 0.10)
+        self.volatility = rnd.uniform(0.002, 0.02)
+        self.period = rnd.uniform(0.5, 3.) * 86400
+        self.phase = rnd.uniform(0., 2. * math.pi)
+        # Daily volume, in BTC - log-uniform, so few markets trade a lot
+        self.baseVolume = 10 ** rnd.uniform(-1, 3.5)
+        self.created = timestamp(rnd.uniform(1.39e9, 1.5e9))
+
+    def price(self, t):
+        #=======================================================================
+        # :returns: Float - The last price at time `t` (seconds since epoch)
+        #=======================================================================
+        minute = int(t // 60)
+        return self.basePrice * (1. + self.swing * math.sin(2. * math.pi * t / self.period + self.phase)
+                                    + self.volatility * (noise(self.seed, minute) - .5))
+
+    def candle(self, interval, index, now):
+        #=======================================================================
+        # :param interval: (int) Candle length, in seconds
+        # :param index: (int) Candle number, i.e. its start time / `interval`
+        # :returns: Dict - The candle, in the GetTicks format (still forming if
+        #           `now` falls inside it)
+        #=======================================================================
+        start = index * interval
+        end = min(start + interval, now)
+        samples = [self.price(start + (end - start) * i / 4.) for i in range(5)]
+        # Fraction of the volume traded so far
+        elapsed = (end - start) / float(interval)
+        baseVolume = self.baseVolume * interval / 86400. * elapsed * (.5 + noise(self.seed + 1, index))
+        close = samples[-1]
+        return {'O': samples[0], 'H': max(samples), 'L': min(samples), 'C': close,
+                'V': baseVolume / close, 'T': timestamp(start), 'BV': baseVolume}
+
+    def candles(self, interval, count, now):
+        #=======================================================================
+        # :returns: List - The last `count` candles, oldest first, the last one
+        #           still forming
+        #=======================================================================
+        last = int(now // interval)
+        return [self.candle(interval, index, now) for index in range(last - count + 1, last + 1)]
+
+    def summary(self, now):
+        #=======================================================================
+        # :returns: Dict - The market summary ("BitcoinMarket" of GetBalances)
+        #=======================================================================
+        day = [self.price(now - 86400 + 3600 * h) for h in range(25)]
+        last = self.price(now)
+        spread = last * .001
+        baseVolume = self.baseVolume * (.5 + noise(self.seed + 2, int(now // 3600)))
+        return {'MarketName'     : self.name,
+                'High'           : max(day),
+                'Low'            : min(day),
+                'Volume'         : baseVolume / last,
+                'Last'           : last,
+                'BaseVolume'     : baseVolume,
+                'TimeStamp'      : timestamp(now),
+                'Bid'            : last - spread,
+                'Ask'            : last + spread,
+                'OpenBuyOrders'  : int(100 * noise(self.seed + 3, 0)) + 1,
+                'OpenSellOrders' : int(100 * noise(self.seed + 4, 0)) + 1,
+                'PrevDay'        : day[0],
+                'Created'        : self.created}
+
+
+def marketCurrencies(nrMarkets):
+    #===========================================================================
+    # :returns: List - `nrMarkets` distinct currency codes: AAA, AAB, ...
+    #===========================================================================
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    currencies = []
+    for i in range(nrMarkets):
+        code = ''
+        for n in range(3 + int(i >= 26 ** 3)):
+            code = letters[i % 26] + code
+            i //= 26
+        currencies.append(code)
+    return currencies
+
+
+class StubExchange(object):
+    #===========================================================================
+    # State and request handling of the stub - independent of HTTP
+    #
+    # :param nrMarkets: (int) Number of synthetic BTC markets
+    # :param latency: (float) Mean extra response time, in seconds
+    # :param jitter: (float) Response time spread, +/- seconds around `latency`
+    # :param errorRate: (float) Probability that a request fails (HTTP 503)
+    # :param rateLimit: (float) Calls per second accepted before rejecting with
+    #                   HTTP 429 - None for no limit
+    # :param burst: (int) Calls accepted back-to-back within the rate limit
+    # :param history: (int) Number of candles returned by GetTicks
+    # :param seed: (int) Seed of the markets and of the injected errors
+    #===========================================================================
+
+    def __init__(self, nrMarkets=1000, latency=0., jitter=0., errorRate=0., rateLimit=None, burst=10,
+                 history=240, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.rateLimit = rateLimit
+        self.burst = burst
+        self.history = history
+        self.random = random.Random(seed)
+        self.markets = {}
+        for i, currency in enumerate(marketCurrencies(nrMarkets)):
+            market = SyntheticMarket(currency, seed * 1000003 + i)
+            self.markets[market.name] = market
+        self.balances = {'BTC': 1.}
+        self.orders = {}
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.lastRefill = time.monotonic()
+        self.stats = {'requests': 0, 'errors': 0, 'rejected': 0, 'unknown': 0}
+
+        self.routes = {
+            '/v1.1/account/getbalances'   : self.getBalancesV1,
+            '/v2.0/key/balance/getbalances' : self.getBalances,
+            '/v1.1/market/getopenorders'  : self.getOpenOrders,
+            '/v2.0/key/market/getopenorders' : self.getOpenOrders,
+            '/v1.1/market/buylimit'       : self.buyLimit,
+            '/v1.1/market/selllimit'      : self.sellLimit,
+            '/v2.0/key/market/tradebuy'   : self.tradeBuy,
+            '/v2.0/key/market/tradesell'  : self.tradeSell,
+            '/v1.1/market/cancel'         : self.cancel,
+            '/v2.0/key/market/tradecancel' : self.cancel,
+            '/v1.1/public/getmarkets'     : self.getMarkets,
+            '/v2.0/pub/Markets/GetMarkets' : self.getMarkets,
+            '/v2.0/pub/market/GetTicks'   : self.getTicks,
+            '/v2.0/pub/market/GetLatestTick' : self.getLatestTick,
+        }
+
+
+    def handle(self, path, params):
+        #=======================================================================
+        # :param path: (str) Request path, below /api - e.g. /v2.0/pub/market/GetTicks
+        # :param params: (dict) Query parameters
+        # :returns: Tuple (int, dict) - HTTP status and JSON response
+        #=======================================================================
+        with self.lock:
+            self.stats['requests'] += 1
+            if not self._admit():
+                self.stats['rejected'] += 1
+                return 429, self._failure('RATE_LIMIT_EXCEEDED')
+            if self.errorRate and self.random.random() < self.errorRate:
+                self.stats['errors'] += 1
+                return 503, self._failure('SERVICE_UNAVAILABLE')
+            delay = max(0., self.latency + self.jitter * (2. * self.random.random() - 1.))
+
+        if delay:
+            time.sleep(delay)
+
+        route = self.routes.get(path)
+        if route is None:
+            with self.lock:
+                self.stats['unknown'] += 1
+            return 404, self._failure('APIKEY_INVALID' if '/key/' in path else 'INVALID_METHOD')
+        try:
+            result = route(params, time.time())
+        except (KeyError, ValueError) as e:
+            return 200, self._failure(str(e))
+        if isinstance(result, str):
+            return 200, self._failure(result)
+        return 200, {'success': True, 'message': '', 'result': result}
+
+
+    def getStats(self):
+        with self.lock:
+            return dict(self.stats)
+
+
+    def _admit(self):
+        # Token bucket without debt - a call either fits or is rejected (lock held)
+        if not self.rateLimit:
+            return True
+        now = time.monotonic()
+        self.tokens = min(float(self.burst), self.tokens + (now - self.lastRefill) * self.rateLimit)
+        self.lastRefill = now
+        if self.tokens < 1.:
+            return False
+        self.tokens -= 1.
+        return True
+
+
+    def _failure(self, message):
+        return {'success': False, 'message': message, 'result': None}
+
+
+    def _market(self, params):
+        # :returns: The market named in the query, or raises KeyError('INVALID_MARKET')
+        name = params.get('marketName', params.get('marketname', params.get('market')))
+        if name not in self.markets:
+            raise KeyError('INVALID_MARKET')
+        return self.markets[name]
+
+
+    def _interval(self, params):
+        interval = TICK_INTERVALS.get(params.get('tickInterval'))
+        if interval is None:
+            raise ValueError('INVALID_TICK_INTERVAL')
+        return interval
+
+
+    #===========================================================================
+    # Endpoints - :returns: The "result" of the response, or a failure message
+    #===========================================================================
+
+    def getBalances(self, params, now):
+        balances = [{'Currency'      : {'Currency': 'BTC', 'CurrencyLong': 'Bitcoin'},
+                     'Balance'       : self._balance('BTC'),
+                     'BitcoinMarket' : None}]
+        for market in self.markets.values():
+            balances.append({'Currency'      : {'Currency': market.currency, 'CurrencyLong': market.currency},
+                             'Balance'       : self._balance(market.currency),
+                             'BitcoinMarket' : market.summary(now)})
+        return balances
+
+
+    def getBalancesV1(self, params, now):
+        return [self._balance(currency) for currency in self.balances]
+
+
+    def _balance(self, currency):
+        with self.lock:
+            balance = self.balances.get(currency, 0.)
+            reserved = sum(order['QuantityRemaining'] if order['OrderType'] == 'LIMIT_SELL'
+                           else order['QuantityRemaining'] * order['Limit']
+                           for order in self.orders.values()
+                           if (order['OrderType'] == 'LIMIT_SELL' and order['Exchange'] == 'BTC-' + currency) or
+                              (order['OrderType'] == 'LIMIT_BUY' and currency == 'BTC'))
+        return {'Currency': currency, 'Balance': balance, 'Available': balance - reserved,
+                'Pending': 0., 'CryptoAddress': None}
+
+
+    def getOpenOrders(self, params, now):
+        name = params.get('marketname', params.get('market'))
+        with self.lock:
+            return [order for order in self.orders.values() if not name or order['Exchange'] == name]
+
+
+    def getMarkets(self, params, now):
+        return [{'MarketCurrency'     : market.currency,
+                 'BaseCurrency'       : 'BTC',
+                 'MarketCurrencyLong' : market.currency,
+                 'BaseCurrencyLong'   : 'Bitcoin',
+                 'MinTradeSize'       : 1e-08,
+                 'MarketName'         : market.name,
+                 'IsActive'           : True,
+                 'Created'            : market.created,
+                 'Notice'             : None,
+                 'IsSponsored'        : None,
+                 'LogoUrl'            : None} for market in self.markets.values()]
+
+
+    def getTicks(self, params, now):
+        return self._market(params).candles(self._interval(params), self.history, now)
+
+
+    def getLatestTick(self, params, now):
+        return self._market(params).candles(self._interval(params), 1, now)
+
+
+    def tradeBuy(self, params, now):
+        return self._trade(params, now, 'Buy')
+
+
+    def tradeSell(self, params, now):
+        return self._trade(params, now, 'Sell')
+
+
+    def buyLimit(self, params, now):
+        return self._limitOrder(params, now, 'Buy')
+
+
+    def sellLimit(self, params, now):
+        return self._limitOrder(params, now, 'Sell')
+
+
+    def _limitOrder(self, params, now, side):
+        # v1.1 response - the order uuid, or the error of the trade
+        order = self._trade(params, now, side)
+        if isinstance(order, str):
+            return order
+        return {'uuid': order['OrderId']}
+
+
+    def _trade(self, params, now, side):
+        market = self._market(params)
+        quantity = float(params['quantity'])
+        # Market orders come without a rate (or as 'None') - at the market price
+        rate = params.get('rate')
+        rate = market.price(now) if rate in (None, '', 'None') else float(rate)
+        if quantity <= 0. or rate <= 0.:
+            return 'INVALID_QUANTITY_OR_RATE'
+        orderId = str(uuid.uuid4())
+        with self.lock:
+            self.orders[orderId] = {'Uuid'              : None,
+                                    'OrderUuid'         : orderId,
+                                    'Exchange'          : market.name,
+                                    'OrderType'         : 'LIMIT_BUY' if side == 'Buy' else 'LIMIT_SELL',
+                                    'Quantity'          : quantity,
+                                    'QuantityRemaining' : quantity,
+                                    'Limit'             : rate,
+                                    'CommissionPaid'    : 0.,
+                                    'Price'             : 0.,
+                                    'PricePerUnit'      : None,
+                                    'Opened'            : timestamp(now),
+                                    'Closed'            : None,
+                                    'CancelInitiated'   : False,
+                                    'ImmediateOrCancel' : False,
+                                    'IsConditional'     : False,
+                                    'Condition'         : None,
+                                    'ConditionTarget'   : None}
+        return {'OrderId'        : orderId,
+                'MarketName'     : market.name,
+                'MarketCurrency' : market.currency,
+                'BuyOrSell'      : side,
+                'OrderType'      : params.get('ordertype', 'LIMIT'),
+                'Quantity'       : quantity,
+                'Rate'           : rate}
+
+
+    def cancel(self, params, now):
+        with self.lock:
+            if self.orders.pop(params.get('uuid', params.get('orderid')), None) is None:
+                return 'ORDER_NOT_OPEN'
+        return None
+
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the connection is kept alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes - avoid the Nagle/delayed-ACK stall
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path[len('/api'):] if parts.path.startswith('/api/') else parts.path
+        status, response = self.server.exchange.handle(path, dict(parse_qsl(parts.query)))
+        body = json.dumps(response, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(object):
+    #===========================================================================
+    # Runs a StubExchange behind a local HTTP server, in a background thread
+    #
+    #     server = StubServer(StubExchange(nrMarkets=2000, latency=.05)).start()
+    #     api = BittrexAPI(key, secret, base_url=server.base_url)
+    #     ...
+    #     server.stop()
+    #
+    # :param exchange: (StubExchange) Request handling and market state
+    # :param host: (str) Interface to listen on
+    # :param port: (int) Port to listen on - 0 for any free port
+    #===========================================================================
+
+    def __init__(self, exchange, host='127.0.0.1', port=0):
+        self.exchange = exchange
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.exchange = exchange
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}/api'.format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Bittrex-compatible stub server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--markets', type=int, default=1000, help="Number of synthetic BTC markets")
+    parser.add_argument('--latency', type=float, default=0., help="Mean extra response time (s)")
+    parser.add_argument('--jitter', type=float, default=0., help="Response time spread, +/- (s)")
+    parser.add_argument('--error-rate', type=float, default=0., help="Fraction of requests failing with 503")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Calls/s accepted before 429 rejections")
+    parser.add_argument('--burst', type=int, default=10, help="Calls accepted back-to-back")
+    parser.add_argument('--history', type=int, default=240, help="Number of candles returned by GetTicks")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    exchange = StubExchange(nrMarkets=args.markets, latency=args.latency, jitter=args.jitter,
+                            errorRate=args.error_rate, rateLimit=args.rate_limit, burst=args.burst,
+                            history=args.history, seed=args.seed)
+    server = StubServer(exchange, args.host, args.port)
+    print("Stub exchange with {} markets at {}".format(args.markets, server.base_url))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print("Requests served: " + str(exchange.getStats()))
+
+
+if __name__ == '__main__':
+    main()
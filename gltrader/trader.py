@@ -5,23 +5,33 @@ import logging
 log = logging.getLogger(__name__)
 
 import yaml
-from .bittrex import Bittrex
+from .bittrex import Bittrex, SessionDispatcher
+from .bittrex_async import ExecutorDispatcher
+from .replay import RecordingDispatcher, ReplayDispatcher
+from .feed import PollingFeed, SocketFeed, ReplayFeed, SUMMARIES, CANDLES
 from .BittrexAPI import BittrexAPI
+from .ratelimit import TokenBucket, PriorityScheduler, Unthrottled, getSharedScheduler
+from .AsyncBittrexAPI import AsyncBittrexAPI
 from .market import Market
+from .selection import SummaryTable, MonitorRules
+from .resample import INTERVAL_MINUTES, intervalName, checkTimeframes, historyLength
+from .decoding import BACKEND
+from .engine import TickSnapshot
 from .notification import *
 from .fakeapi import FakeAPI
 import threading
+import queue
+import asyncio
+import numpy
 import traceback
 import importlib.util
 
 from pprint import pprint as pp
 import json
 import builtins
-from test.support import requires
-from _ast import Or, If
 
 import time
-from pip.utils.outdated import SELFCHECK_DATE_FMT
+import datetime
 
 # from idlelib.searchengine import get
 # from win32file import FileRenameInfo
@@ -37,13 +47,15 @@ class Trader(object):
     data = None
     # Dict of each market object keyed by abbr of crypto used by bittrex
     markets = {}
-    # List of notifications that should be displayed
-    notifications = {}
     # Config is false until trader instantiated with config
     config = False
     current_trade = False
     trades_per_tick = 0
     ticknumber = 0
+    # asyncio API used for the candles, if enabled in the config
+    asyncQueryAPI = None
+    # Source of the market updates
+    feed = None
     
     def __init__(self, config=None):
         #=======================================================================
@@ -51,14 +63,67 @@ class Trader(object):
         #=======================================================================
         self.calls = 0
         self.tradelock = threading.Lock()
+        # Serializes the feed updates
+        self.feedLock = threading.Lock()
+        # Notifications shown by the UI, keyed by their snapshot key - only the
+        # engine thread touches them, the other threads queue their requests
+        self.notifications = {}
+        self.notificationRequests = queue.Queue()
         self.strategies = []
+        # Long-lived strategy instances, keyed by (strategy class, market name) - they
+        # live as long as their market is monitored, and keep their state between ticks
+        self.strategyInstances = {}
 
         #Set the configuration
         self.config = config
         if self.config is not None:
             # Initialize querying API - Used for non-trading queries
+            apiConfig = self.config.get("api", None) or {}
+            # Transport - None for the default live one, else recording or replaying
+            dispatch = self.getDispatcher(apiConfig)
+            # Rate limit, shared by all the API objects
+            self.limiter = self.getLimiter(apiConfig)
+            # A replay has no exchange to retry
+            retries = 0 if apiConfig.get("replay", None) else apiConfig.get("retries", 2)
             self.queryAPI = BittrexAPI(self.config["exchange"]["bittrex"]["key"],
-                                       self.config["exchange"]["bittrex"]["secret"])
+                                       self.config["exchange"]["bittrex"]["secret"],
+                                       pool_connections=apiConfig.get("pool_connections", 2),
+                                       pool_maxsize=apiConfig.get("pool_maxsize", 32),
+                                       cache_ttls=apiConfig.get("cache_ttls", None),
+                                       cache_size=apiConfig.get("cache_size", 128),
+                                       base_url=apiConfig.get("base_url", None),
+                                       retries=retries,
+                                       retry_backoff=apiConfig.get("retry_backoff", .5),
+                                       retry_max_backoff=apiConfig.get("retry_max_backoff", 8.),
+                                       breaker_threshold=apiConfig.get("breaker_threshold", 5),
+                                       breaker_reset=apiConfig.get("breaker_reset", 60.),
+                                       candles_tail=self.candlesTail(apiConfig),
+                                       trace_decoding=apiConfig.get("trace_decoding", False),
+                                       dispatch=dispatch,
+                                       limiter=self.limiter)
+            # Candles can be queried from a single event loop instead of one thread per market
+            self.asyncQueryAPI = None
+            if apiConfig.get("async_candles", False):
+                self.asyncQueryAPI = AsyncBittrexAPI(self.config["exchange"]["bittrex"]["key"],
+                                                     self.config["exchange"]["bittrex"]["secret"],
+                                                     pool_maxsize=apiConfig.get("pool_maxsize", 32),
+                                                     cache_ttls=apiConfig.get("cache_ttls", None),
+                                                     cache_size=apiConfig.get("cache_size", 128),
+                                                     base_url=apiConfig.get("base_url", None),
+                                                     retries=retries,
+                                                     retry_backoff=apiConfig.get("retry_backoff", .5),
+                                                     retry_max_backoff=apiConfig.get("retry_max_backoff", 8.),
+                                                     breaker_threshold=apiConfig.get("breaker_threshold", 5),
+                                                     breaker_reset=apiConfig.get("breaker_reset", 60.),
+                                                     metrics=self.queryAPI.metrics,
+                                                     candles_tail=self.candlesTail(apiConfig),
+                                                     trace_decoding=apiConfig.get("trace_decoding", False),
+                                                     dispatch=ExecutorDispatcher(dispatch) if dispatch else None,
+                                                     limiter=self.limiter)
+                self.loop = asyncio.new_event_loop()
+            # Market updates - polled at each tick, or pushed
+            self.feed = self.getFeed(self.config.get("feed", None) or {})
+            self.feed.subscribe(self.onFeedUpdate)
             # Load all strategies
             self.getStrategies()
 
@@ -70,6 +135,14 @@ class Trader(object):
         self.bitcoinBalance = 0
 
         self.markets = {}
+        # Change detection - Summary table of the last update, last time each of its
+        # markets changed, and the monitored markets which changed at the last update
+        # (None: all of them)
+        self.summaryTable = None
+        self.lastChanged = numpy.empty(0)
+        self.changedMarkets = None
+        # Per-currency monitoring rules - resolved from the config on first use
+        self.monitorRules = None
         
 
     def wakeUp(self):
@@ -79,21 +152,58 @@ class Trader(object):
         # All the trader actions are coordinated here.
         #=======================================================================
         log.debug("Trader awake!")
+        # Notifications added, removed and actions requested since the last tick
+        self.drainNotifications()
         
-        # API call 
-        response = self.getData()
-        #If response is successful...
-        if response is not None:
-            # Get list of markets to monitor
-            self.getActiveMarkets(response)
-            # Update - Candles
-            self.updateMarketCandles(self.config["candles_timeframe"], self.config["candles_singletick"])
-            log.debug("Running strategies!")
-            # Run the strategies
-            self.runStrategies()
+        # Polled feed - API calls: balances, then the candles of the monitored markets.
+        # (Pushed feeds update the markets, and run the strategies, on their own)
+        if not self.feed.pushes:
+            #If response is successful...
+            if self.feed.poll():
+                log.debug("Running strategies!")
+                # Run the strategies - on the markets which changed (and whose candles are in),
+                # and on those whose candles came in late since the last tick
+                with self.feedLock:
+                    self.runStrategies(self.tickMarkets(self.feed.pending(), self.feed.takeRolledOver()))
 
         log.info("Total markets monitored: " +str(len(self.markets)))
-        log.info("API calls: " + str(self.queryAPI.getApiCalls()))
+        apiCalls = self.queryAPI.getApiCalls()
+        if self.asyncQueryAPI is not None:
+            apiCalls += self.asyncQueryAPI.getApiCalls()
+        log.info("API calls: " + str(apiCalls) +
+                 " | Cache hits: " + str(self.queryAPI.getCacheHits()) +
+                 " | Cache misses: " + str(self.queryAPI.getCacheMisses()))
+        rateStats = self.queryAPI.getRateLimitStats()
+        log.info("API rate limit - waited: {:d}/{:d} calls".format(rateStats["waited"], rateStats["calls"]) +
+                 " | mean wait: {:.3f}s".format(rateStats["mean_wait"]) +
+                 " | max wait: {:.3f}s".format(rateStats["max_wait"]))
+        for lane, laneStats in sorted(rateStats["lanes"].items()):
+            log.info("API {} lane - calls: {:d} | queued: {:d} (max {:d})".format(lane, laneStats["calls"],
+                                                                               laneStats["depth"],
+                                                                               laneStats["max_depth"]) +
+                     " | mean wait: {:.3f}s | max wait: {:.3f}s".format(laneStats["mean_wait"],
+                                                                      laneStats["max_wait"]))
+        retryStats = self.queryAPI.getRetryStats()
+        openBreakers = [endpoint for endpoint, breaker in retryStats["breakers"].items() if breaker["state"] != "closed"]
+        log.info("API retries: {:d} | failed after retries: {:d}".format(retryStats["retries"],
+                                                                          retryStats["exhausted"]) +
+                 " | circuit open: " + (", ".join(openBreakers) if openBreakers else "none"))
+        for line in self.queryAPI.metrics.dump():
+            log.info("API " + line)
+        decodeStats = self.queryAPI.getDecodeStats()
+        if self.asyncQueryAPI is not None:
+            decodeStats.update(self.asyncQueryAPI.getDecodeStats())
+        if decodeStats:
+            log.info("Candles decoding ({}) - markets: {:d}".format(BACKEND, len(decodeStats)) +
+                     " | mean: {:.2f}ms".format(1000. * sum(stats["seconds"] for stats in decodeStats.values()) /
+                                                len(decodeStats)) +
+                     " | max: {:.2f}ms".format(1000. * max(stats["max_seconds"] for stats in decodeStats.values())) +
+                     " | payload: {:.0f}KB".format(sum(stats["bytes"] for stats in decodeStats.values()) / 1024.))
+            for market, stats in sorted(decodeStats.items()):
+                log.debug("Candles decoding - " + str(market) + " - {:.2f}ms".format(stats["seconds"] * 1000.) +
+                          " | {:d} bytes -> {:d} candles".format(stats["bytes"], stats["candles"]) +
+                          ("" if stats["peak_memory"] is None else
+                           " | peak memory: {:d} bytes".format(stats["peak_memory"])))
     
 
 
@@ -107,99 +217,314 @@ class Trader(object):
         # (that is, the dictionary of all the markets that should be monitored
         # based on the min volume config setting)
         #=======================================================================
-        # Loop through ALL markets in the response
-        for marketSummary in exchangeResponse:
-                
-            # Update the available BTC balance to the trader
-            if marketSummary["Currency"]["Currency"] == "BTC":
-                self.bitcoinBalance = marketSummary["Balance"]["Available"]
+        # Parse the response once - the markets are selected on it, and read their row of it
+        summaryTable = SummaryTable(exchangeResponse)
+        currencies = summaryTable.currencies
+
+        # Change detection - A market whose summary is the same as at the last tick
+        # is not refreshed, unless it was last refreshed a whole (source) candle ago
+        changeDetection = self.config.get("change_detection", True)
+        if changeDetection:
+            maxAge = self.candlesSource()[1] * 60
+            now = time.monotonic()
+            aligned = summaryTable.align(self.summaryTable)
+            lastChanged = numpy.where(aligned < 0, now,
+                                      self.lastChanged[numpy.maximum(aligned, 0)] if len(self.lastChanged) else now)
+            changed = summaryTable.changed(self.summaryTable, aligned) | (now - lastChanged >= maxAge)
+            self.lastChanged = numpy.where(changed, now, lastChanged)
+        self.summaryTable = summaryTable
+
+        # Update the available BTC balance to the trader
+        if "BTC" in summaryTable.index:
+            bitcoinBalance = float(summaryTable.rows["Available"][summaryTable.index["BTC"]])
+            if not numpy.isnan(bitcoinBalance):
+                self.bitcoinBalance = bitcoinBalance
                 log.debug("Bitcoin balance: {:>.8f}".format(self.bitcoinBalance))
-                
 
-            # Check - Is the market already being monitored?
-            wasMonitored = self._wasMonitored(marketSummary)
-            # Check - Monitor the market?
-            getMonitored = self._getMonitored(marketSummary, wasMonitored) 
-                
+        # Check - Is the market already being monitored?
+        wasMonitored = summaryTable.mask(self.markets)
+        # Check - Monitor the market? All the rows at once, see selection.py
+        getMonitored = self._getMonitored(summaryTable, wasMonitored)
+
+        # Loop through the markets which are or were monitored
+        for row in numpy.flatnonzero(wasMonitored | getMonitored):
+            name = currencies[row]
+
             # NEW MARKET TO MONITOR - NOT YET BEING MONITORED  
-            if getMonitored and not wasMonitored:
+            if not wasMonitored[row]:
                 #Instantiate market
-                newMarket = Market(marketSummary, self.config)
+                newMarket = Market(summaryTable, row, self.config)
                 log.debug("New market added: " + newMarket.name)
                 # Add to list of mrakets to monitor
                 self.markets[newMarket.name] = newMarket
+                # And instantiate its strategies
+                self.addStrategies(newMarket)
                 # And notify GUI
                 newMarket.guiNotify("Success", "NOTIFY_NEW_MARKET")
 
             # EXISTING MARKET - UPDATE DATA
-            if wasMonitored and getMonitored:
-                log.debug("Existing market: " + marketSummary["Currency"]["Currency"])
-                marketName = marketSummary["Currency"]["Currency"]
-                self.markets[marketName].updateMarketData(marketSummary)
+            elif getMonitored[row]:
+                log.debug("Existing market: " + name)
+                self.markets[name].updateMarketData(summaryTable, row)
 
             # EXISTING MARKET - REMOVE FROM MONITORING
-            if not getMonitored and wasMonitored:
-                log.debug("Removing market monitoring for market: " + marketSummary["Currency"]["Currency"])
+            else:
+                log.debug("Removing market monitoring for market: " + name)
                 # Remove from list of markets
                 try: 
-                    name = marketSummary["Currency"]["Currency"]
                     self.markets[name].guiNotify("Alert", "NOTIFY_REMOVE_MARKET")
                     del self.markets[name]
+                    self.dropStrategies(name)
                 except:
-                    log.critical("Market (" + marketSummary["Currency"]["Currency"] + ") " +
+                    log.critical("Market (" + name + ") " +
                                  "removal attempt failed")
                     log.critical(self.markets)
 
+        # Monitored markets to refresh
+        if changeDetection:
+            self.changedMarkets = list(currencies[changed & getMonitored])
+            log.info("Markets changed: {:d}/{:d}".format(int(changed.sum()), len(summaryTable)) +
+                     " | Monitored markets changed: {:d}/{:d}".format(len(self.changedMarkets),
+                                                                       len(self.markets)))
+        else:
+            self.changedMarkets = None
+
 
     
-    def runStrategies(self):
+    def tickMarkets(self, pending, rolledOver):
+        #=======================================================================
+        # :param pending: (set) Markets whose candles are still being fetched
+        # :param rolledOver: (set) Markets whose candles came in after their tick
+        # :returns: List - Names of the markets to run the strategies on, or
+        #           None for all the markets
+        #=======================================================================
+        if self.changedMarkets is None and not pending:
+            return None
+        names = self.markets if self.changedMarkets is None else self.changedMarkets
+        marketNames = [name for name in names if self.markets[name].abbr not in pending]
+        selected = set(marketNames)
+        marketNames += [name for name, market in self.markets.items()
+                        if market.abbr in rolledOver and name not in selected]
+        return marketNames
+
+
+    def runStrategies(self, marketNames=None):
         #=======================================================================
         # This function executes all the strategies.
         # 
         # Each market is independently evaluated against each strategy.
+        #
+        # :param marketNames: (List) Markets to evaluate - Default: all markets
         #=======================================================================
         # Loop over all strategies
         for strategy in self.strategies:
             # Log/dump the header
             strategy.printLogHeader(strategy)
             # Loop over all markets
-            for marketName in self.markets:
-                # Instantiate strategy
-                strat = strategy(self.markets[marketName], self.config, self.tradeAPI)
+            for marketName in (self.markets if marketNames is None else marketNames):
+                # Strategy instance of this market
+                strat = self.getStrategy(strategy, self.markets[marketName])
+                strat.btcBalance = self.bitcoinBalance
                 # Execute strategy
                 strat.execute()
-                
-            
-        
-    def updateMarketCandles(self, timeFrame, tickInterval):
+
+
+    def getStrategy(self, strategy, market):
         #=======================================================================
-        # This function will update the candles for all markets
-        # 
-        # :param timeFrame: (Integer)     - What is the time frame for the candles, in hours
-        # :param tickInterval: (Integer)  - Time interval of a single tick, in minutes
-        #=======================================================================
-        if self.markets is not None:
-            #===================================================================
-            # for marketName in self.markets:
-            #     self.markets[marketName].updateCandles(self.queryAPI, timeFrame, tickInterval)
-            #===================================================================
-            threads = []
-            for marketName in self.markets:
-                t = threading.Thread(target=self.markets[marketName].updateCandles,
-                                     args=[self.queryAPI, timeFrame, tickInterval])
-                threads.append(t)
-                try:
-                    t.start()
-                except Exception as error:
-                    # log.critical("Unhandled exception in 'trader.updateMarketCandles()'\n"+
-                    #              "Thread failure, Traceback dump: " + traceback.print_tb(err.__traceback__))
-                    # DUMP thread stack!
-                    log.exception("Unhandled exception in 'trader.updateMarketCandles()'\n" +
-                                  "Error: " + str(error))
-                
-            # Join the threads back up so the code only proceeds once they are all done
-            for t in threads:
-                t.join()
+        # :param strategy: (class) Strategy class
+        # :param market: (Market) Monitored market
+        # :returns: (Strategy) The instance of the strategy for the market -
+        #           created on first use
+        #=======================================================================
+        key = (strategy, market.name)
+        strat = self.strategyInstances.get(key)
+        if strat is None or strat.market is not market:
+            strat = strategy(market, self.bitcoinBalance, self.config, self.tradeAPI, self.tradelock)
+            self.strategyInstances[key] = strat
+        return strat
+
+
+    def addStrategies(self, market):
+        #=======================================================================
+        # Instantiates every strategy for a newly monitored market
+        #=======================================================================
+        for strategy in self.strategies:
+            self.getStrategy(strategy, market)
+
+
+    def dropStrategies(self, marketName):
+        #=======================================================================
+        # Drops the strategy instances of a market no longer monitored
+        #=======================================================================
+        for strategy in self.strategies:
+            self.strategyInstances.pop((strategy, marketName), None)
+
+
+    def onFeedUpdate(self, update):
+        #=======================================================================
+        # Feed listener - Applies a market update (feed.FeedUpdate)
+        #
+        # - Market summaries: Updates the list of markets to monitor, and the
+        #   markets whose candles the feed is watching
+        # - Candles: Updates the market's candles. For pushed updates, the
+        #   strategies are run on the market straight away.
+        #=======================================================================
+        with self.feedLock:
+            if update.kind == SUMMARIES:
+                if update.response["success"]:
+                    # Get list of markets to monitor
+                    self.getActiveMarkets(update.response["result"])
+                    self.feed.watch([market.abbr for market in self.markets.values()],
+                                    None if self.changedMarkets is None else
+                                    [self.markets[name].abbr for name in self.changedMarkets])
+                #allow execution to continue with failed tick without errors, but don't actually do anything
+                else:
+                    log.info("Tick missed - " + str(update.response))
+                    Alert("Tick missed: " + update.response.get("message", "Tick failed, no message"))
+                return
+
+            # Markets are keyed by currency, e.g. 'LTC' for 'BTC-LTC'
+            market = self.markets.get(update.market.split("-", 1)[-1])
+            if market is None or market.abbr != update.market:
+                return
+            if update.kind == CANDLES:
+                # Full history - replaces the candles (a failed one keeps them)
+                if update.response["success"]:
+                    market.candles = None
+            elif market.candles is None:
+                # Latest candle, without the history to add it to
+                return
+            market.processCandles(update.response, self.config["candles_timeframe"],
+                                  self.config["candles_singletick"], self.candlesSource()[1],
+                                  self.candleTimeframes())
+            # Gap in the candles - their history is fetched again
+            if market.needsBackfill:
+                self.feed.backfill([market.abbr])
+
+            if self.feed.pushes:
+                self.runStrategies([market.name])
+
+
+    def getFeed(self, feedConfig):
+        #=======================================================================
+        # Builds the market data feed set in the config:
+        # - feed: source: poll    - Balances and candles polled at each tick (default)
+        # - feed: source: socket  - Updates pushed on a local socket (`host`, `port`)
+        # - feed: source: replay  - Updates replayed from a recorded log (`path`, `speed`)
+        #
+        # :returns: The feed (feed.MarketFeed)
+        #=======================================================================
+        source = feedConfig.get("source", "poll")
+        if source == "socket":
+            log.info("Market updates pushed from socket {}:{}".format(feedConfig.get("host", "127.0.0.1"),
+                                                                      feedConfig.get("port", 8765)))
+            feed = SocketFeed(feedConfig.get("host", "127.0.0.1"), feedConfig.get("port", 8765), api=self.queryAPI,
+                              interval=self.candlesSource()[0])
+        elif source == "replay":
+            log.info("Market updates replayed from: " + feedConfig["path"])
+            feed = ReplayFeed(feedConfig["path"], feedConfig.get("speed", 1.), interval=self.candlesSource()[0])
+        else:
+            feed = PollingFeed(self.queryAPI, self.asyncQueryAPI, getattr(self, "loop", None),
+                               workers=feedConfig.get("workers", 32),
+                               # "timeout": former name of the tick budget
+                               tickBudget=feedConfig.get("tick_budget", feedConfig.get("timeout", None)),
+                               interval=self.candlesSource()[0])
+        # Markets whose candle gaps are repaired at a time
+        feed.backfillBatch = feedConfig.get("backfill_batch", 8)
+        return feed
+
+
+    def startFeed(self):
+        self.feed.start()
+
+
+    def stopFeed(self):
+        self.feed.stop()
+
+
+    def getDispatcher(self, apiConfig):
+        #=======================================================================
+        # Builds the API transport set in the config:
+        # - api: replay: <log>  - Serve a recorded log, no network (at `replay_speed`)
+        # - api: record: <log>  - Live transport, every call appended to the log
+        #
+        # :returns: The transport, or None for the default live one
+        #=======================================================================
+        if apiConfig.get("replay", None):
+            log.info("Replaying API responses from: " + apiConfig["replay"])
+            return ReplayDispatcher(apiConfig["replay"], apiConfig.get("replay_speed", 1.))
+        if apiConfig.get("record", None):
+            log.info("Recording API responses to: " + apiConfig["record"])
+            return RecordingDispatcher(SessionDispatcher(pool_connections=apiConfig.get("pool_connections", 2),
+                                                         pool_maxsize=apiConfig.get("pool_maxsize", 32)),
+                                       apiConfig["record"])
+        return None
+
+
+    def getLimiter(self, apiConfig):
+        #=======================================================================
+        # Sets the limits of the API rate limiter (ratelimit.py), once for all
+        # the API objects: `calls_per_second`, `burst`, `endpoint_weights`
+        #
+        # A replay does not call the exchange, so it is throttled on its own,
+        # at the configured rate times `replay_speed` - not at all if None.
+        #
+        # :returns: PriorityScheduler - The rate limiter of the API objects
+        #=======================================================================
+        rate = apiConfig.get("calls_per_second", 1)
+        burst = apiConfig.get("burst", 1)
+        weights = apiConfig.get("endpoint_weights", None)
+        if apiConfig.get("replay", None):
+            speed = apiConfig.get("replay_speed", 1.)
+            if not speed:
+                return Unthrottled()
+            return PriorityScheduler(TokenBucket(rate * speed, burst, weights))
+        limiter = getSharedScheduler()
+        limiter.configure(rate=rate, capacity=burst, weights=weights)
+        return limiter
+
+
+    def candlesTail(self, apiConfig):
+        #=======================================================================
+        # :returns: Integer - Number of candles the markets keep from their
+        #           history (last day and hour), which is all of it that needs
+        #           decoding - None if `trim_candles` is off
+        #=======================================================================
+        if not apiConfig.get("trim_candles", True):
+            return None
+        return historyLength(self.candlesSource()[1], self.candleTimeframes())
+
+
+    def candlesSource(self):
+        #=======================================================================
+        # :returns: Tuple - The tick interval of the candles fetched from the
+        #           exchange (`candles_source`, by default the one of
+        #           `candles_singletick`), and their length in minutes
+        #=======================================================================
+        interval = self.config.get("candles_source", None) or intervalName(self.config["candles_singletick"])
+        return interval, INTERVAL_MINUTES[interval]
+
+
+    def candleTimeframes(self):
+        #=======================================================================
+        # :returns: List - The timeframes (in minutes) derived from the source
+        #           candles - `candles_timeframes` and `candles_singletick`
+        #=======================================================================
+        timeframes = set(self.config.get("candles_timeframes", None) or [])
+        timeframes.add(self.config["candles_singletick"])
+        checkTimeframes(self.candlesSource()[1], timeframes)
+        return sorted(timeframes)
+
+
+    def tickPeriod(self):
+        #=======================================================================
+        # :returns: Double - Time between ticks, in seconds (shortened when
+        #           replaying a recording at higher speed)
+        #=======================================================================
+        apiConfig = self.config.get("api", None) or {}
+        if apiConfig.get("replay", None) and apiConfig.get("replay_speed", 1.):
+            return self.config["tick_period"] / apiConfig.get("replay_speed", 1.)
+        return self.config["tick_period"]
 
 
     def getStrategies(self):
@@ -221,131 +546,104 @@ class Trader(object):
         #=======================================================================
 
 
-    def _getMonitored(self, marketSummaryData, marketWasMonitored):
+    def _getMonitored(self, summaryTable, wasMonitored):
         #=======================================================================
         # 
-        # Determines whether market should currently be monitored based on volume as well as response from API
+        # Determines which markets should currently be monitored based on volume as well as response from API
+        # (see selection.py for the conditions)
         # 
-        # :param marketSummaryData: (List)       - Response from API calls
-        # :param notify:(Default=True) (Boolean) - Whether or not to make a notification when 
-        #                                          this market's monitoring stops and starts
+        # :param summaryTable: (SummaryTable)   - Response from API calls
+        # :param wasMonitored: (numpy.ndarray)  - Per row, whether the market is already monitored
         #
-        # :returns: (Boolean) Whether or not to monitor market (self.getMonitored)
+        # :returns: (numpy.ndarray) Per row, whether or not to monitor the market
         # 
         #=======================================================================
+        # Currency configs are resolved once
+        if self.monitorRules is None:
+            self.monitorRules = MonitorRules(self.config)
+        return self.monitorRules.select(summaryTable, wasMonitored)
+
+
+    def snapshot(self, tick, duration):
+        #=======================================================================
+        # :param tick: (int) Tick number
+        # :param duration: (float) Time the tick took, in seconds
+        # :returns: TickSnapshot - What the UI shows, as of the end of the tick,
+        #           as plain values
+        #=======================================================================
+        self.drainNotifications()
+        with self.feedLock:
+            return TickSnapshot(tick=tick,
+                                time=datetime.datetime.now(),
+                                duration=duration,
+                                bitcoinBalance=self.bitcoinBalance,
+                                markets=tuple(self.markets[name].snapshot() for name in sorted(self.markets)),
+                                notifications={key: notification.snapshot()
+                                               for key, notification in self.notifications.items()})
+
+    def postNotification(self, notification):
+        #=======================================================================
+        # Any thread - shows the notification from the next snapshot on
+        #=======================================================================
+        self.notificationRequests.put(("add", notification))
+
+    def removeNotification(self, key):
+        #=======================================================================
+        # Any thread - drops the notification from the next snapshot on
         #
-        # Default - Do not monitor
-        _getMonitored = False
-        # Check if there is a market
-        hasMarket = False
-        hasMarket = self._hasMarket(marketSummaryData)
-        # Set volume threshold lower bound multiplier
-        volLowBoundMulti = .9 # Prevents markets dropping off due to micro vol oscillations
-        
+        # :param key: (int) NotificationSnapshot.key
+        #=======================================================================
+        self.notificationRequests.put(("remove", key))
 
-        # If there is a market for this currency, check if it needs to be monitored
-        if hasMarket:
-            #===================================================================
-            # GLOBAL CONDITIONS
-            #===================================================================
-            # Set volume threshold
-            volThreshold = self.config["min_volume"]
-            # Adjust for existing markets
-            if marketWasMonitored:
-                volThreshold *= volLowBoundMulti
-
-            # 1 - Tradeing volume above threshold
-            if marketSummaryData["BitcoinMarket"]["BaseVolume"] >= volThreshold:
-                _getMonitored = True
-
-            # 2 - I just wanna monitor everything
-            elif self.config["show_all"]:
-                _getMonitored = True
-
-            #===================================================================
-            # CURRENCY SPECIFIC CONDITIONS
-            #===================================================================
-            # Get currency specific condition
-            if "currencies" in self.config:
-                # Get name of currency
-                name = marketSummaryData["Currency"]["Currency"]
-                #check if there is a currency specific config
-                if name in self.config["currencies"]:
-                    # Create currency specific config
-                    ccyConfig = self.config["currencies"][name]
-
-                    # 3 - Trading volume above threshold
-                    if "min_volume" in ccyConfig:
-                        # Set volume threshold for specific currency
-                        volThreshold = ccyConfig["min_volume"]
-                        # Adjust for exisitng markets
-                        if marketWasMonitored:
-                            volThreshold *= volLowBoundMulti
-                        if marketSummaryData["BitcoinMarket"]["BaseVolume"] >= volThreshold:
-                            _getMonitored = True
-
-                    # 4 - Force monitoring override
-                    if "monitor" in ccyConfig:
-                        if ccyConfig["monitor"] == True:
-                            _getMonitored = True
-                        elif ccyConfig["monitor"] == False:
-                            _getMonitored = False
-                    
-        return _getMonitored
-
-
-
-    def _hasMarket(self, marketSummaryData):
-        #=======================================================================
-        # Checks to make sure market data exists
-        # (only checking for Bitcoin markets at this stage)
-        # 
-        # :param data: (List) response from API calls
-        #=======================================================================
-        _hasMarket = False
-        if "BitcoinMarket" in marketSummaryData:
-            if marketSummaryData["BitcoinMarket"] is not False and \
-               marketSummaryData["BitcoinMarket"] is not None and \
-               marketSummaryData["BitcoinMarket"]["BaseVolume"] is not None:
-                #self.hasMarket = bool(data["BitcoinMarket"])
-                _hasMarket = True
-        return _hasMarket
-
-    def _wasMonitored(self, testMarketSummaryData):
-        _wasMonitored = False            
-        # One or more markets have been identified to be monitored
-        if self.markets is not None:
-            # Loop over all the markets and check if already monitoring the market
-            for marketName in self.markets:
-                _wasMonitored = _wasMonitored or testMarketSummaryData["Currency"]["Currency"] == marketName
- 
-        return _wasMonitored
-
-    def getData(self):
-        #=======================================================================
-        # Makes API call to get data, returns empty if not successful
+    def doNotificationAction(self, key):
+        #=======================================================================
+        # Any thread - does the action the notification reports, on the engine
+        # thread, if not done yet
         #
-        # :returns: List[Dict] if succesful, or None
+        # :param key: (int) NotificationSnapshot.key
         #=======================================================================
-        #pp(self.queryAPI.list_bitcoin_markets())
-        #get data via get_balances to limit individual calls and make sure data used down the line is synchronous
-        response = self.queryAPI.get_balances()
-        #if API responds
-        if response["success"]:
-            return response["result"]
-        #allow execution to continue with failed tick without errors, but don't actually do anything
-        else:
-            log.info("Tick missed - " + str(response))
-            Alert("Tick missed: " + response.get("message", "Tick failed, no message"))
-            return None
+        self.notificationRequests.put(("do", key))
 
+    def drainNotifications(self):
+        #=======================================================================
+        # Engine thread - applies the queued notification requests
+        #=======================================================================
+        while True:
+            try:
+                request, value = self.notificationRequests.get_nowait()
+            except queue.Empty:
+                return
+            if request == "add":
+                self.notifications[id(value)] = value
+            elif request == "remove":
+                self.notifications.pop(value, None)
+            elif request == "do":
+                notification = self.notifications.get(value, None)
+                if notification is None or not notification.action or notification.action.done:
+                    continue
+                try:
+                    with self.feedLock:
+                        notification.action.do()
+                except Exception:
+                    log.exception("Action " + str(notification.action) + " failed")
 
-    def getNotifications(self):
-        """
-        :returns: Dictionary[Notification] A dictionary with the notifications
-        """
-        #keeping notifications run in trader in case it is necessary in the future
-        return self.notifications
+    def getMarket(self, name):
+        #=======================================================================
+        # :param name: (str) Market name
+        # :returns: Market - The monitored market, None if not monitored
+        #=======================================================================
+        with self.feedLock:
+            return self.markets.get(name, None)
+
+    def gapStats(self):
+        #=======================================================================
+        # :returns: Dictionary - Candle gaps per monitored market (see
+        #           Market.gapStats), and the number of backfills requested
+        #           from the feed under "backfills"
+        #=======================================================================
+        with self.feedLock:
+            stats = {name: market.gapStats() for name, market in self.markets.items()}
+        return {"markets": stats, "backfills": self.feed.nrBackfills}
 
     def dump(self):
         """
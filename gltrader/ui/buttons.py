@@ -63,7 +63,7 @@ class StartButton(Button):
     # Not Currently implemented-- If market is not monitored, start monitoring
     #===========================================================================
 
-    def __init__(self, market, **kwargs):
+    def __init__(self, marketName, **kwargs):
         super(StartButton, self).__init__(**kwargs, text="Start")
 
     def refresh(self):
@@ -73,23 +73,26 @@ class SingleMarketButton(Button):
     #===========================================================================
     # Same functionaility as ViewButton, but Display label is different
     #===========================================================================
-    market=ObjectProperty()
 
-    def __init__(self, market, **kwargs):
-        self.market = market
-        super(SingleMarketButton, self).__init__(**kwargs, text=market.name)
-        self.background_color = [.5,.7,.5,1]
+    def __init__(self, marketName, isMonitored=True, **kwargs):
+        #=======================================================================
+        # :param marketName: (str) The market to view - found again on release
+        # :param isMonitored: (bool) Whether it is monitored, as of the latest snapshot
+        #=======================================================================
+        self.marketName = marketName
+        super(SingleMarketButton, self).__init__(**kwargs, text=marketName)
+        self.refresh(isMonitored)
 
-    def refresh(self):
+    def refresh(self, isMonitored=True):
         self.background_color = [.7,.7,.7,1]
-        if(self.market.isMonitored):
+        if(isMonitored):
             self.background_color = [.5,.7,.5,1]
 
     def on_release(self):
-        if(self.market.isMonitored):
-            pp(self.market)
-            app = App.get_running_app()
-            app.root.showSingleMarket(self.market)
+        app = App.get_running_app()
+        market = app.trader.getMarket(self.marketName)
+        if market is not None:
+            app.root.showSingleMarket(market)
 
 class RemoveNotificationButton(Button):
     #===========================================================================
@@ -101,6 +104,7 @@ class RemoveNotificationButton(Button):
         self.background_color = [1,.7,.7,1]
         self.color = [0,0,0,1]
         self.width = 30
+        # (NotificationSnapshot)
         self.notification = notification
 
 
@@ -138,24 +142,29 @@ class PauseButton(Button):
 
 class ActionDoButton(Button):
     """
-    Performs action and displays status of actions currently underway
+    Has the trader perform the action a notification reports, and displays the status of actions currently underway
     """
     enabled=True
-    action=ObjectProperty()
+    requested=False
 
-    def __init__(self, action, **kwargs):
-        self.action = action
+    def __init__(self, notification, **kwargs):
+        """
+        :param notification: (NotificationSnapshot) The notification reporting the action
+        """
+        self.notification = notification
         super(ActionDoButton, self).__init__(**kwargs, text="DO")
         self.background_color = [1,1,0,1]
+        self.refresh(notification)
 
-    def refresh(self):
-        if(self.action.done):
+    def refresh(self, notification):
+        self.notification = notification
+        if(notification.actionDone):
             self.background_color = [.7,.7,.7,1]
-            if(not self.action.checkActionComplete()):
+            if(not notification.actionComplete):
                 self.background_color = [.5,.5,1,1]
                 self.text = "..."
             else:
-                if(self.action.success):
+                if(notification.actionSuccess):
                     self.text = "DONE"
                     self.background_color = [.3,1,.3,1]
                 else:
@@ -164,9 +173,12 @@ class ActionDoButton(Button):
 
 
     def on_release(self):
-        if(not self.action.done):
-            self.action.do()
-        self.parent.refresh()
+        # Done on the engine thread, at the next tick - shown as underway until then
+        if(not self.notification.actionDone and not self.requested):
+            App.get_running_app().trader.doNotificationAction(self.notification.key)
+            self.requested = True
+            self.background_color = [.5,.5,1,1]
+            self.text = "..."
 
 
 class ClearAllNotificationsButton(Button):
@@ -186,8 +198,7 @@ class ClearAllNotificationsButton(Button):
     def on_release(self):
         App.get_running_app().on_pause()
         nlayout = App.get_running_app().rootWidget.nScreen.notification_layout
-        for nID, noteRow in nlayout.rowWidgets.items():
-            # nlayout.remove_widget(noteRow) 
-            App.get_running_app().rootWidget.nScreen.notification_layout.remove_widget(noteRow)
-        # nlayout.rowWidgets = {}
+        # Dropped by the trader as well, or the next snapshot brings them back
+        for noteRow in list(nlayout.rowWidgets.values()):
+            nlayout.removeRow(noteRow.note)
         App.get_running_app().on_resume()
@@ -17,13 +17,14 @@ class MarketRow(GridLayout):
 
     def __init__(self, market=None, **kwargs):
         """
-        :param market: (Market) The market to be displayed
+        :param market: (MarketSnapshot) The market to be displayed
         """
         self.market=market
         self.bind(columns=self.refresh)
         # super(MarketRow, self).__init__(**kwargs, rows=1, size_hint=(1, 30))
         super(MarketRow, self).__init__(**kwargs, rows=1, width=150)
-        self.columns = MarketTableColumns(self.market).getWidgets()
+        self.tableColumns = MarketTableColumns(self.market)
+        self.columns = self.tableColumns.getWidgets()
         for label, widget in self.columns.items():
             self.columns[label] = widget
             self.add_widget(self.columns[label])
@@ -51,6 +52,15 @@ class MarketRow(GridLayout):
 
 
 
+    def setMarket(self, market):
+        #=======================================================================
+        # :param market: (MarketSnapshot) The market's latest snapshot - shown
+        #                from the next refresh
+        #=======================================================================
+        self.market = market
+        self.tableColumns.market = market
+
+
     def delRefresher(self):
         self.app.rootWidget.refreshers.remove(self.refresh)
 
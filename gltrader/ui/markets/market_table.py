@@ -76,7 +76,7 @@ class MarketTable(GridLayout):
     def addMarket(self, market):
         #=======================================================================
         # Adds a given market to the table --- called when market.isMonitored is set to true
-        # :param market: (Market) market to be added to table
+        # :param market: (MarketSnapshot) market to be added to table
         #=======================================================================
         if not self.marketWidgets.get(market.name, False):
             self.marketWidgets[market.name] = MarketRow(market)
@@ -92,15 +92,19 @@ class MarketTable(GridLayout):
         # Will add new markets and remove stale ones
         #=======================================================================
         #pp("---- Start MarketTable.updateWidgets() ----")
-        # Add fresh market widgets
-        for name, market in self.app.trader.markets.items():
+        # Markets of the latest tick snapshot
+        markets = {market.name: market for market in self.app.snapshot.markets} if self.app.snapshot else {}
+        # Add fresh market widgets, and hand the snapshot to the others
+        for name, market in markets.items():
             if name not in self.marketWidgets:
                 self.addMarket(market)
+            else:
+                self.marketWidgets[name].setMarket(market)
  
         # Identify stale market widgets
         staleMarkets = []
         for name in self.marketWidgets:
-            if name not in self.app.trader.markets:
+            if name not in markets:
                 staleMarkets.append(name)
 
         # Remove stale markets
@@ -115,7 +119,7 @@ class MarketTable(GridLayout):
 
     def showMarkets(self):
         #=======================================================================
-        # Creates market rows or refreshes them (in separate threads).
+        # Refreshes the market rows.
         #=======================================================================
         
         
@@ -134,16 +138,9 @@ class MarketTable(GridLayout):
         #=======================================================================
  
         # pp("------- Start MarketTable.showMarkets() -------")
-        # Have all required market widgets - Update
-        threads = []
+        # Have all required market widgets - Update (widgets belong to the UI thread)
         for name in self.marketWidgets:
-            t = threading.Thread(target=self.marketWidgets[name].refresh)
-            threads.append(t)
-            t.start()
-         
-        # And joint threads back up
-        for t in threads:
-            t.join()
+            self.marketWidgets[name].refresh()
         # pp("------- End   MarketTable.showMarkets() -------")
                 
         
@@ -16,7 +16,7 @@ class MarketTableColumns(object):
     widgets={}
 
     def __init__(self, market=None):
-        ":param market: (Market) the market passed in from the MarketRow object"
+        ":param market: (MarketSnapshot) the market passed in from the MarketRow object"
         self.market = market
         self.widgets = self.setWidgets()
 
@@ -67,7 +67,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the latest Bid widget
         #=======================================================================
         def getBid():
-            return self.market.bid()
+            return self.market.bid
         return MarketPriceLabel(getBid, font_size=sp(12), size_hint_x = None, width = 100)
 
     def getAskWidget(self):
@@ -77,7 +77,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the latest Ask widget
         #=======================================================================
         def getAsk():
-            return self.market.ask()
+            return self.market.ask
         return MarketPriceLabel(getAsk, font_size=sp(12), size_hint_x = None, width = 100)
 
 
@@ -88,7 +88,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the latest hourly average volume, over 24hrs 
         #=======================================================================
         def get24AvgVol():
-            return self.market.previousDayTickBsVolMean()
+            return self.market.previousDayTickBsVolMean
         return MarketVolumeLabel(get24AvgVol, font_size=sp(12), padding_x = 30)
 
     def get24VolWidget(self):
@@ -98,7 +98,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the latest base volume widget
         #=======================================================================
         def get24Vol():
-            return self.market.previousDayBaseVol()
+            return self.market.previousDayBaseVol
         return MarketVolumeLabel(get24Vol , font_size=sp(12))
 
     def getCurrVolWidget(self):
@@ -108,7 +108,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the volume in the last hour 
         #=======================================================================
         def getCurrVol():
-            return self.market.currentBaseVol(estimateFullTick=True)
+            return self.market.currentFullTickBaseVol
         return MarketVolumeLabel(getCurrVol, font_size=sp(12))
 
     def getVolRatioWidget(self):
@@ -118,9 +118,9 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the volume in the last hour 
         #=======================================================================
         def getVolRatio():
-            currentVol = self.market.currentBaseVol()
-            tickVolMean = self.market.previousDayTickBsVolMean()
-            tickVolStdev = self.market.previousDayTickBsVolStdev()
+            currentVol = self.market.currentBaseVol
+            tickVolMean = self.market.previousDayTickBsVolMean
+            tickVolStdev = self.market.previousDayTickBsVolStdev
             return (currentVol - tickVolMean)/tickVolStdev
         return GenericNumberLabel(getVolRatio, font_size=sp(12))
 
@@ -136,8 +136,8 @@ class MarketTableColumns(object):
         def get24Change():
             # yest = self.market.data.summary["PrevDay"]
             # now = self.market.data.summary["Last"]
-            yest = self.market.prevDay()
-            now = self.market.last()
+            yest = self.market.previousDayPrice
+            now = self.market.last
             change = (now-yest)*100/yest
             return change
         return MarketPercentLabel(get24Change, font_size=sp(12))
@@ -150,7 +150,7 @@ class MarketTableColumns(object):
         #=======================================================================
         def getAvail():
             # return self.market.data.balance["Available"]
-            return self.market.availableBalance()
+            return self.market.availableBalance
         return MarketPriceLabel(getAvail , font_size=sp(12))
 
     def getPendingWidget(self):
@@ -160,7 +160,7 @@ class MarketTableColumns(object):
         # :returns: (Widget) a getter for the latest pending balance widget
         #=======================================================================
         def getPending():
-            return self.market.pendingBalance()
+            return self.market.pendingBalance
         return MarketPriceLabel(getPending , font_size=sp(12))
 
     def getMonitorWidget(self):
@@ -169,6 +169,6 @@ class MarketTableColumns(object):
         #                            Start monitoring the market (if show_all is selected in config)
         #=======================================================================
         if self.market.isMonitored:
-            return SingleMarketButton(self.market, size_hint_x=None, width=100)
+            return SingleMarketButton(self.market.name, self.market.isMonitored, size_hint_x=None, width=100)
         else:
-            return StartButton(self.market)
+            return StartButton(self.market.name)
@@ -40,7 +40,8 @@ class HomeLayout(GridLayout):
             self.widgets["name"] = Label(text="Available BTC")
             self.add_widget(self.widgets["name"])
         if "available" not in self.widgets:
-            self.widgets["available"] = MarketPriceLabel(lambda: self.app.trader.bitcoinBalance)
+            self.widgets["available"] = MarketPriceLabel(lambda: self.app.snapshot.bitcoinBalance
+                                                         if self.app.snapshot else 0.)
             self.add_widget(self.widgets["available"])
             self.app.rootWidget.refreshers.append(self.widgets["available"].refresh)
 
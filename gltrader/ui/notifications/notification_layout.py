@@ -25,6 +25,8 @@ class NotificationLayout(GridLayout):
 
     def __init__(self, market=None, **kwargs):
         super(NotificationLayout, self).__init__(**kwargs)
+        # Keys of the removed notifications - until the snapshots leave them out
+        self.removed = set()
         self.bind(minimum_height=self.setter("height"))
         self.bind(height=self.setter("height"))
         self.bind(notifications=self.getRows)
@@ -34,43 +36,49 @@ class NotificationLayout(GridLayout):
 
     def refresh(self, object=None, newval=None):
         #=======================================================================
-        # sets self.notifications to a dict of notifcations in the Trader object, which triggers a bind callback to getRows
+        # sets self.notifications to the notifications of the latest tick snapshot, which triggers a bind callback to getRows
         # 
         # :param object: the object if called via "bind" callback
         # :param newval: the new value if called via "bind" callback
         #=======================================================================
-        self.notifications = App.get_running_app().trader.getNotifications()
+        app = App.get_running_app()
+        self.notifications = app.snapshot.notifications if app.snapshot else {}
 
     def getRows(self, object=None, value=None):
         """
         Callback when self.notifications is updated -- adds notifications or calls refresh
 
         :param object: the current object instance
-        :param value: the new dict of notifications keyed by their memory address
+        :param value: the new dict of NotificationSnapshot keyed by their key
         """
         for key, val in value.items():
+            # Removed since the snapshot was taken
+            if key in self.removed:
+                continue
             if key not in self.rowWidgets:
                 self.add(val)
             else:
-                self.rowWidgets[key].refresh()
+                self.rowWidgets[key].setNote(val)
+        self.removed &= set(value)
 
 
     def add(self, note):
         """
         Adds a new notification to the layout
 
-        :param note: (Notification) note to be added to screen
+        :param note: (NotificationSnapshot) note to be added to screen
         """
-        self.rowWidgets[id(note)] = NotificationRow(note)
-        self.add_widget(self.rowWidgets[id(note)])
+        self.rowWidgets[note.key] = NotificationRow(note)
+        self.add_widget(self.rowWidgets[note.key])
 
 
     def removeRow(self, note):
         """
         Removes a notification from the layout
 
-        :param note: (Notification) notification to be removed
+        :param note: (NotificationSnapshot) notification to be removed
         """
-        del(App.get_running_app().trader.notifications[id(note)])
-        self.remove_widget(self.rowWidgets[id(note)])
-        del(self.rowWidgets[id(note)])
+        App.get_running_app().trader.removeNotification(note.key)
+        self.removed.add(note.key)
+        self.remove_widget(self.rowWidgets[note.key])
+        del(self.rowWidgets[note.key])
@@ -24,7 +24,7 @@ class NotificationRow(GridLayout):
 
     def __init__(self, notification, **kwargs):
         """
-        :param notification: (Notification) the notification object that is associated with this widget
+        :param notification: (NotificationSnapshot) the notification values that are associated with this widget
         """
         self.note=notification
         self.widgets={}
@@ -35,16 +35,22 @@ class NotificationRow(GridLayout):
         # App.get_running_app().trader.notifications[id(self)] = self
 
 
-    def refresh(self):
+    def setNote(self, notification):
+        #=======================================================================
+        # :param notification: (NotificationSnapshot) the notification values as of the latest tick snapshot
+        #=======================================================================
+        self.note = notification
+        self.refresh()
+
+    def refresh(self, *args):
         #=======================================================================
         # Appends each element of the notification row in order if it has not already been added.
         # In order:
         #     - Remove Button
         #     - Timestamp
         #     - Message ( different colors depending on integer "Notification.level" )
-        #     - Action Button / Spacer ( Displayed if Notification.sender is Action
-        #       and actions are not set to automatically execute.  Executes action )
-        #     - Market Button / Spacer ( Display if Notification.sender is Market. Shows individual market window )
+        #     - Action Button / Spacer ( Displayed if the notification reports an Action.  Has the trader execute it )
+        #     - Market Button / Spacer ( Displayed if the notification is about a Market. Shows individual market window )
         #=======================================================================
         if "remove" not in self.widgets:
             self.widgets["remove"] = RemoveNotificationButton(self.note)
@@ -80,13 +86,13 @@ class NotificationRow(GridLayout):
             except Exception as e:
                 pp(self.note)
 
-        if self.note.action:
+        if self.note.hasAction:
             # if not self.action.done:
                 if "actionbutton" not in self.widgets:
-                    self.widgets["actionbutton"] = ActionDoButton(self.note.action, size_hint_x=None, width=75)
+                    self.widgets["actionbutton"] = ActionDoButton(self.note, size_hint_x=None, width=75)
                     self.add_widget(self.widgets["actionbutton"])
                 else:
-                    self.widgets["actionbutton"].refresh()
+                    self.widgets["actionbutton"].refresh(self.note)
             # else:
             #     Error("Bad action button", self.note.action)
         else:
@@ -94,13 +100,14 @@ class NotificationRow(GridLayout):
                     self.widgets["actionspacer"] = Label(width=25, size_hint_x=None)
                     self.add_widget(self.widgets["actionspacer"])
 
-        if self.note.market:
+        if self.note.marketName:
             # if self.note.market.checkUpToDate():
                 if "marketbutton" not in self.widgets:
-                    self.widgets["marketbutton"] = SingleMarketButton(self.note.market, size_hint_x=None, width=75)
+                    self.widgets["marketbutton"] = SingleMarketButton(self.note.marketName, self.note.marketMonitored,
+                                                                      size_hint_x=None, width=75)
                     self.add_widget(self.widgets["marketbutton"])
                 else:
-                    self.widgets["marketbutton"].refresh()
+                    self.widgets["marketbutton"].refresh(self.note.marketMonitored)
 
             # else:
             #     Error("Bad market button", self.note.market)
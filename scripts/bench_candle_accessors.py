@@ -0,0 +1,105 @@
+#===============================================================================
+# Benchmark - Per tick cost of the getAll* candle series accessors
+#
+# Reads the 12 getAll* series of every market once per tick (as a strategy
+# scanning all the monitored markets would), plus the second to last previous
+# day base volume (see PumpAndDumpExploit.actionDetected):
+#     dicts  - The former accessors: a list built from the candle dicts
+#     lists  - A list copied out of the CandleRing columns (.tolist())
+#     views  - The current accessors: read-only views of the CandleRing columns
+# Every market rolls over a candle before each tick - the worst case for the
+# views, which are rebuilt once per rollover. The memory allocated by reading
+# the series again within the same tick is measured apart (tracemalloc).
+#
+# Usage:
+#     python scripts/bench_candle_accessors.py [nr_markets] [nr_ticks]
+#===============================================================================
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.candlesticks import CandleSticks, HOURS_PER_DAY
+from gltrader.stubserver import SyntheticMarket, marketCurrencies
+
+MINUTES_PER_CANDLE = 30
+INTERVAL = MINUTES_PER_CANDLE * 60
+NR_PER_HOUR = 60 // MINUTES_PER_CANDLE
+NR_PER_DAY = NR_PER_HOUR * HOURS_PER_DAY
+KEYS = ("O", "C", "L", "H", "V", "BV")
+
+
+def readDicts(candles):
+    previousDay = candles.previousDayDicts
+    lastHour = candles.lastHourDicts
+    series = [candles.getListOfValuesFromListOfDict(previousDay, key) for key in KEYS] + \
+             [candles.getListOfValuesFromListOfDict(lastHour, key) for key in KEYS]
+    return series[5][-2]
+
+
+def readLists(candles):
+    series = [candles.previousDayCandles.column(key).tolist() for key in KEYS] + \
+             [candles.lastHourCandles.column(key).tolist() for key in KEYS]
+    return series[5][-2]
+
+
+def readViews(candles):
+    series = [candles.getAllPreviousDayOpens(), candles.getAllPreviousDayCloses(),
+              candles.getAllPreviousDayLows(), candles.getAllPreviousDayHighs(),
+              candles.getAllPreviousDayVolumes(), candles.getAllPreviousDayBaseVolumes(),
+              candles.getAllLastHrOpens(), candles.getAllLastHrCloses(), candles.getAllLastHrLows(),
+              candles.getAllLastHrHighs(), candles.getAllLastHrVolumes(), candles.getAllLastHourBaseVolume()]
+    return series[5][-2]
+
+
+def rollOver(candles, candle):
+    # The storage part of CandleSticks.updateCandles - the dicts kept for readDicts
+    candles.previousDayCandles.append(candles.currentCandle)
+    candles.lastHourCandles.append(candle)
+    candles.previousDayDicts = candles.previousDayDicts[1:] + [candles.currentCandle]
+    candles.lastHourDicts = candles.lastHourDicts[1:] + [candle]
+    candles.currentCandle = candle
+
+
+def build(nrMarkets, now):
+    markets = []
+    for i, currency in enumerate(marketCurrencies(nrMarkets)):
+        history = SyntheticMarket(currency, i).candles(INTERVAL, NR_PER_HOUR * (HOURS_PER_DAY + 1), now)
+        candles = CandleSticks([dict(c) for c in history], HOURS_PER_DAY, MINUTES_PER_CANDLE)
+        candles.previousDayDicts = history[-NR_PER_DAY-1:-1]
+        candles.lastHourDicts = history[-NR_PER_HOUR:]
+        markets.append(candles)
+    return markets
+
+
+def measure(name, read, markets, nrTicks):
+    elapsed = 0.
+    for tick in range(nrTicks):
+        for candles in markets:
+            rollOver(candles, dict(candles.currentCandle))
+        start = time.perf_counter()
+        for candles in markets:
+            read(candles)
+        elapsed += time.perf_counter() - start
+    # Memory allocated by a second read in the same tick, once the first one is done
+    tracemalloc.start()
+    for candles in markets:
+        read(candles)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("{:<6} {:8.2f}ms/tick {:7.2f}us/market | repeated read: {:8.1f}KB peak".format(
+          name, elapsed * 1e3 / nrTicks, elapsed * 1e6 / nrTicks / len(markets), peak / 1024.))
+
+
+if __name__ == '__main__':
+    nrMarkets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    nrTicks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    markets = build(nrMarkets, time.time())
+    print("{:d} markets, {:d} ticks, 12 series of {:d}/{:d} candles per market".format(
+          nrMarkets, nrTicks, NR_PER_DAY, NR_PER_HOUR))
+    measure("dicts", readDicts, markets, nrTicks)
+    measure("lists", readLists, markets, nrTicks)
+    measure("views", readViews, markets, nrTicks)
@@ -0,0 +1,51 @@
+#===============================================================================
+# Benchmark - Candle history (GetTicks) decoding time and peak memory
+#
+# Compares, for one market's GetTicks payload, the full decode with the
+# standard json module (what `response.json()` did), the full decode with the
+# installed backend (see decoding.py), and the tail decode of the candles the
+# markets keep.
+#
+# Usage:
+#     python scripts/bench_candle_decoding.py [nr_candles] [tail] [nr_runs]
+#===============================================================================
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.decoding import BACKEND, loads, tailCandles
+from gltrader.stubserver import SyntheticMarket
+
+
+def run(name, decode, body, nrRuns):
+    start = time.perf_counter()
+    for i in range(nrRuns):
+        decode(body)
+    elapsed = (time.perf_counter() - start) / nrRuns
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    decode(body)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    print("{:<24}{:>9.3f}ms/market | peak memory: {:8.1f}KB".format(name, elapsed * 1000., peak / 1024.))
+
+
+if __name__ == '__main__':
+    nrCandles = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    tail = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    nrRuns = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    candles = SyntheticMarket('LTC', 1).candles(1800, nrCandles, time.time())
+    body = json.dumps({'success': True, 'message': '', 'result': candles}).encode()
+    print("GetTicks payload: {:d} candles, {:.1f}KB - keeping {:d}".format(nrCandles, len(body) / 1024., tail))
+
+    run("json full", json.loads, body, nrRuns)
+    if BACKEND != 'json':
+        run(BACKEND + " full", loads, body, nrRuns)
+    run(BACKEND + " tail", lambda body: tailCandles(body, tail), body, nrRuns)
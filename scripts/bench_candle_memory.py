@@ -0,0 +1,86 @@
+#===============================================================================
+# Benchmark - Memory held by the candles of all the monitored markets
+#
+# Builds the candles of `nr_markets` synthetic markets from their (trimmed)
+# GetTicks payloads, and measures with tracemalloc the memory they keep once
+# the payloads are dropped:
+#     dicts  - The previous storage: the decoded candle dicts, sliced into the
+#              previous day and last hour lists
+#     ring   - CandleSticks, on the columnar ring buffers of candle_buffer.py
+# It also times the storage part of one candle rollover per market.
+#
+# Usage:
+#     python scripts/bench_candle_memory.py [nr_markets] [minutes_per_candle]
+#===============================================================================
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.candlesticks import CandleSticks, HOURS_PER_DAY
+from gltrader.stubserver import SyntheticMarket, marketCurrencies
+
+MINUTES_PER_CANDLE = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+INTERVAL = MINUTES_PER_CANDLE * 60
+NR_PER_HOUR = 60 // MINUTES_PER_CANDLE
+NR_PER_DAY = NR_PER_HOUR * HOURS_PER_DAY
+
+
+def payloads(nrMarkets, now):
+    # What the trader decodes per market - the candles it keeps, see Trader.candlesTail
+    return [json.dumps(SyntheticMarket(currency, i).candles(INTERVAL, NR_PER_HOUR * (HOURS_PER_DAY + 1), now))
+            for i, currency in enumerate(marketCurrencies(nrMarkets))]
+
+
+def buildDicts(allCandles):
+    return [allCandles[-NR_PER_DAY-1:-1], allCandles[-NR_PER_HOUR:], allCandles[-1]]
+
+
+def buildRing(allCandles):
+    return CandleSticks(allCandles, HOURS_PER_DAY, MINUTES_PER_CANDLE)
+
+
+def rollDicts(held, candle):
+    previousDay, lastHour, current = held
+    previousDay[0:NR_PER_DAY-1] = previousDay[1:NR_PER_DAY]
+    previousDay[-1] = current
+    lastHour[0:NR_PER_HOUR-1] = lastHour[1:NR_PER_HOUR]
+    lastHour[-1] = candle
+    held[2] = candle
+
+
+def rollRing(held, candle):
+    # The storage part of CandleSticks.updateCandles
+    held.previousDayCandles.append(held.currentCandle)
+    held.lastHourCandles.append(candle)
+    held.currentCandle = candle
+
+
+def measure(name, build, roll, bodies):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    held = [build(json.loads(body)) for body in bodies]
+    kept = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    candles = [json.loads(body)[-1] for body in bodies]
+    for candle in candles:
+        candle["T"] = "2030-01-01T00:00:00"
+    start = time.perf_counter()
+    for market, candle in zip(held, candles):
+        roll(market, dict(candle))
+    elapsed = time.perf_counter() - start
+    print("{:<6} {:>10.1f}KB {:>10.2f}KB/market | rollover: {:8.2f}us/market".format(
+          name, kept / 1024., kept / 1024. / len(bodies), elapsed * 1e6 / len(bodies)))
+
+
+if __name__ == '__main__':
+    nrMarkets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bodies = payloads(nrMarkets, time.time())
+    print("{:d} markets, {:d} candles each".format(nrMarkets, NR_PER_HOUR * (HOURS_PER_DAY + 1)))
+    measure("dicts", buildDicts, rollDicts, bodies)
+    measure("ring", buildRing, rollRing, bodies)
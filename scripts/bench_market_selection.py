@@ -0,0 +1,123 @@
+#===============================================================================
+# Benchmark - Market selection time against the number of market summaries
+#
+# Runs the selection stage of `Trader.getActiveMarkets` (is the market already
+# monitored, should it be) over the synthetic get_balances of the stub
+# exchange with the previous implementation (scan of the monitored markets and
+# of the currency configs per summary), with the MonitorRules of selection.py
+# per summary, and with the MonitorRules over the summary table - parse of
+# the response included. A constant time per summary means the stage scales
+# linearly.
+#
+# Usage:
+#     python scripts/bench_market_selection.py [nr_markets,...] [nr_runs]
+#===============================================================================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy
+
+from gltrader.selection import MonitorRules, SummaryTable, hasBitcoinMarket, MONITOR_VOLUME_LOW_BOUND
+from gltrader.stubserver import StubExchange
+
+
+def legacyWasMonitored(markets, marketSummaryData):
+    wasMonitored = False
+    for marketName in markets:
+        wasMonitored = wasMonitored or marketSummaryData["Currency"]["Currency"] == marketName
+    return wasMonitored
+
+
+def legacyGetMonitored(config, marketSummaryData, wasMonitored):
+    getMonitored = False
+    if hasBitcoinMarket(marketSummaryData):
+        volThreshold = config["min_volume"]
+        if wasMonitored:
+            volThreshold *= MONITOR_VOLUME_LOW_BOUND
+        if marketSummaryData["BitcoinMarket"]["BaseVolume"] >= volThreshold or config["show_all"]:
+            getMonitored = True
+        name = marketSummaryData["Currency"]["Currency"]
+        if name in config["currencies"]:
+            ccyConfig = config["currencies"][name]
+            if "min_volume" in ccyConfig:
+                volThreshold = ccyConfig["min_volume"]
+                if wasMonitored:
+                    volThreshold *= MONITOR_VOLUME_LOW_BOUND
+                if marketSummaryData["BitcoinMarket"]["BaseVolume"] >= volThreshold:
+                    getMonitored = True
+            if "monitor" in ccyConfig:
+                getMonitored = ccyConfig["monitor"]
+    return getMonitored
+
+
+def selectLegacy(config, summaries, markets):
+    for marketSummary in summaries:
+        wasMonitored = legacyWasMonitored(markets, marketSummary)
+        getMonitored = legacyGetMonitored(config, marketSummary, wasMonitored)
+        if getMonitored and not wasMonitored:
+            markets[marketSummary["Currency"]["Currency"]] = marketSummary
+        elif wasMonitored and not getMonitored:
+            del markets[marketSummary["Currency"]["Currency"]]
+
+
+def selectRules(config, summaries, markets):
+    rules = MonitorRules(config)
+    for marketSummary in summaries:
+        name = marketSummary["Currency"]["Currency"]
+        wasMonitored = name in markets
+        getMonitored = rules.isMonitored(marketSummary, wasMonitored)
+        if getMonitored and not wasMonitored:
+            markets[name] = marketSummary
+        elif wasMonitored and not getMonitored:
+            del markets[name]
+
+
+def selectTable(config, summaries, markets):
+    rules = MonitorRules(config)
+    table = SummaryTable(summaries)
+    wasMonitored = table.mask(markets)
+    getMonitored = rules.select(table, wasMonitored)
+    for row in numpy.flatnonzero(wasMonitored | getMonitored):
+        name = table.currencies[row]
+        if not wasMonitored[row]:
+            markets[name] = row
+        elif not getMonitored[row]:
+            del markets[name]
+
+
+def run(select, config, summaries, nrRuns):
+    markets = {}
+    # First tick adds the markets - time the steady state
+    select(config, summaries, markets)
+    start = time.perf_counter()
+    for i in range(nrRuns):
+        select(config, summaries, markets)
+    return (time.perf_counter() - start) / nrRuns, markets
+
+
+if __name__ == '__main__':
+    sizes = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else [500, 1000, 2000, 4000]
+    nrRuns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print("{:>8} {:>10} | {:>10} {:>10} | {:>10} {:>10} | {:>10} {:>10}".format(
+          "markets", "monitored", "legacy ms", "us/market", "rules ms", "us/market", "table ms", "us/market"))
+    for nrMarkets in sizes:
+        summaries = StubExchange(nrMarkets).getBalances({}, time.time())
+        volumes = sorted(s["BitcoinMarket"]["BaseVolume"] for s in summaries if s["BitcoinMarket"])
+        # Half the markets above the global threshold, a config for one currency in ten
+        config = {"min_volume": volumes[len(volumes) // 2], "show_all": False, "currencies": {}}
+        for i, summary in enumerate(summaries[1::10]):
+            config["currencies"][summary["Currency"]["Currency"]] = \
+                {"min_volume": volumes[0]} if i % 2 else {"monitor": i % 4 == 0}
+
+        legacy, legacyMarkets = run(selectLegacy, config, summaries, nrRuns)
+        rules, rulesMarkets = run(selectRules, config, summaries, nrRuns)
+        table, tableMarkets = run(selectTable, config, summaries, nrRuns)
+        assert sorted(legacyMarkets) == sorted(rulesMarkets) == sorted(tableMarkets)
+        print("{:>8d} {:>10d} | {:>10.2f} {:>10.2f} | {:>10.3f} {:>10.3f} | {:>10.3f} {:>10.3f}".format(
+              len(summaries), len(rulesMarkets), legacy * 1000., legacy * 1e6 / len(summaries),
+              rules * 1000., rules * 1e6 / len(summaries), table * 1000., table * 1e6 / len(summaries)))
@@ -0,0 +1,105 @@
+#===============================================================================
+# Benchmark - Per-call latency of the Bittrex transports
+#
+# Compares the plain `using_requests` dispatcher (new connection on every call)
+# against the pooled keep-alive `SessionDispatcher`, both hitting a local stub
+# HTTP server which answers like /pub/market/GetLatestTick.
+#
+# Usage:
+#     python scripts/bench_session_dispatch.py [nr_calls] [nr_threads]
+#===============================================================================
+
+import os
+import sys
+import json
+import time
+import threading
+import statistics
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.bittrex import using_requests, SessionDispatcher
+
+
+LATEST_TICK = json.dumps({
+    "success": True,
+    "message": "",
+    "result": [{"O": 0.00350397, "H": 0.00351000, "L": 0.00350000, "C": 0.00350350,
+                "V": 1326.42643480, "T": "2017-11-03T03:18:00", "BV": 4.64416189}]
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the connection is kept alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes - avoid the Nagle/delayed-ACK stall
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(LATEST_TICK)))
+        self.end_headers()
+        self.wfile.write(LATEST_TICK)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timeCalls(dispatch, url, nrCalls, nrThreads):
+    #===========================================================================
+    # Runs `nrCalls` calls of `dispatch`, spread over `nrThreads` threads
+    #
+    # :returns: List - The latency of every single call, in milliseconds
+    #===========================================================================
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for i in range(n):
+            start = time.perf_counter()
+            dispatch(url, "")
+            local.append((time.perf_counter() - start) * 1000.)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=[nrCalls // nrThreads]) for t in range(nrThreads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    print("{:<20}".format(name) +
+          "calls: {:6d} | ".format(len(latencies)) +
+          "mean: {:7.3f}ms | ".format(statistics.mean(latencies)) +
+          "p50: {:7.3f}ms | ".format(latencies[len(latencies) // 2]) +
+          "p99: {:7.3f}ms".format(latencies[int(len(latencies) * 0.99)]))
+
+
+if __name__ == '__main__':
+    nrCalls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    nrThreads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/api/v2.0/pub/market/GetLatestTick?marketName=BTC-LTC&tickInterval=thirtyMin"\
+          .format(server.server_address[1])
+
+    pooled = SessionDispatcher(pool_maxsize=nrThreads)
+    # Warm up both transports
+    timeCalls(using_requests, url, nrThreads, nrThreads)
+    timeCalls(pooled, url, nrThreads, nrThreads)
+
+    report("using_requests", timeCalls(using_requests, url, nrCalls, nrThreads))
+    report("SessionDispatcher", timeCalls(pooled, url, nrCalls, nrThreads))
+
+    pooled.close()
+    server.shutdown()
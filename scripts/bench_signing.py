@@ -0,0 +1,65 @@
+#===============================================================================
+# Benchmark - Request URL building and signing throughput
+#
+# Compares, for an authenticated get_balances and a public GetLatestTick
+# request, the former per-call approach (URL through str.format/concatenation,
+# HMAC keyed with the re-encoded secret at every call) against
+# `Bittrex._request_url` + `Bittrex._sign` (URL from pre-built parts, keyed
+# HMAC copied per call).
+#
+# Usage:
+#     python scripts/bench_signing.py [nr_calls]
+#===============================================================================
+
+import os
+import sys
+import time
+import hmac
+import hashlib
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.bittrex import Bittrex, BASE_URL_V2_0, PROTECTION_PUB, PROTECTION_PRV, API_V2_0
+
+
+API_KEY = "0123456789abcdef0123456789abcdef"
+API_SECRET = "fedcba9876543210fedcba9876543210"
+
+BALANCES = ({API_V2_0: '/key/balance/getbalances'}, None, PROTECTION_PRV)
+LATEST_TICK = ({API_V2_0: '/pub/market/GetLatestTick'},
+               {'marketName': 'BTC-LTC', 'tickInterval': 'thirtyMin'}, PROTECTION_PUB)
+
+
+def perCallSign(path_dict, options, protection):
+    # The URL building and signing as done before the signer
+    if not options:
+        options = {}
+    request_url = BASE_URL_V2_0.format(path=path_dict[API_V2_0])
+    nonce = str(int(time.time() * 1000))
+    if protection != PROTECTION_PUB:
+        request_url = "{0}apikey={1}&nonce={2}&".format(request_url, API_KEY, nonce)
+    request_url += urlencode(options)
+    return hmac.new(API_SECRET.encode(), request_url.encode(), hashlib.sha512).hexdigest()
+
+
+def run(name, sign, request, nrCalls):
+    path_dict, options, protection = request
+    start = time.perf_counter()
+    for i in range(nrCalls):
+        sign(path_dict, options, protection)
+    elapsed = time.perf_counter() - start
+    print("{:<28}{:>10.0f} req/s | {:6.2f}us/req".format(name, nrCalls / elapsed, elapsed / nrCalls * 1e6))
+
+
+if __name__ == '__main__':
+    nrCalls = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    api = Bittrex(API_KEY, API_SECRET, api_version=API_V2_0)
+
+    def signerSign(path_dict, options, protection):
+        return api._sign(api._request_url(protection, path_dict, options))
+
+    for requestName, request in (("get_balances", BALANCES), ("GetLatestTick", LATEST_TICK)):
+        run(requestName + " per-call", perCallSign, request, nrCalls)
+        run(requestName + " signer", signerSign, request, nrCalls)
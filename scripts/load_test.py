@@ -0,0 +1,120 @@
+#===============================================================================
+# Load test - Trader tick time versus number of markets and API latency
+#
+# Starts the local stub exchange (gltrader.stubserver) for every combination of
+# market count and latency, and runs trader-like ticks against it through
+# the trader's PollingFeed:
+#     1. get_balances - one call, all the markets
+#     2. Markets above the min volume are monitored
+#     3. Candles of every monitored market - all of them on the first tick,
+#        the latest one after that - on the feed's worker pool, or one event
+#        loop with --async
+#
+# Usage:
+#     python scripts/load_test.py --markets 100,1000,3000 --latency 0,0.05,0.2 --ticks 3
+#===============================================================================
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gltrader.BittrexAPI import BittrexAPI
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from gltrader.bittrex_async import ExecutorDispatcher
+from gltrader.bittrex import SessionDispatcher
+from gltrader.feed import PollingFeed, SUMMARIES
+from gltrader.stubserver import StubExchange, StubServer
+
+
+class TickListener(object):
+    # Stands in for Trader.onFeedUpdate - monitors the markets above the min volume
+    def __init__(self, feed, minVolume):
+        self.feed = feed
+        self.minVolume = minVolume
+        self.markets = 0
+        self.failures = []
+
+    def __call__(self, update):
+        if not update.response["success"]:
+            self.failures.append(update.response["message"])
+        elif update.kind == SUMMARIES:
+            markets = [summary["BitcoinMarket"]["MarketName"] for summary in update.response["result"]
+                       if summary["BitcoinMarket"] and summary["BitcoinMarket"]["BaseVolume"] >= self.minVolume]
+            self.markets = len(markets)
+            self.feed.watch(markets)
+
+
+def runTicks(api, asyncAPI, loop, nrTicks, minVolume, workers):
+    #===========================================================================
+    # :returns: List of dicts - Timing and outcome of every tick
+    #===========================================================================
+    feed = PollingFeed(api, asyncAPI, loop, workers=workers)
+    listener = TickListener(feed, minVolume)
+    feed.subscribe(listener)
+    ticks = []
+    for tick in range(nrTicks):
+        listener.failures = []
+        start = time.perf_counter()
+        feed.poll()
+        ticks.append({"total": time.perf_counter() - start, "markets": listener.markets,
+                      "failures": listener.failures})
+    feed.stop()
+    return ticks
+
+
+def report(nrMarkets, latency, ticks, apis, exchange):
+    for i, tick in enumerate(ticks):
+        print("markets: {:6d} | latency: {:5.3f}s | tick {:d} | ".format(nrMarkets, latency, i) +
+              "monitored: {:5d} | ".format(tick["markets"]) +
+              "total: {:7.3f}s | ".format(tick["total"]) +
+              "failed calls: {:d}".format(len(tick["failures"])))
+    rateStats = apis[0].getRateLimitStats()
+    print("    API calls: {:d} | client waits: {:d} (max {:.3f}s) | server: {}".format(
+          sum(api.getApiCalls() for api in apis), rateStats["waited"], rateStats["max_wait"], exchange.getStats()))
+    for line in apis[0].metrics.dump():
+        print("    " + line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Trader tick load test against the stub exchange")
+    parser.add_argument('--markets', default="100,1000", help="Comma separated market counts")
+    parser.add_argument('--latency', default="0,0.05", help="Comma separated API latencies (s)")
+    parser.add_argument('--jitter', type=float, default=0.)
+    parser.add_argument('--error-rate', type=float, default=0.)
+    parser.add_argument('--rate-limit', type=float, default=None, help="Server side limit, calls/s")
+    parser.add_argument('--calls-per-second', type=float, default=1000., help="Client side limit, calls/s")
+    parser.add_argument('--burst', type=int, default=100, help="Client side burst")
+    parser.add_argument('--pool-maxsize', type=int, default=32)
+    parser.add_argument('--min-volume', type=float, default=30., help="BTC volume to monitor a market")
+    parser.add_argument('--ticks', type=int, default=3)
+    parser.add_argument('--async', dest='useAsync', action='store_true', help="Candles from one event loop")
+    args = parser.parse_args()
+
+    for nrMarkets in [int(n) for n in args.markets.split(',')]:
+        for latency in [float(l) for l in args.latency.split(',')]:
+            exchange = StubExchange(nrMarkets=nrMarkets, latency=latency, jitter=args.jitter,
+                                    errorRate=args.error_rate, rateLimit=args.rate_limit, burst=args.burst)
+            server = StubServer(exchange).start()
+            dispatch = SessionDispatcher(pool_maxsize=args.pool_maxsize)
+            api = BittrexAPI("key", "secret", calls_per_sec=args.calls_per_second, burst=args.burst,
+                             dispatch=dispatch, base_url=server.base_url)
+            api.limiter.resetStats()
+            asyncAPI, loop = None, None
+            if args.useAsync:
+                asyncAPI = AsyncBittrexAPI("key", "secret", calls_per_sec=args.calls_per_second, burst=args.burst,
+                                           dispatch=ExecutorDispatcher(dispatch), base_url=server.base_url,
+                                           metrics=api.metrics)
+                loop = asyncio.new_event_loop()
+
+            report(nrMarkets, latency, runTicks(api, asyncAPI, loop, args.ticks, args.min_volume,
+                                                args.pool_maxsize),
+                   [a for a in (api, asyncAPI) if a is not None], exchange)
+
+            if loop is not None:
+                loop.close()
+            dispatch.close()
+            server.stop()
@@ -9,6 +9,7 @@ setup(name='gltrader',
       license='MIT',
       packages=['gltrader'],
       zip_safe=False,
+      install_requires=['numpy>=1.20'],
       test_suite='nose.collector',
       tests_require=['nose'],
     )
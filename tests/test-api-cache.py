@@ -0,0 +1,47 @@
+import sys
+sys.path.append('../')
+import time
+
+from gltrader.cache import TTLCache
+from transports import newAPI, CountingTransport
+
+
+def test_slow_endpoint_is_cached():
+    transport = CountingTransport()
+    api = newAPI(transport)
+    api.get_markets()
+    api.get_markets()
+    assert transport.calls == 1
+    assert api.getApiCalls() == 1
+    assert api.getCacheHits() == 1
+    assert api.getCacheMisses() == 1
+
+
+def test_invalidate():
+    transport = CountingTransport()
+    api = newAPI(transport)
+    api.get_currencies()
+    api.invalidateCache('get_currencies')
+    api.get_currencies()
+    assert transport.calls == 2
+
+
+def test_failures_not_cached():
+    transport = CountingTransport(success=False)
+    api = newAPI(transport)
+    api.get_wallet_health()
+    api.get_wallet_health()
+    assert transport.calls == 2
+
+
+def test_ttl_expiry_and_lru():
+    cache = TTLCache(maxsize=2)
+    cache.store(("a",), 1, 0.05)
+    cache.store(("b",), 2, 10)
+    cache.store(("c",), 3, 10)
+    # "a" was the least recently used entry
+    assert cache.lookup(("a",)) == (False, None)
+    assert cache.lookup(("b",)) == (True, 2)
+    cache.store(("d",), 4, 0.01)
+    time.sleep(0.02)
+    assert cache.lookup(("d",)) == (False, None)
@@ -0,0 +1,41 @@
+import sys
+sys.path.append('../')
+import asyncio
+
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from gltrader.metrics import LatencyHistogram
+from transports import newAPI, CountingTransport, AsyncCountingTransport
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000.)
+    assert abs(histogram.percentile(50) - 0.050) < 0.050 * 0.15
+    assert abs(histogram.percentile(99) - 0.099) < 0.099 * 0.15
+    assert histogram.percentile(100) == 0.1
+    assert LatencyHistogram().percentile(50) == 0.
+
+
+def test_endpoint_metrics():
+    api = newAPI(CountingTransport(latency=0.01))
+    api.get_balances()
+    api.get_balances()
+    api.trade_buy("BTC-LTC", "LIMIT", 1., 1.)
+    stats = api.getEndpointStats()
+    assert stats["v2.0/key/balance/getbalances"]["calls"] == 2
+    assert stats["v2.0/key/balance/getbalances"]["errors"] == 0
+    assert 0.009 < stats["v2.0/key/balance/getbalances"]["p50"] < 0.05
+    assert stats["v2.0/key/market/tradebuy"]["calls"] == 1
+    assert len(api.metrics.dump()) == 2
+
+
+def test_errors_and_shared_async_metrics():
+    api = newAPI(CountingTransport(success=False, message='INVALID_MARKET'))
+    api.get_ticker("BTC-NOPE")
+
+    asyncAPI = newAPI(AsyncCountingTransport(), AsyncBittrexAPI, metrics=api.metrics)
+    asyncio.run(asyncAPI.get_latest_candle("BTC-LTC", "thirtyMin"))
+    stats = api.getEndpointStats()
+    assert stats["v1.1/public/getticker"]["errors"] == 1
+    assert stats["v2.0/pub/market/GetLatestTick"]["calls"] == 1
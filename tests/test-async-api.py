@@ -0,0 +1,32 @@
+import sys
+sys.path.append('../')
+import time
+import asyncio
+
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from gltrader.bittrex import TICKINTERVAL_THIRTYMIN
+from transports import newAPI, AsyncCountingTransport, CANDLE_DATA
+
+
+def test_same_response_dict():
+    api = newAPI(AsyncCountingTransport([CANDLE_DATA]), AsyncBittrexAPI)
+    response = asyncio.run(api.get_latest_candle("BTC-LTC", TICKINTERVAL_THIRTYMIN))
+    assert response["success"]
+    assert response["result"][0]["T"] == CANDLE_DATA['T']
+    assert api.getApiCalls() == 1
+
+
+def test_concurrent_fan_out():
+    transport = AsyncCountingTransport([CANDLE_DATA], latency=0.05)
+    api = newAPI(transport, AsyncBittrexAPI)
+    markets = ["BTC-" + str(i) for i in range(100)]
+
+    async def fetchAll():
+        return await asyncio.gather(*[api.get_latest_candle(m, TICKINTERVAL_THIRTYMIN) for m in markets])
+
+    start = time.monotonic()
+    responses = asyncio.run(fetchAll())
+    # 100 calls of 50ms each, all in flight at the same time
+    assert time.monotonic() - start < 1.
+    assert all(r["success"] for r in responses)
+    assert len(transport.urls) == 100
@@ -0,0 +1,64 @@
+import sys
+sys.path.append('../')
+import time
+
+import pytest
+
+from gltrader.candle_buffer import CandleRing
+from gltrader.candlesticks import CandleSticks
+from gltrader.stubserver import SyntheticMarket
+
+INTERVAL = 1800
+
+
+def candle(i):
+    return {'O': i, 'H': i + 1., 'L': i - 1., 'C': i + .5, 'V': 10. * i, 'BV': 20. * i,
+            'T': '2017-11-03T{:02d}:{:02d}:00'.format(i // 2, 30 * (i % 2))}
+
+
+def test_ring_append_and_views():
+    ring = CandleRing(4)
+    ring.extend(candle(i) for i in range(3))
+    assert len(ring) == 3 and ring.column('O').tolist() == [0., 1., 2.]
+    ring.extend(candle(i) for i in range(3, 10))
+    assert ring.column('O').tolist() == [6., 7., 8., 9.]
+    assert ring[-1] == candle(9) and ring[0]['T'] == '2017-11-03T03:00:00'
+    # Views of the buffer, not copies
+    assert ring.column('BV').base is ring.values
+    ring.replaceLast(candle(20))
+    assert ring.column('C').tolist() == [6.5, 7.5, 8.5, 20.5]
+    with pytest.raises(IndexError):
+        ring[4]
+
+
+def test_ring_views_read_only():
+    ring = CandleRing(4)
+    ring.extend(candle(i) for i in range(6))
+    view = ring.column('V')
+    # Same view until the window moves - nothing allocated per call
+    assert ring.column('V') is view
+    with pytest.raises(ValueError):
+        view[0] = 1.
+    ring.replaceLast(candle(30))
+    assert ring.column('V') is view and view[-1] == 300.
+    ring.append(candle(31))
+    assert ring.column('V') is not view and ring.column('V').tolist() == [30., 40., 300., 310.]
+
+
+def test_candlesticks_roll():
+    market = SyntheticMarket('LTC', 7)
+    now = time.time() - INTERVAL * 10
+    history = market.candles(INTERVAL, 60, now)
+    candles = CandleSticks([dict(c) for c in history], 24, 30)
+    # Roll over 10 candles, updating the running one in between
+    for i in range(1, 11):
+        update = market.candle(INTERVAL, int(now // INTERVAL) + i, now + i * INTERVAL)
+        candles.updateCandles(dict(update, BV=update['BV'] / 2))
+        candles.updateCandles(dict(update))
+        history.append(update)
+    # Previous day excludes the running candle, last hour includes it
+    assert candles.getAllPreviousDayOpens().tolist() == [c['O'] for c in history[-49:-1]]
+    assert candles.getAllPreviousDayBaseVolumes().tolist() == [c['BV'] for c in history[-49:-1]]
+    assert candles.getAllLastHourBaseVolume().tolist() == [c['BV'] for c in history[-2:]]
+    assert candles.previousDayLastClose() == history[-2]['C']
+    assert candles.previousDayHigh() == max(c['H'] for c in history[-49:-1])
@@ -0,0 +1,56 @@
+import sys
+sys.path.append('../')
+import json
+
+from gltrader.decoding import ResponseDecoder, tailCandles
+from transports import newAPI
+from gltrader.bittrex import TICKINTERVAL_THIRTYMIN
+from gltrader.stubserver import StubExchange, StubServer
+
+CANDLES = [{'O': 1. + i, 'H': 2., 'L': .5, 'C': 1.5, 'V': 10., 'T': '2017-11-03T%02d:00:00' % i, 'BV': 15.}
+           for i in range(20)]
+URL = "https://bittrex.com/api/v2.0/pub/market/GetTicks?marketName=BTC-LTC&tickInterval=thirtyMin"
+
+
+def payload(result, success=True):
+    return json.dumps({'success': success, 'message': '', 'result': result}).encode()
+
+
+def test_tail_matches_full_decode():
+    response = tailCandles(payload(CANDLES), 5)
+    assert response == {'success': True, 'message': '', 'result': CANDLES[-5:]}
+    # Fewer candles than asked for - all of them
+    assert tailCandles(payload(CANDLES[:3]), 5)["result"] == CANDLES[:3]
+    assert tailCandles(payload([]), 5)["result"] == []
+
+
+def test_tail_not_a_candle_list():
+    assert tailCandles(payload(None, success=False), 5) is None
+    assert tailCandles(json.dumps({'result': CANDLES, 'message': 'x]'}).encode(), 5) is None
+
+
+def test_decoder_trims_configured_endpoint():
+    decoder = ResponseDecoder(tails={'/pub/market/GetTicks': 4}, traceMemory=True)
+    assert decoder(URL, payload(CANDLES))["result"] == CANDLES[-4:]
+    failed = decoder(URL, payload(None, success=False))
+    assert failed["result"] is None and failed["success"] is False
+    other = URL.replace("GetTicks", "GetLatestTick")
+    assert decoder(other, payload(CANDLES))["result"] == CANDLES
+    stats = decoder.getStats()["BTC-LTC"]
+    assert stats["calls"] == 2
+    assert stats["bytes"] > 0
+    assert stats["peak_memory"] > 0
+
+
+def test_api_trims_candles():
+    server = StubServer(StubExchange(nrMarkets=5, history=200)).start()
+    api = newAPI(base_url=server.base_url, candles_tail=50)
+    try:
+        full = api.get_latest_candle("BTC-AAB", TICKINTERVAL_THIRTYMIN)["result"]
+        candles = api.get_candles("BTC-AAB", TICKINTERVAL_THIRTYMIN)
+        assert candles["success"] and len(candles["result"]) == 50
+        assert candles["result"][-1]["T"] == full[-1]["T"]
+        assert api.getDecodeStats()["BTC-AAB"]["candles"] == 50
+    finally:
+        api.dispatch.close()
+        server.stop()
@@ -0,0 +1,143 @@
+import sys
+sys.path.append('../')
+import time
+import threading
+
+from gltrader.engine import TraderEngine, TickSnapshot, NotificationSnapshot
+from gltrader.trader import Trader
+from gltrader.market import Market
+from gltrader.notification import Info
+from gltrader.action import SendSuccess
+
+CONFIG = {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+          'api': {'base_url': 'http://127.0.0.1:9/api'},
+          'show_all': False, 'min_volume': 10., 'tick_period': 1, 'candles_timeframe': 24,
+          'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+          'trades_per_tick': 10, 'strategies': {}}
+
+
+class TickingTrader(object):
+    # Counts its ticks - the first one fails, `slow` ones take 0.1s
+    def __init__(self, slow=()):
+        self.ticks = 0
+        self.slow = slow
+        self.threads = set()
+
+    def wakeUp(self):
+        self.ticks += 1
+        self.threads.add(threading.current_thread().name)
+        if self.ticks == 1:
+            raise ValueError("bad tick")
+        if self.ticks in self.slow:
+            time.sleep(0.1)
+
+    def snapshot(self, tick, duration):
+        return TickSnapshot(tick=tick, time=None, duration=duration, bitcoinBalance=float(self.ticks),
+                            markets=(), notifications={})
+
+
+def waitFor(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_engine_ticks_off_the_caller_thread():
+    trader = TickingTrader()
+    engine = TraderEngine(trader, 0.01)
+    assert engine.latest() is None
+    engine.start()
+    waitFor(lambda: engine.latest() is not None and engine.latest().tick >= 3)
+    engine.stop(timeout=1)
+    assert trader.threads == {"trader-engine"}
+    # The failed first tick still published its snapshot
+    snapshot = engine.latest()
+    assert snapshot.tick >= 3 and snapshot.bitcoinBalance == float(snapshot.tick)
+    assert not engine.thread.is_alive()
+
+
+def test_engine_pause_and_resume():
+    trader = TickingTrader()
+    engine = TraderEngine(trader, 0.01)
+    engine.start()
+    waitFor(lambda: trader.ticks >= 2)
+    engine.pause()
+    time.sleep(0.03)
+    paused = trader.ticks
+    time.sleep(0.05)
+    assert trader.ticks == paused
+    engine.resume()
+    waitFor(lambda: trader.ticks > paused)
+    engine.stop(timeout=1)
+    assert trader.ticks > paused
+
+
+def test_slow_tick_skips_missed_ticks():
+    trader = TickingTrader(slow=(2,))
+    engine = TraderEngine(trader, 0.01)
+    engine.start()
+    waitFor(lambda: trader.ticks >= 3)
+    time.sleep(0.015)
+    engine.stop(timeout=1)
+    # No burst of catch-up ticks after the 0.1s one
+    assert trader.ticks <= 6
+
+
+class SnapshotFailingTrader(TickingTrader):
+    # Its snapshot of the second tick fails
+    def snapshot(self, tick, duration):
+        if tick == 2:
+            raise ValueError("bad snapshot")
+        return super(SnapshotFailingTrader, self).snapshot(tick, duration)
+
+
+def test_engine_survives_failed_snapshot():
+    trader = SnapshotFailingTrader()
+    engine = TraderEngine(trader, 0.01)
+    engine.start()
+    waitFor(lambda: engine.latest() is not None and engine.latest().tick >= 3)
+    engine.stop(timeout=1)
+    assert engine.latest().tick >= 3
+
+
+def test_trader_snapshot_while_notifying():
+    # Notifications come in from other threads while the engine snapshots
+    trader = Trader(CONFIG)
+    try:
+        trader.getActiveMarkets([{'Currency': {'Currency': 'LTC'},
+                                  'Balance': {'Balance': 1., 'Available': 1., 'Pending': 0.},
+                                  'BitcoinMarket': {'MarketName': 'BTC-LTC', 'BaseVolume': 100.}}])
+        threads = [threading.Thread(target=lambda: [trader.postNotification(Info("note")) for i in range(500)])
+                   for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            trader.snapshot(1, 0.)
+        for thread in threads:
+            thread.join()
+        snapshot = trader.snapshot(2, 0.)
+        # Plain values only
+        assert len(snapshot.notifications) == 2000
+        assert all(type(note) is NotificationSnapshot for note in snapshot.notifications.values())
+        assert not any(isinstance(value, Market) for market in snapshot.markets for value in market)
+        assert [market.name for market in snapshot.markets] == ['LTC']
+    finally:
+        trader.stopFeed()
+
+
+def test_trader_notification_requests():
+    trader = Trader(CONFIG)
+    try:
+        note = Info("Send it", SendSuccess("Sent"))
+        trader.postNotification(note)
+        values = trader.snapshot(1, 0.).notifications[id(note)]
+        assert values.hasAction and not values.actionDone and values.message == "Send it"
+        # The action is done on the engine thread, at the next tick or snapshot
+        trader.doNotificationAction(id(note))
+        assert not note.action.done
+        values = trader.snapshot(2, 0.).notifications[id(note)]
+        assert values.actionDone and values.actionComplete and values.actionSuccess
+        trader.removeNotification(id(note))
+        assert id(note) not in trader.snapshot(3, 0.).notifications
+    finally:
+        trader.stopFeed()
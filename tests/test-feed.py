@@ -0,0 +1,192 @@
+import sys
+sys.path.append('../')
+import os
+import json
+import time
+import socket
+import tempfile
+import asyncio
+import threading
+
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from gltrader.feed import PollingFeed, SocketFeed, ReplayFeed, SUMMARIES, CANDLES, CANDLE
+from transports import newAPI, ExchangeTransport as CannedTransport, CANDLE_DATA
+
+BALANCES = [{'Currency': {'Currency': 'LTC'}, 'Balance': {'Available': 0.},
+             'BitcoinMarket': {'MarketName': 'BTC-LTC', 'BaseVolume': 100.}}]
+
+
+class ExchangeTransport(CannedTransport):
+    # Answers get_balances with the LTC market
+    def __init__(self):
+        super(ExchangeTransport, self).__init__(BALANCES)
+
+
+def collect(feed):
+    updates = []
+
+    def listener(update):
+        updates.append(update)
+        if update.kind == SUMMARIES:
+            feed.watch(summary['BitcoinMarket']['MarketName'] for summary in update.response['result'])
+    feed.subscribe(listener)
+    return updates
+
+
+def test_polling_feed():
+    transport = ExchangeTransport()
+    feed = PollingFeed(newAPI(transport))
+    updates = collect(feed)
+    assert feed.poll()
+    assert feed.poll()
+    assert [(u.kind, u.market) for u in updates] == [(SUMMARIES, None), (CANDLES, 'BTC-LTC'),
+                                                     (SUMMARIES, None), (CANDLE, 'BTC-LTC')]
+    assert transport.paths == ['getbalances', 'GetTicks', 'getbalances', 'GetLatestTick']
+    # Unwatched, then watched again - history first
+    feed.watch([])
+    feed.watch(['BTC-LTC'])
+    assert feed.needsHistory('BTC-LTC')
+
+
+def test_replay_feed():
+    path = os.path.join(tempfile.mkdtemp(), "feed.jsonl")
+    with open(path, 'w') as log:
+        for t, url, result in ((0., "/api/v2.0/key/balance/getbalances?", BALANCES),
+                               (0.01, "/api/v2.0/pub/market/GetLatestTick?marketName=BTC-LTC&tickInterval=thirtyMin",
+                                [CANDLE_DATA]),
+                               (0.02, "/api/v2.0/pub/market/GetTicks?marketName=BTC-LTC&tickInterval=thirtyMin",
+                                [CANDLE_DATA]),
+                               (0.03, "/api/v2.0/pub/market/GetLatestTick?marketName=BTC-LTC&tickInterval=thirtyMin",
+                                [CANDLE_DATA])):
+            log.write(json.dumps({"t": t, "url": url, "r": {'success': True, 'message': '', 'result': result}}) + '\n')
+    feed = ReplayFeed(path, speed=None)
+    updates = collect(feed)
+    feed.start()
+    feed.thread.join(5)
+    # The latest candle before the history is dropped
+    assert [u.kind for u in updates] == [SUMMARIES, CANDLES, CANDLE]
+
+
+def test_socket_feed():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+
+    def serve():
+        connection, address = server.accept()
+        for message in ({"kind": "summaries", "data": BALANCES},
+                        {"kind": "candles", "market": "BTC-LTC", "data": [CANDLE_DATA]},
+                        {"kind": "candle", "market": "BTC-LTC", "data": CANDLE_DATA},
+                        {"kind": "candle", "market": "BTC-XXX", "data": CANDLE_DATA}):
+            connection.sendall((json.dumps(message) + '\n').encode())
+        time.sleep(0.2)
+        connection.close()
+    threading.Thread(target=serve, daemon=True).start()
+
+    feed = SocketFeed('127.0.0.1', server.getsockname()[1])
+    updates = collect(feed)
+    feed.start()
+    deadline = time.monotonic() + 5
+    while len(updates) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    feed.stop()
+    server.close()
+    assert [u.kind for u in updates] == [SUMMARIES, CANDLES, CANDLE]
+    assert updates[2].response['result'] == [CANDLE_DATA]
+
+
+def test_polling_feed_changed_markets():
+    transport = ExchangeTransport()
+    feed = PollingFeed(newAPI(transport))
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    feed.poll()
+    assert sorted(transport.paths) == ['GetTicks', 'GetTicks', 'getbalances']
+    # Unchanged markets are not refreshed - new ones get their history
+    transport.paths = []
+    feed.watch(['BTC-LTC', 'BTC-ETH', 'BTC-NEO'], changed=['BTC-LTC'])
+    feed.poll()
+    assert sorted(transport.paths) == ['GetLatestTick', 'GetTicks', 'getbalances']
+
+
+class SlowTransport(ExchangeTransport):
+    # Answers the candles of `slow` once released
+    def __init__(self, slow):
+        super(SlowTransport, self).__init__()
+        self.slow = slow
+        self.release = threading.Event()
+
+    def __call__(self, request_url, apisign):
+        if self.slow in request_url:
+            self.release.wait(5)
+        return super(SlowTransport, self).__call__(request_url, apisign)
+
+
+def test_polling_feed_late_candles_roll_over():
+    transport = SlowTransport('BTC-ETH')
+    feed = PollingFeed(newAPI(transport),
+                       workers=4, tickBudget=0.1)
+    updates = []
+    feed.subscribe(updates.append)
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    start = time.monotonic()
+    assert feed.poll()
+    assert time.monotonic() - start < 1
+    assert feed.pending() == {'BTC-ETH'}
+    # Still in flight - not fetched again
+    transport.paths = []
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    feed.poll()
+    assert 'GetTicks' not in transport.paths
+    transport.release.set()
+    deadline = time.monotonic() + 5
+    while feed.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert feed.takeRolledOver() == {'BTC-ETH'}
+    assert feed.takeRolledOver() == set()
+    assert (CANDLES, 'BTC-ETH') in [(u.kind, u.market) for u in updates]
+    feed.stop()
+
+
+class AsyncSlowTransport(ExchangeTransport):
+    # Answers the candles of `slow` once released - as a coroutine
+    def __init__(self, slow):
+        super(AsyncSlowTransport, self).__init__()
+        self.slow = slow
+        self.released = False
+
+    async def __call__(self, request_url, apisign):
+        while self.slow in request_url and not self.released:
+            await asyncio.sleep(0.01)
+        return super(AsyncSlowTransport, self).__call__(request_url, apisign)
+
+
+def test_async_polling_feed_late_candles_roll_over():
+    transport = AsyncSlowTransport('BTC-ETH')
+    loop = asyncio.new_event_loop()
+    feed = PollingFeed(newAPI(ExchangeTransport()),
+                       newAPI(transport, AsyncBittrexAPI), loop, tickBudget=0.1)
+    updates = []
+    feed.subscribe(updates.append)
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    start = time.monotonic()
+    assert feed.poll()
+    assert time.monotonic() - start < 1
+    assert feed.pending() == {'BTC-ETH'}
+    # Still in flight - not fetched again, and done during the next tick
+    transport.paths = []
+    transport.released = True
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    feed.poll()
+    assert transport.paths.count('GetTicks') == 1 and feed.nrLate == 1
+    assert feed.pending() == set()
+    assert feed.takeRolledOver() == {'BTC-ETH'}
+    assert (CANDLES, 'BTC-ETH') in [(u.kind, u.market) for u in updates]
+    # Stopped with a late fetch - cancelled
+    transport.released = False
+    feed.watch(['BTC-LTC', 'BTC-ETH'])
+    feed.backfill(['BTC-ETH'])
+    feed.poll()
+    assert feed.pending() == {'BTC-ETH'}
+    feed.stop()
+    assert feed.pending() == set()
+    loop.close()
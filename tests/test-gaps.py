@@ -0,0 +1,90 @@
+import sys
+sys.path.append('../')
+import time
+import calendar
+
+from gltrader.candlesticks import CandleSticks
+from gltrader.feed import PollingFeed, FeedUpdate, CANDLE, CANDLES, success
+from gltrader.stubserver import SyntheticMarket, StubExchange, StubServer, timestamp
+from gltrader.trader import Trader
+from transports import newAPI, ExchangeTransport
+
+INTERVAL = 1800
+
+
+def traderConfig(base_url):
+    return {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+            'api': {'base_url': base_url, 'calls_per_second': 1000, 'burst': 1000},
+            'show_all': False, 'min_volume': 0, 'tick_period': 0.1, 'candles_timeframe': 24,
+            'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+            'trades_per_tick': 10, 'strategies': {}}
+
+
+def test_candlesticks_gap():
+    market = SyntheticMarket('LTC', 3)
+    now = time.time() - INTERVAL * 10
+    candles = CandleSticks(market.candles(INTERVAL, 60, now), 24, 30)
+    index = int(now // INTERVAL)
+    candles.updateCandles(market.candle(INTERVAL, index + 1, now + INTERVAL))
+    assert candles.lastGap == 0
+    # Two candles missed
+    candles.updateCandles(market.candle(INTERVAL, index + 4, now + 4 * INTERVAL))
+    assert candles.lastGap == 2
+    candles.updateCandles(market.candle(INTERVAL, index + 4, now + 4 * INTERVAL))
+    assert candles.lastGap == 0
+    # Stale candle - ignored
+    candles.updateCandles(market.candle(INTERVAL, index + 2, now + 2 * INTERVAL))
+    assert candles.currentCandle['T'] == timestamp((index + 4) * INTERVAL)
+    # No gap from the dummy candles
+    dummy = CandleSticks([], 24, 30)
+    dummy.updateCandles(market.candle(INTERVAL, index, now))
+    assert dummy.lastGap == 0
+
+
+def test_feed_backfill_batches():
+    transport = ExchangeTransport()
+    feed = PollingFeed(newAPI(transport))
+    feed.backfillBatch = 2
+    feed.watch(['BTC-LTC', 'BTC-ETH', 'BTC-NEO'])
+    feed.poll()
+    feed.watch(['BTC-LTC', 'BTC-ETH', 'BTC-NEO'], changed=[])
+    feed.backfill(['BTC-LTC', 'BTC-ETH', 'BTC-NEO', 'BTC-XXX'])
+    transport.paths = []
+    feed.poll()
+    assert sorted(transport.paths) == ['GetTicks', 'GetTicks', 'getbalances']
+    transport.paths = []
+    feed.poll()
+    assert sorted(transport.paths) == ['GetTicks', 'getbalances']
+    transport.paths = []
+    feed.poll()
+    assert transport.paths == ['getbalances']
+    assert feed.nrBackfills == 3
+    feed.stop()
+
+
+def test_trader_repairs_gap():
+    server = StubServer(StubExchange(2, history=60))
+    server.start()
+    try:
+        trader = Trader(traderConfig(server.base_url))
+        trader.wakeUp()
+        market = trader.markets['AAA']
+        current = market.candles.currentCandle
+        # The next candles came in three candles late
+        later = dict(current, T=timestamp(calendar.timegm(time.strptime(current['T'], '%Y-%m-%dT%H:%M:%S'))
+                                          + 3 * INTERVAL))
+        trader.onFeedUpdate(FeedUpdate(CANDLE, market.abbr, success([later])))
+        assert market.gapStats() == {'gaps': 1, 'missedCandles': 2, 'backfillPending': True}
+        assert market.abbr in trader.feed.backfills
+        # A failed history fetch keeps the candles
+        candles = market.candles
+        trader.onFeedUpdate(FeedUpdate(CANDLES, market.abbr, {'success': False, 'message': 'NO_API_RESPONSE',
+                                                                'result': None}))
+        assert market.candles is candles
+        trader.wakeUp()
+    finally:
+        server.stop()
+    market = trader.markets['AAA']
+    assert market.gapStats() == {'gaps': 1, 'missedCandles': 2, 'backfillPending': False}
+    stats = trader.gapStats()
+    assert stats['backfills'] == 1 and stats['markets']['AAB']['gaps'] == 0
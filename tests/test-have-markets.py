@@ -14,7 +14,7 @@ from kit import dd
 @nottest
 def test_have_markets():
     trader = Trader()
-    result = trader.getData()
+    result = trader.dumplist()
     # pp(result)
     if type(result) is list:
         assert True
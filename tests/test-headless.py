@@ -0,0 +1,59 @@
+import sys
+sys.path.append('../')
+import os
+import json
+import tempfile
+import threading
+
+from gltrader.stubserver import StubExchange, StubServer
+from gltrader.headless import runHeadless
+from gltrader.notification import NotificationSink, FileSink, Success, Alert, SINKS
+
+
+def traderConfig(base_url):
+    return {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+            'api': {'base_url': base_url, 'calls_per_second': 1000, 'burst': 1000},
+            'show_all': False, 'min_volume': 0, 'tick_period': 0.1, 'candles_timeframe': 24,
+            'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+            'trades_per_tick': 10, 'strategies': {}}
+
+
+class RecordingSink(NotificationSink):
+    def __init__(self):
+        self.added = []
+        self.closed = False
+
+    def add(self, notification):
+        self.added.append(notification)
+
+    def close(self):
+        self.closed = True
+
+
+def test_headless_run():
+    server = StubServer(StubExchange(5, history=60))
+    server.start()
+    sink = RecordingSink()
+    try:
+        assert runHeadless(traderConfig(server.base_url), nrTicks=2, sinks=[sink], stopped=threading.Event()) == 2
+    finally:
+        server.stop()
+    assert sorted(note.market.name for note in sink.added if isinstance(note, Success)) == \
+           ['AAA', 'AAB', 'AAC', 'AAD', 'AAE']
+    assert sink.closed and sink not in SINKS
+    assert 'kivy' not in sys.modules
+
+
+def test_file_sink():
+    path = os.path.join(tempfile.mkdtemp(), "notifications.jsonl")
+    sink = FileSink(path)
+    SINKS.append(sink)
+    try:
+        Alert("API_RESPONSE_MISS").refreshWidget()
+    finally:
+        SINKS.remove(sink)
+        sink.close()
+    with open(path) as lines:
+        events = [json.loads(line) for line in lines]
+    assert [(e["event"], e["type"], e["message"]) for e in events] == [("add", "Alert", "API response missed"),
+                                                                      ("refresh", "Alert", "API response missed")]
@@ -0,0 +1,111 @@
+import sys
+sys.path.append('../')
+import time
+import asyncio
+import threading
+
+from gltrader.ratelimit import TokenBucket, PriorityScheduler
+
+
+def test_burst_goes_through():
+    bucket = TokenBucket(rate=1, capacity=5)
+    start = time.monotonic()
+    for i in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+    assert bucket.getStats()["waited"] == 0
+
+
+def test_threads_share_the_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    threads = [threading.Thread(target=bucket.acquire) for i in range(21)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 1 token in the bucket, 20 more refilled at 100/sec
+    assert time.monotonic() - start >= 0.19
+    assert bucket.getStats()["calls"] == 21
+
+
+def test_endpoint_weight():
+    bucket = TokenBucket(rate=100, capacity=5, weights={"/pub/market/GetTicks": 5})
+    bucket.acquire("/pub/market/GetTicks")
+    waited = bucket.acquire("/pub/market/GetLatestTick")
+    assert waited > 0
+
+
+def test_trades_preempt_queued_queries():
+    scheduler = PriorityScheduler(TokenBucket(rate=50, capacity=1), priority=["/key/market/tradebuy"])
+    order = []
+
+    def call(endpoint):
+        scheduler.acquire(endpoint)
+        order.append(endpoint)
+    queries = [threading.Thread(target=call, args=["/pub/market/GetLatestTick"]) for i in range(10)]
+    for t in queries:
+        t.start()
+    time.sleep(0.03)
+    assert scheduler.getQueueDepths()["query"] >= 8
+    trade = threading.Thread(target=call, args=["/key/market/tradebuy"])
+    trade.start()
+    for t in queries + [trade]:
+        t.join()
+    # Only the queries let through before the trade was queued precede it
+    assert order.index("/key/market/tradebuy") <= 3
+    stats = scheduler.getStats()
+    assert stats["calls"] == 11
+    assert stats["lanes"]["trade"]["calls"] == 1
+    assert stats["lanes"]["query"]["max_depth"] >= 8
+    assert scheduler.getQueueDepths() == {"trade": 0, "query": 0}
+
+
+def test_scheduler_respects_the_rate():
+    scheduler = PriorityScheduler(TokenBucket(rate=100, capacity=1), priority=["/key/market/tradebuy"])
+    threads = [threading.Thread(target=scheduler.acquire, args=[endpoint])
+               for endpoint in ["/pub/market/GetTicks", "/key/market/tradebuy"] * 10 + ["/pub/market/GetTicks"]]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start >= 0.19
+
+
+def test_trade_preempts_queued_coroutines():
+    scheduler = PriorityScheduler(TokenBucket(rate=50, capacity=1), priority=["/key/market/tradebuy"])
+    order = []
+
+    async def query():
+        await scheduler.acquireAsync("/pub/market/GetTicks")
+        order.append("/pub/market/GetTicks")
+
+    async def queries():
+        await asyncio.gather(*[query() for i in range(10)])
+    loop = threading.Thread(target=asyncio.run, args=[queries()])
+    loop.start()
+    time.sleep(0.03)
+    assert scheduler.getQueueDepths()["query"] >= 8
+    # The trade does not wait behind the queued coroutine queries
+    waited = scheduler.acquire("/key/market/tradebuy")
+    order.append("/key/market/tradebuy")
+    loop.join()
+    assert waited < 0.05
+    assert order.index("/key/market/tradebuy") <= 3
+    assert scheduler.getStats()["calls"] == 11
+    assert scheduler.getQueueDepths() == {"trade": 0, "query": 0}
+
+
+def test_cancelled_coroutine_leaves_its_lane():
+    scheduler = PriorityScheduler(TokenBucket(rate=10, capacity=1))
+    scheduler.acquire("/pub/market/GetTicks")
+
+    async def cancelled():
+        task = asyncio.ensure_future(scheduler.acquireAsync("/pub/market/GetTicks"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(cancelled())
+    assert scheduler.getQueueDepths() == {"trade": 0, "query": 0}
+    assert scheduler.acquire("/pub/market/GetTicks") < 0.15
@@ -0,0 +1,68 @@
+import sys
+sys.path.append('../')
+import os
+import time
+import tempfile
+
+from gltrader.replay import RecordingDispatcher, ReplayDispatcher, requestKey
+from gltrader.trader import Trader
+from transports import newAPI, CountingTransport
+
+
+class LiveTransport(CountingTransport):
+    # Answers with the number of the call
+    def answer(self):
+        return {'success': True, 'message': '', 'result': {'call': self.calls}}
+
+
+def test_key_has_no_credentials():
+    key = requestKey("https://bittrex.com/api/v2.0/key/balance/getbalances?apikey=XX&nonce=123&")
+    assert key == "/api/v2.0/key/balance/getbalances?"
+
+
+def test_record_then_replay():
+    path = os.path.join(tempfile.mkdtemp(), "day.jsonl.gz")
+    recorder = RecordingDispatcher(LiveTransport(), path)
+    api = newAPI(recorder)
+    api.get_balances()
+    time.sleep(0.2)
+    api.get_balances()
+    recorder.close()
+
+    replay = ReplayDispatcher(path, speed=10)
+    api = newAPI(replay)
+    start = time.monotonic()
+    assert api.get_balances()["result"] == {'call': 1}
+    assert api.get_balances()["result"] == {'call': 2}
+    # Second response recorded 0.2s in, replayed at 10x
+    assert 0.015 <= time.monotonic() - start < 0.15
+    # Log exhausted - behaves like a missed API call
+    assert not api.get_balances()["success"]
+    assert replay.remaining() == 0
+
+
+def replayConfig(path, speed):
+    return {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+            'api': {'replay': path, 'replay_speed': speed, 'calls_per_second': 2, 'burst': 1, 'retries': 3},
+            'show_all': False, 'min_volume': 0, 'tick_period': 60, 'candles_timeframe': 24,
+            'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+            'trades_per_tick': 10, 'strategies': {}}
+
+
+def test_replay_faster_than_rate_limit():
+    path = os.path.join(tempfile.mkdtemp(), "day.jsonl.gz")
+    recorder = RecordingDispatcher(LiveTransport(), path)
+    api = newAPI(recorder)
+    for i in range(20):
+        api.get_balances()
+    recorder.close()
+
+    # 20 calls at 2 calls/sec take ~10s live - at 100x, or as fast as possible, far less
+    for speed in (100, None):
+        trader = Trader(replayConfig(path, speed))
+        assert trader.queryAPI.resilience.policy.retries == 0
+        start = time.monotonic()
+        for i in range(20):
+            assert trader.queryAPI.get_balances()["success"]
+        assert time.monotonic() - start < 1.
+        assert trader.queryAPI.getRateLimitStats()["calls"] == 20
@@ -0,0 +1,118 @@
+import sys
+sys.path.append('../')
+
+import pytest
+
+from gltrader.resample import Resampler, CandleTimeframes, resample, bucketStart, historyLength
+from gltrader.stubserver import SyntheticMarket, StubExchange, StubServer
+from gltrader.trader import Trader
+
+SOURCE = 5
+NOW = 1510000000 - 1510000000 % 86400 + 7 * 3600 + 17 * 60
+
+
+def traderConfig(base_url):
+    return {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+            'api': {'base_url': base_url, 'calls_per_second': 1000, 'burst': 1000},
+            'show_all': False, 'min_volume': 0, 'tick_period': 0.1, 'candles_timeframe': 24,
+            'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+            'trades_per_tick': 10, 'strategies': {}}
+
+
+def history(market, count):
+    return market.candles(SOURCE * 60, count, NOW)
+
+
+def batch(candles, minutes):
+    # Reference - group by coarse candle, in one go
+    groups = {}
+    for candle in candles:
+        groups.setdefault(bucketStart(candle['T'], minutes), []).append(candle)
+    return [{'O': group[0]['O'], 'H': max(c['H'] for c in group), 'L': min(c['L'] for c in group),
+             'C': group[-1]['C'], 'V': sum(c['V'] for c in group), 'T': t, 'BV': sum(c['BV'] for c in group)}
+            for t, group in sorted(groups.items())]
+
+
+def same(candles, expected):
+    assert [c['T'] for c in candles] == [c['T'] for c in expected]
+    for candle, reference in zip(candles, expected):
+        for key in ('O', 'H', 'L', 'C', 'V', 'BV'):
+            assert candle[key] == pytest.approx(reference[key], rel=1e-12)
+
+
+def test_bucket_start():
+    assert bucketStart('2017-11-03T03:55:00', 30) == '2017-11-03T03:30:00'
+    assert bucketStart('2017-11-03T03:55:00', 60) == '2017-11-03T03:00:00'
+    assert bucketStart('2017-11-03T03:55:00', 1440) == '2017-11-03T00:00:00'
+
+
+@pytest.mark.parametrize('minutes', [5, 30, 60, 1440])
+def test_incremental_matches_batch(minutes):
+    market = SyntheticMarket('LTC', 5)
+    candles = history(market, 800)
+    resampler = Resampler(SOURCE, minutes)
+    resampled = []
+    for candle in candles:
+        # The forming candle is seen twice - half way through, then closed
+        resampler.update(dict(candle, H=candle['O'], L=candle['O'], C=candle['O'], V=candle['V'] / 2))
+        current = resampler.update(candle)
+        if resampled and resampled[-1]['T'] == current['T']:
+            resampled[-1] = current
+        else:
+            resampled.append(current)
+    same(resampled, batch(candles, minutes))
+    same(resample(candles, SOURCE, minutes), batch(candles, minutes))
+    # Older candles are ignored
+    assert resampler.update(candles[0]) is None
+
+
+def test_timeframes_update():
+    market = SyntheticMarket('ETH', 9)
+    length = historyLength(SOURCE, [5, 30, 60, 1440])
+    assert length == 3 * 1440 // SOURCE
+    allCandles = history(market, length + 24)
+    timeframes = CandleTimeframes(allCandles[:length], SOURCE, [5, 30, 60, 1440])
+    for candle in allCandles[length:]:
+        timeframes.updateCandles(dict(candle))
+    for minutes in (30, 60):
+        candles = timeframes.get(minutes)
+        expected = batch(allCandles, minutes)
+        assert candles.getAllPreviousDayCloses().tolist() == [c['C'] for c in expected[-candles.nrCandlesPerDay-1:-1]]
+        assert candles.currentBaseVol() == pytest.approx(expected[-1]['BV'], rel=1e-12)
+        assert candles.previousDayHigh() == max(c['H'] for c in expected[-candles.nrCandlesPerDay-1:-1])
+    day = timeframes.get(1440)
+    assert day.nrCandlesPerDay == 1 and day.previousDayTickBsVolStdev() == 0.
+    assert day.currentOpen() == batch(allCandles, 1440)[-1]['O']
+    assert timeframes.get(15) is None
+    with pytest.raises(ValueError):
+        CandleTimeframes(allCandles, SOURCE, [1])
+
+
+class IntervalExchange(StubExchange):
+    def __init__(self, *args, **kwargs):
+        super(IntervalExchange, self).__init__(*args, **kwargs)
+        self.intervals = set()
+
+    def _interval(self, params):
+        self.intervals.add(params.get('tickInterval'))
+        return super(IntervalExchange, self)._interval(params)
+
+
+def test_trader_fetches_source_interval_only():
+    exchange = IntervalExchange(3, history=historyLength(SOURCE, [5, 30, 60, 1440]))
+    server = StubServer(exchange)
+    server.start()
+    try:
+        config = traderConfig(server.base_url)
+        config.update({'candles_source': 'fiveMin', 'candles_timeframes': [5, 60, 1440]})
+        trader = Trader(config)
+        trader.wakeUp()
+        trader.wakeUp()
+    finally:
+        server.stop()
+    assert exchange.intervals == {'fiveMin'}
+    assert len(trader.markets) == 3
+    for market in trader.markets.values():
+        assert market.candles is market.candlesFor(30)
+        assert market.candlesFor(60).nrCandlesPerDay == 24
+        assert market.candlesFor(1440) is not None and market.candlesFor(15) is None
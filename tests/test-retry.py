@@ -0,0 +1,81 @@
+import sys
+sys.path.append('../')
+import time
+import asyncio
+
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from gltrader.retry import CircuitBreaker, isTransient, OPEN, HALF_OPEN, CLOSED
+from transports import newAPI as newTestAPI, ScriptedTransport
+
+
+def newAPI(transport, **kwargs):
+    kwargs.setdefault("retry_backoff", 0.001)
+    return newTestAPI(transport, **kwargs)
+
+
+def test_transient_failures():
+    assert isTransient({'success': False, 'message': 'NO_API_RESPONSE'})
+    assert isTransient({'success': False, 'message': 'Connection aborted.'})
+    assert not isTransient({'success': False, 'message': 'INVALID_MARKET'})
+    assert not isTransient({'success': True, 'message': ''})
+
+
+def test_retry_until_success():
+    transport = ScriptedTransport('REQUEST_TIMEOUT', 'NO_API_RESPONSE')
+    api = newAPI(transport)
+    assert api.get_balances()["success"]
+    assert transport.calls == 3
+    assert api.getApiCalls() == 3
+    assert api.getRetryStats()["retries"] == 2
+
+
+def test_no_retry_on_exchange_error():
+    transport = ScriptedTransport('INVALID_MARKET')
+    api = newAPI(transport)
+    assert api.get_candles("BTC-NOPE", "thirtyMin")["message"] == 'INVALID_MARKET'
+    assert transport.calls == 1
+
+
+def test_trades_not_retried():
+    transport = ScriptedTransport('NO_API_RESPONSE')
+    api = newAPI(transport)
+    assert not api.trade_buy("BTC-LTC", "LIMIT", 1., 1.)["success"]
+    assert transport.calls == 1
+
+
+def test_breaker_opens_and_probes():
+    transport = ScriptedTransport(*['SERVICE_UNAVAILABLE'] * 4)
+    api = newAPI(transport, retries=1, breaker_threshold=3, breaker_reset=0.05)
+    api.get_balances()
+    api.get_balances()
+    assert transport.calls == 3
+    assert api.get_balances()["message"] == 'CIRCUIT_OPEN'
+    assert transport.calls == 3
+    assert api.getRetryStats()["breakers"]["get_balances"]["state"] == OPEN
+
+    time.sleep(0.06)
+    # Failed probe - open again
+    assert api.get_balances()["message"] == 'SERVICE_UNAVAILABLE'
+    assert api.get_balances()["message"] == 'CIRCUIT_OPEN'
+    time.sleep(0.06)
+    assert api.get_balances()["success"]
+    assert api.getRetryStats()["breakers"]["get_balances"]["state"] == CLOSED
+
+
+def test_breaker_half_open_single_probe():
+    breaker = CircuitBreaker(threshold=1, resetTimeout=0)
+    breaker.recordFailure()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_async_retry():
+    transport = ScriptedTransport('NO_API_RESPONSE')
+
+    async def dispatch(request_url, apisign):
+        return transport(request_url, apisign)
+
+    api = newAPI(dispatch, apiClass=AsyncBittrexAPI)
+    assert asyncio.run(api.get_latest_candle("BTC-LTC", "thirtyMin"))["success"]
+    assert transport.calls == 2
@@ -0,0 +1,56 @@
+import sys
+sys.path.append('../')
+import time
+import random
+import statistics
+
+import pytest
+
+from gltrader.rolling import RollingMoments, RollingMax, RollingMin
+from gltrader.candlesticks import CandleSticks
+from gltrader.stubserver import SyntheticMarket
+
+INTERVAL = 1800
+
+
+def test_rolling_against_batch():
+    rnd = random.Random(3)
+    window = 48
+    values = [10 ** rnd.uniform(-3, 3) for i in range(2000)]
+    moments, highs, lows = RollingMoments(), RollingMax(window), RollingMin(window)
+    for i, value in enumerate(values):
+        moments.push(value, values[i - window] if i >= window else None)
+        highs.push(value)
+        lows.push(value)
+        batch = values[max(0, i - window + 1):i + 1]
+        assert moments.count == len(batch)
+        assert moments.sum == pytest.approx(sum(batch), rel=1e-9)
+        assert moments.mean == pytest.approx(statistics.mean(batch), rel=1e-9)
+        if len(batch) > 1:
+            assert moments.stdev() == pytest.approx(statistics.stdev(batch), rel=1e-6)
+        assert highs.value() == max(batch) and lows.value() == min(batch)
+
+
+def test_rolling_constant_window():
+    moments = RollingMoments()
+    for i in range(100):
+        moments.push(.1, .1 if i >= 10 else None)
+    assert moments.stdev() == pytest.approx(0., abs=1e-12)
+    with pytest.raises(ValueError):
+        RollingMoments().variance()
+
+
+def test_candlesticks_rolling_matches_batch():
+    market = SyntheticMarket('ETH', 11)
+    now = time.time() - INTERVAL * 100
+    candles = CandleSticks(market.candles(INTERVAL, 60, now), 24, 30)
+    for i in range(1, 101):
+        candles.updateCandles(market.candle(INTERVAL, int(now // INTERVAL) + i, now + i * INTERVAL))
+        volumes = candles.getAllPreviousDayVolumes()
+        baseVolumes = candles.getAllPreviousDayBaseVolumes()
+        assert candles.previousDayHigh() == max(candles.getAllPreviousDayHighs())
+        assert candles.previousDayTickVolMean() == pytest.approx(statistics.mean(volumes), rel=1e-9)
+        assert candles.previousDayTickVolStdev() == pytest.approx(statistics.stdev(volumes), rel=1e-6)
+        assert candles.previousDayTickBsVolMean() == pytest.approx(statistics.mean(baseVolumes), rel=1e-9)
+        assert candles.previousDayTickBsVolStdev() == pytest.approx(statistics.stdev(baseVolumes), rel=1e-6)
+        assert candles.avgVolPerHourPreviousDay() == pytest.approx(sum(volumes) / 24, rel=1e-9)
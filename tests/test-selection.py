@@ -0,0 +1,69 @@
+import sys
+sys.path.append('../')
+
+import numpy
+
+from gltrader.selection import MonitorRules, SummaryTable
+
+CONFIG = {"min_volume": 100., "show_all": False,
+          "currencies": {"LOW": {"min_volume": 10.}, "ON": {"monitor": True}, "OFF": {"monitor": False},
+                         "EMPTY": None}}
+
+
+def summary(currency, volume):
+    return {'Currency': {'Currency': currency}, 'Balance': {'Available': 0.},
+            'BitcoinMarket': {'MarketName': 'BTC-' + currency, 'BaseVolume': volume}}
+
+
+def test_global_threshold():
+    rules = MonitorRules(CONFIG)
+    assert rules.isMonitored(summary('LTC', 100.), False)
+    assert not rules.isMonitored(summary('LTC', 95.), False)
+    # Already monitored - kept down to the lower bound
+    assert rules.isMonitored(summary('LTC', 95.), True)
+    assert not rules.isMonitored(summary('LTC', 85.), True)
+    assert not rules.isMonitored(summary('EMPTY', 50.), False)
+
+
+def test_currency_rules():
+    rules = MonitorRules(CONFIG)
+    assert rules.isMonitored(summary('LOW', 10.), False)
+    assert not rules.isMonitored(summary('LOW', 5.), False)
+    assert rules.isMonitored(summary('ON', 0.), False)
+    assert not rules.isMonitored(summary('OFF', 1000.), True)
+    assert MonitorRules(dict(CONFIG, show_all=True)).isMonitored(summary('LTC', 0.), False)
+
+
+def test_no_bitcoin_market():
+    rules = MonitorRules(dict(CONFIG, show_all=True))
+    assert not rules.isMonitored({'Currency': {'Currency': 'BTC'}, 'BitcoinMarket': None}, False)
+    assert not rules.isMonitored(summary('ON', None), False)
+
+
+def test_select_matches_is_monitored():
+    summaries = [summary(currency, volume) for currency in ('LTC', 'LOW', 'ON', 'OFF', 'EMPTY', 'XXX')
+                 for volume in (0., 5., 10., 95., 100., None)]
+    summaries = [dict(s, Currency={'Currency': s['Currency']['Currency'] + str(i % 6)}) for i, s in enumerate(summaries)]
+    config = dict(CONFIG, currencies={s['Currency']['Currency']: CONFIG['currencies'].get(s['Currency']['Currency'][:-1])
+                                      for s in summaries if s['Currency']['Currency'][:-1] in CONFIG['currencies']})
+    summaries.append({'Currency': {'Currency': 'BTC'}, 'Balance': {'Available': 1.}, 'BitcoinMarket': None})
+    table = SummaryTable(summaries)
+    for showAll in (False, True):
+        rules = MonitorRules(dict(config, show_all=showAll))
+        for wasMonitored in (False, True):
+            selected = rules.select(table, numpy.full(len(table), wasMonitored))
+            assert selected.tolist() == [rules.isMonitored(s, wasMonitored) for s in summaries]
+
+
+def test_summary_table_changes():
+    before = SummaryTable([summary('LTC', 100.), summary('ETH', None)])
+    assert before.rows['BaseVolume'][0] == 100. and numpy.isnan(before.rows['BaseVolume'][1])
+    assert before.mask(['ETH', 'NEO']).tolist() == [False, True]
+    same = SummaryTable([summary('LTC', 100.), summary('ETH', None)])
+    assert not same.changed(before, same.align(before)).any()
+    # Reordered, one new currency, one changed volume
+    after = SummaryTable([summary('NEO', 1.), summary('ETH', None), summary('LTC', 101.)])
+    aligned = after.align(before)
+    assert aligned.tolist() == [-1, 1, 0]
+    assert after.changed(before, aligned).tolist() == [True, False, True]
+    assert after.changed(None, after.align(None)).all()
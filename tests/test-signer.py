@@ -0,0 +1,26 @@
+import sys
+sys.path.append('../')
+import hmac
+import hashlib
+
+from gltrader.bittrex import Bittrex, RequestSigner, API_V1_1, API_V2_0, PROTECTION_PRV, PROTECTION_PUB
+
+
+def test_signature_matches_hmac():
+    signer = RequestSigner("secret")
+    for url in ("https://bittrex.com/api/v2.0/key/balance/getbalances?apikey=k&nonce=1&", "x", ""):
+        assert signer.sign(url) == hmac.new(b"secret", url.encode(), hashlib.sha512).hexdigest()
+
+
+def test_request_url():
+    api = Bittrex("key", "secret", api_version=API_V2_0)
+    url = api._request_url(PROTECTION_PRV, {API_V2_0: '/key/balance/getbalances'})
+    assert url.startswith("https://bittrex.com/api/v2.0/key/balance/getbalances?apikey=key&nonce=")
+    assert url.endswith("&")
+    url = api._request_url(PROTECTION_PUB, {API_V2_0: '/pub/market/GetLatestTick'},
+                           {'marketName': 'BTC-LTC', 'tickInterval': 'thirtyMin'})
+    assert url == "https://bittrex.com/api/v2.0/pub/market/GetLatestTick?marketName=BTC-LTC&tickInterval=thirtyMin"
+
+    api = Bittrex("key", "secret", api_version=API_V1_1, base_url="http://127.0.0.1:8080/api/")
+    url = api._request_url(PROTECTION_PUB, {API_V1_1: '/public/getmarkets'})
+    assert url == "http://127.0.0.1:8080/api/v1.1/public/getmarkets?"
@@ -0,0 +1,50 @@
+import sys
+sys.path.append('../')
+import asyncio
+import threading
+
+from gltrader.AsyncBittrexAPI import AsyncBittrexAPI
+from transports import newAPI, CountingTransport, AsyncCountingTransport
+
+
+def runThreads(target, nrThreads=10):
+    threads = [threading.Thread(target=target) for i in range(nrThreads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_queries_share_one_request():
+    transport = CountingTransport(latency=0.1)
+    api = newAPI(transport)
+    runThreads(lambda: api.get_open_orders("BTC-LTC"))
+    assert transport.calls == 1
+    assert api.getCoalescedCalls() == 9
+
+
+def test_different_arguments_not_shared():
+    transport = CountingTransport(latency=0.1)
+    api = newAPI(transport)
+    runThreads(lambda: api.get_open_orders("BTC-LTC"), 1)
+    runThreads(lambda: api.get_open_orders("BTC-ETH"), 1)
+    assert transport.calls == 2
+
+
+def test_trades_never_shared():
+    transport = CountingTransport(latency=0.1)
+    api = newAPI(transport)
+    runThreads(lambda: api.trade_buy("BTC-LTC", "LIMIT", 1, 0.01))
+    assert transport.calls == 10
+
+
+def test_async_queries_share_one_request():
+    transport = AsyncCountingTransport(latency=0.1)
+    api = newAPI(transport, AsyncBittrexAPI)
+
+    async def fetchAll():
+        return await asyncio.gather(*[api.get_balances() for i in range(10)])
+
+    responses = asyncio.run(fetchAll())
+    assert transport.calls == 1
+    assert all(r["success"] for r in responses)
@@ -0,0 +1,69 @@
+import sys
+sys.path.append('../')
+
+from gltrader.trader import Trader
+from gltrader.strategy import Strategy
+from gltrader.action import SendSuccess
+
+CONFIG = {'exchange': {'bittrex': {'key': 'key', 'secret': 'secret'}},
+          'api': {'base_url': 'http://127.0.0.1:9/api'},
+          'show_all': False, 'min_volume': 10., 'tick_period': 1, 'candles_timeframe': 24,
+          'candles_singletick': 30, 'currencies': {}, 'live_trades': False, 'do_actions': False,
+          'trades_per_tick': 10, 'strategies': {'counting': {'file': 'notify_tick.py', 'classname': 'NotifyTick', 'run': True}}}
+
+
+class Counting(Strategy):
+    stratName = "counting"
+
+    def run(self):
+        # State kept across ticks
+        self.runs = getattr(self, "runs", 0) + 1
+        return None
+
+
+class Notifying(Strategy):
+    stratName = "counting"
+
+    def run(self):
+        self.runs = getattr(self, "runs", 0) + 1
+        return SendSuccess("Tick " + str(self.runs), self.market)
+
+
+def summary(currency, volume):
+    return {'Currency': {'Currency': currency}, 'Balance': {'Balance': 1., 'Available': 1., 'Pending': 0.},
+            'BitcoinMarket': {'MarketName': 'BTC-' + currency, 'BaseVolume': volume}}
+
+
+def test_strategy_instances_persist():
+    trader = Trader(CONFIG)
+    trader.strategies = [Counting]
+    try:
+        trader.getActiveMarkets([summary('LTC', 100.), summary('ETH', 100.)])
+        instances = dict(trader.strategyInstances)
+        assert sorted(name for strategy, name in instances) == ['ETH', 'LTC']
+        trader.runStrategies()
+        trader.runStrategies()
+        assert trader.strategyInstances == instances
+        assert [instances[(Counting, name)].runs for name in ('ETH', 'LTC')] == [2, 2]
+        # Dropped with their market
+        trader.getActiveMarkets([summary('LTC', 100.), summary('ETH', 1.)])
+        assert list(trader.strategyInstances) == [(Counting, 'LTC')]
+        trader.runStrategies()
+        assert trader.strategyInstances[(Counting, 'LTC')].runs == 3
+    finally:
+        trader.stopFeed()
+
+
+def test_notify_only_action_runs_every_tick():
+    # do_actions off - the action is never done, the strategy still runs at every tick
+    trader = Trader(CONFIG)
+    trader.strategies = [Notifying]
+    try:
+        trader.getActiveMarkets([summary('LTC', 100.)])
+        for i in range(3):
+            trader.runStrategies()
+        strat = trader.strategyInstances[(Notifying, 'LTC')]
+        assert strat.runs == 3
+        assert not strat.action.done
+    finally:
+        trader.stopFeed()
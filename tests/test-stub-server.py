@@ -0,0 +1,70 @@
+import sys
+sys.path.append('../')
+
+from gltrader.bittrex import SessionDispatcher, TICKINTERVAL_THIRTYMIN
+from gltrader.stubserver import StubExchange, StubServer
+from transports import newAPI
+
+
+def withStub(test, **kwargs):
+    server = StubServer(StubExchange(**kwargs)).start()
+    dispatch = SessionDispatcher()
+    try:
+        test(newAPI(dispatch, base_url=server.base_url, retries=0, breaker_threshold=0), server.exchange)
+    finally:
+        dispatch.close()
+        server.stop()
+
+
+def test_balances_and_candles():
+    def test(api, exchange):
+        response = api.get_balances()
+        assert response["success"]
+        assert len(response["result"]) == 51
+        summary = response["result"][1]
+        assert summary["BitcoinMarket"]["MarketName"] == "BTC-" + summary["Currency"]["Currency"]
+
+        candles = api.get_candles(summary["BitcoinMarket"]["MarketName"], TICKINTERVAL_THIRTYMIN)
+        assert candles["success"] and len(candles["result"]) == 100
+        latest = api.get_latest_candle(summary["BitcoinMarket"]["MarketName"], TICKINTERVAL_THIRTYMIN)
+        assert latest["result"][0]["T"] == candles["result"][-1]["T"]
+
+        assert not api.get_candles("BTC-NOPE", TICKINTERVAL_THIRTYMIN)["success"]
+    withStub(test, nrMarkets=50, history=100)
+
+
+def test_orders():
+    def test(api, exchange):
+        order = api.trade_buy("BTC-AAB", "LIMIT", 10., 0.0001, "GOOD_TIL_CANCELLED", "NONE")
+        assert order["success"] and order["result"]["BuyOrSell"] == "Buy"
+        openOrders = api.get_open_orders("BTC-AAB")["result"]
+        assert [o["OrderUuid"] for o in openOrders] == [order["result"]["OrderId"]]
+        assert api.get_open_orders("BTC-AAC")["result"] == []
+    withStub(test, nrMarkets=5)
+
+
+def test_errors_and_rate_limit():
+    def test(api, exchange):
+        responses = [api.get_latest_candle("BTC-AAA", TICKINTERVAL_THIRTYMIN) for i in range(20)]
+        assert not any(r["success"] for r in responses)
+        assert exchange.getStats()["errors"] == 20
+    withStub(test, nrMarkets=5, errorRate=1.)
+
+    def test(api, exchange):
+        responses = [api.get_latest_candle("BTC-AAA", TICKINTERVAL_THIRTYMIN) for i in range(20)]
+        assert sum(r["success"] for r in responses) < 20
+        assert responses[-1]["message"] == "RATE_LIMIT_EXCEEDED"
+    withStub(test, nrMarkets=5, rateLimit=1., burst=5)
+
+
+def test_order_errors_and_market_price():
+    exchange = StubExchange(nrMarkets=5)
+    status, response = exchange.handle('/v1.1/market/buylimit', {'market': 'BTC-AAB', 'quantity': '0', 'rate': '1'})
+    assert (status, response["success"]) == (200, False)
+    assert response["message"] == 'INVALID_QUANTITY_OR_RATE'
+    status, response = exchange.handle('/v1.1/market/selllimit', {'market': 'BTC-AAB', 'quantity': '1', 'rate': '1'})
+    assert response["success"] and response["result"]["uuid"]
+    # Market order - no rate
+    status, response = exchange.handle('/v2.0/key/market/tradebuy', {'marketname': 'BTC-AAB', 'quantity': '1',
+                                                                       'rate': 'None', 'ordertype': 'MARKET'})
+    assert response["success"] and response["result"]["Rate"] > 0.
@@ -0,0 +1,86 @@
+#===============================================================================
+# In-process API transports shared by the tests, and the API objects on them
+#===============================================================================
+
+import time
+import asyncio
+
+from gltrader.BittrexAPI import BittrexAPI
+from gltrader.ratelimit import TokenBucket, PriorityScheduler
+
+CANDLE_DATA = {'O': 1., 'H': 1., 'L': 1., 'C': 1., 'V': 1., 'T': '2017-11-03T03:00:00', 'BV': 1.}
+
+
+def newAPI(transport=None, apiClass=BittrexAPI, **kwargs):
+    #===========================================================================
+    # :param transport: Dispatch of the API - None for the default one
+    # :param apiClass: BittrexAPI or AsyncBittrexAPI
+    # :returns: An API with a rate limiter of its own, not limiting the tests -
+    #           the process-wide one is left as the trader configures it
+    #===========================================================================
+    return apiClass("key", "secret", dispatch=transport, limiter=PriorityScheduler(TokenBucket(1000., 1000.)),
+                    **kwargs)
+
+
+class ExchangeTransport(object):
+    #===========================================================================
+    # Answers get_balances with `balances`, and every other request with
+    # [`candle`] - the last path element of each request is kept in `paths`
+    #===========================================================================
+    def __init__(self, balances=(), candle=CANDLE_DATA):
+        self.balances = list(balances)
+        self.candle = candle
+        self.paths = []
+
+    def __call__(self, request_url, apisign):
+        path = request_url.split('?')[0]
+        self.paths.append(path.rsplit('/', 1)[-1])
+        if path.endswith('getbalances'):
+            return {'success': True, 'message': '', 'result': self.balances}
+        return {'success': True, 'message': '', 'result': [self.candle]}
+
+
+class CountingTransport(object):
+    #===========================================================================
+    # Answers every request with `result` after `latency` seconds - `calls`
+    # counts the requests, and the URL of each is kept in `urls`
+    #===========================================================================
+    def __init__(self, result=(), success=True, message='', latency=0.):
+        self.result = list(result)
+        self.success = success
+        self.message = message
+        self.latency = latency
+        self.calls = 0
+        self.urls = []
+
+    def answer(self):
+        return {'success': self.success, 'message': self.message, 'result': self.result}
+
+    def __call__(self, request_url, apisign):
+        self.calls += 1
+        self.urls.append(request_url)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.answer()
+
+
+class AsyncCountingTransport(CountingTransport):
+    # CountingTransport, as a coroutine
+    async def __call__(self, request_url, apisign):
+        self.calls += 1
+        self.urls.append(request_url)
+        await asyncio.sleep(self.latency)
+        return self.answer()
+
+
+class ScriptedTransport(object):
+    # Answers with the given failure messages in turn, then succeeds
+    def __init__(self, *messages):
+        self.messages = list(messages)
+        self.calls = 0
+
+    def __call__(self, request_url, apisign):
+        self.calls += 1
+        if self.messages:
+            return {'success': False, 'message': self.messages.pop(0), 'result': None}
+        return {'success': True, 'message': '', 'result': []}